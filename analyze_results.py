@@ -1,210 +1,392 @@
-import os
+import argparse
 import json
-import pandas as pd
+import os
+from urllib.parse import urlparse
+
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import seaborn as sns
-import argparse
+
+from result_sink import iter_run_records, load_run_fingerprint, results_jsonl_path
+
+BENCHMARKS = ["mind2web", "webarena", "webvoyager", "webcanvas"]
+
+# Per-task numeric columns summarised in the report
+METRICS = ["time_taken", "total_tokens", "n_steps", "cost_usd"]
+PERCENTILES = [0.5, 0.9, 0.99]
+
+# Sections of an agent step timed by browser_use (StepMetadata.timings); "other" is the rest of the step
+STEP_SECTIONS = ["page_load", "dom_extraction", "screenshot", "llm", "action"]
+BREAKDOWN_COLUMNS = [f"{section}_time" for section in STEP_SECTIONS] + ["other_time"]
+# Per-step measurements that overlap the sections (StepMetadata.metrics), with their report description
+STEP_METRICS = {
+    "network_idle_wait": "waiting for network idle (part of page_load)",
+    "state_capture": "capturing the browser state, with its stages running concurrently",
+    "state_dom_tree": "building the DOM tree, one of the state capture stages",
+    "state_stages_skipped": "state capture stages skipped because the agent did not need them (e.g. screenshots without vision)",
+    "gc_collect": "garbage collections run by the memory pressure hook",
+    "section_overlap": "counted in two sections at once because they ran concurrently",
+}
+# STEP_METRICS that are counts, not seconds
+STEP_COUNTS = {"state_stages_skipped"}
+
+# USD per 1M tokens: (prompt, cached prompt, completion). Tasks of other models get no cost.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "o3-mini": (1.10, 0.55, 4.40),
+}
+
+# Bootstrap resamples are drawn in batches of at most this many values, to bound memory
+BOOTSTRAP_BATCH_VALUES = 5_000_000
+
+def _task_row(record, benchmark):
+    """Flatten one result record into the scalar columns the analysis uses"""
+    token_usage = record.get("token_usage") or {}
+    steps = record.get("steps") or []
+    domain = record.get("domain")
+    if not domain and steps:
+        domain = urlparse(steps[0].get("url") or "").netloc
+
+    section_times = dict.fromkeys(STEP_SECTIONS, 0.0)
+    step_metrics = dict.fromkeys(STEP_METRICS, 0.0)
+    step_time = 0.0
+    for step in steps:
+        step_time += step.get("duration", 0) or 0
+        for section, seconds in (step.get("timings") or {}).items():
+            if section in section_times:
+                section_times[section] += seconds
+        for metric, value in (step.get("metrics") or {}).items():
+            if metric in step_metrics:
+                step_metrics[metric] += value
+
+    row = {
+        "benchmark": benchmark,
+        "task_index": record.get("task_index", 0),
+        "task_id": record.get("task_id"),
+        "domain": domain or "unknown",
+        "success": bool(record.get("success", False)),
+        "failed": bool(record.get("error")),
+        "time_taken": record.get("time_taken", 0) or 0,
+        "prompt_tokens": token_usage.get("prompt", 0) or 0,
+        "completion_tokens": token_usage.get("completion", 0) or 0,
+        "cached_tokens": token_usage.get("cached", 0) or 0,
+        "total_tokens": token_usage.get("total", 0) or 0,
+        "model": record.get("model"),
+        "n_steps": len(steps),
+    }
+    for section, seconds in section_times.items():
+        row[f"{section}_time"] = seconds
+    # Concurrent sections count some seconds twice, those are taken out once
+    sections_time = sum(section_times.values()) - step_metrics["section_overlap"]
+    row["other_time"] = max(step_time - sections_time, 0.0)
+    row.update(step_metrics)
+    return row
 
 def load_results(results_dir):
-    """Load all results from the results directory"""
-    results = {}
-    
-    for benchmark in ["mind2web", "webarena", "webvoyager", "webcanvas"]:
+    """
+    Load all results into one table with a row per task, preferring the JSONL result streams.
+
+    Records are flattened while they are read, so only the scalar columns are kept in memory.
+    Like the materialized results, a stream only contributes the records of the run
+    configuration in its manifest.
+    """
+    rows = []
+
+    for benchmark in BENCHMARKS:
+        stream_file = results_jsonl_path(results_dir, benchmark)
         results_file = os.path.join(results_dir, f"{benchmark}_results.json")
-        if os.path.exists(results_file):
+        if os.path.exists(stream_file):
+            fingerprint = load_run_fingerprint(results_dir, benchmark)
+            rows.extend(_task_row(record, benchmark) for record in iter_run_records(stream_file, fingerprint))
+        elif os.path.exists(results_file):
             with open(results_file, 'r') as f:
-                results[benchmark] = json.load(f)
-    
-    return results
-
-def analyze_success_rates(results):
-    """Analyze success rates across benchmarks"""
-    success_rates = {}
-    
-    for benchmark, benchmark_results in results.items():
-        success_count = sum(1 for r in benchmark_results if r.get("success", False))
-        total_count = len(benchmark_results)
-        success_rate = success_count / total_count if total_count > 0 else 0
-        success_rates[benchmark] = success_rate * 100
-    
-    return success_rates
-
-def analyze_time_taken(results):
-    """Analyze time taken per task across benchmarks"""
-    time_stats = {}
-    
-    for benchmark, benchmark_results in results.items():
-        times = [r.get("time_taken", 0) for r in benchmark_results]
-        time_stats[benchmark] = {
-            "mean": sum(times) / len(times) if times else 0,
-            "median": sorted(times)[len(times)//2] if times else 0,
-            "min": min(times) if times else 0,
-            "max": max(times) if times else 0
-        }
-    
-    return time_stats
-
-def analyze_token_usage(results):
-    """Analyze token usage across benchmarks"""
-    token_stats = {}
-    
-    for benchmark, benchmark_results in results.items():
-        total_tokens = [r.get("token_usage", {}).get("total", 0) for r in benchmark_results]
-        token_stats[benchmark] = {
-            "mean": sum(total_tokens) / len(total_tokens) if total_tokens else 0,
-            "median": sorted(total_tokens)[len(total_tokens)//2] if total_tokens else 0,
-            "min": min(total_tokens) if total_tokens else 0,
-            "max": max(total_tokens) if total_tokens else 0,
-            "total": sum(total_tokens)
-        }
-    
+                rows.extend(_task_row(record, benchmark) for record in json.load(f))
+
+    df = pd.DataFrame(rows, columns=list(_task_row({}, "").keys()))
+    # A resumed or merged stream can hold a task more than once, the latest record wins
+    df = df.drop_duplicates(["benchmark", "task_id"], keep="last")
+    df["benchmark"] = pd.Categorical(df["benchmark"], categories=[b for b in BENCHMARKS if b in set(df["benchmark"])])
+    df = add_cost(df)
+    return df.sort_values(["benchmark", "task_index"]).reset_index(drop=True)
+
+def add_cost(df, prices=MODEL_PRICES):
+    """Add the LLM cost of every task in USD, from its model's per-token prices"""
+    price_table = pd.DataFrame.from_dict(prices, orient="index", columns=["prompt", "cached", "completion"])
+    task_prices = price_table.reindex(df["model"]).to_numpy()
+    uncached = (df["prompt_tokens"] - df["cached_tokens"]).clip(lower=0).to_numpy()
+    df["cost_usd"] = (
+        uncached * task_prices[:, 0]
+        + df["cached_tokens"].to_numpy() * task_prices[:, 1]
+        + df["completion_tokens"].to_numpy() * task_prices[:, 2]
+    ) / 1_000_000
+    return df
+
+def summarize(df, by="benchmark"):
+    """
+    All per-group statistics in one vectorised pass: task count, success rate, and
+    mean/min/max/p50/p90/p99 of every metric.
+    """
+    grouped = df.groupby(by, observed=True)
+    summary = grouped.agg(
+        tasks=("success", "size"),
+        success_rate=("success", "mean"),
+        failed=("failed", "sum"),
+        total_tokens_sum=("total_tokens", "sum"),
+        completion_tokens_sum=("completion_tokens", "sum"),
+        cached_tokens_sum=("cached_tokens", "sum"),
+        cost_usd_sum=("cost_usd", "sum"),
+        llm_time_sum=("llm_time", "sum"),
+        time_taken_sum=("time_taken", "sum"),
+    )
+    stats = grouped[METRICS].agg(["mean", "min", "max"])
+    stats.columns = [f"{metric}_{stat}" for metric, stat in stats.columns]
+
+    quantiles = grouped[METRICS].quantile(PERCENTILES).unstack()
+    quantiles.columns = [f"{metric}_p{round(q * 100)}" for metric, q in quantiles.columns]
+
+    summary = summary.join(stats).join(quantiles)
+    summary["success_rate"] *= 100
+    # Generation speed while waiting on the LLM, and overall token throughput of the tasks
+    summary["output_tokens_per_sec"] = summary["completion_tokens_sum"] / summary["llm_time_sum"].replace(0, np.nan)
+    summary["tokens_per_sec"] = summary["total_tokens_sum"] / summary["time_taken_sum"].replace(0, np.nan)
+    return summary
+
+def bootstrap_ci(df, column, by="benchmark", n_resamples=1000, confidence=0.95, seed=0):
+    """Percentile bootstrap confidence interval of the mean of `column`, per group"""
+    rng = np.random.default_rng(seed)
+    alpha = (1 - confidence) / 2
+    intervals = {}
+
+    for group, values in df.groupby(by, observed=True)[column]:
+        values = values.to_numpy(dtype=float)
+        n = len(values)
+        if n == 0:
+            continue
+        # Resample the means in batches: every batch is one (batch, n) index draw
+        batch = max(1, min(n_resamples, BOOTSTRAP_BATCH_VALUES // n))
+        means = np.concatenate([
+            values[rng.integers(0, n, size=(min(batch, n_resamples - start), n))].mean(axis=1)
+            for start in range(0, n_resamples, batch)
+        ])
+        lower, upper = np.quantile(means, [alpha, 1 - alpha])
+        intervals[group] = {"lower": lower, "upper": upper}
+
+    result = pd.DataFrame.from_dict(intervals, orient="index", columns=["lower", "upper"])
+    result.index.name = by
+    return result
+
+def analyze(df, n_resamples=1000, seed=0):
+    """Compute every table the report and plots use"""
+    return {
+        "summary": summarize(df),
+        "per_domain": summarize(df, by=["benchmark", "domain"]),
+        "success_ci": bootstrap_ci(df.assign(success=df["success"] * 100.0), "success",
+                                   n_resamples=n_resamples, seed=seed),
+        "time_ci": bootstrap_ci(df, "time_taken", n_resamples=n_resamples, seed=seed),
+        "latency_breakdown": df.groupby("benchmark", observed=True)[BREAKDOWN_COLUMNS + list(STEP_METRICS)].mean(),
+    }
+
+def analyze_success_rates(summary):
+    """Success rate (%) per benchmark"""
+    return summary["success_rate"].to_dict()
+
+def _metric_stats(summary, metric):
+    stats = {
+        "mean": summary[f"{metric}_mean"],
+        "median": summary[f"{metric}_p50"],
+        "p90": summary[f"{metric}_p90"],
+        "p99": summary[f"{metric}_p99"],
+        "min": summary[f"{metric}_min"],
+        "max": summary[f"{metric}_max"],
+    }
+    return pd.DataFrame(stats).to_dict(orient="index")
+
+def analyze_time_taken(summary):
+    """Time taken per task across benchmarks"""
+    return _metric_stats(summary, "time_taken")
+
+def analyze_token_usage(summary):
+    """Token usage per task across benchmarks"""
+    token_stats = _metric_stats(summary, "total_tokens")
+    for benchmark, row in summary.iterrows():
+        token_stats[benchmark].update({
+            "total": row["total_tokens_sum"],
+            "cached": row["cached_tokens_sum"],
+            "cost_total": row["cost_usd_sum"],
+            "cost_mean": row["cost_usd_mean"],
+            "output_tokens_per_sec": row["output_tokens_per_sec"],
+            "tokens_per_sec": row["tokens_per_sec"],
+        })
     return token_stats
 
-def analyze_steps(results):
-    """Analyze steps taken per task across benchmarks"""
-    step_stats = {}
-    
-    for benchmark, benchmark_results in results.items():
-        steps = [len(r.get("steps", [])) for r in benchmark_results]
-        step_stats[benchmark] = {
-            "mean": sum(steps) / len(steps) if steps else 0,
-            "median": sorted(steps)[len(steps)//2] if steps else 0,
-            "min": min(steps) if steps else 0,
-            "max": max(steps) if steps else 0
-        }
-    
-    return step_stats
-
-def generate_plots(results, output_dir):
+def analyze_steps(summary):
+    """Steps taken per task across benchmarks"""
+    return _metric_stats(summary, "n_steps")
+
+def _plot_metric(summary, metric, title, ylabel, file_name, output_dir):
+    data = summary[[f"{metric}_mean", f"{metric}_p50", f"{metric}_p90"]].rename(
+        columns=lambda c: {"mean": "mean", "p50": "median", "p90": "p90"}[c.rsplit("_", 1)[1]]
+    )
+    data = data.reset_index().melt(id_vars="benchmark", var_name="metric", value_name=ylabel)
+    plt.figure(figsize=(10, 6))
+    sns.barplot(x="benchmark", y=ylabel, hue="metric", data=data)
+    plt.title(title)
+    plt.xlabel("Benchmark")
+    plt.ylabel(ylabel)
+    plt.savefig(os.path.join(output_dir, file_name))
+    plt.close()
+
+def generate_plots(analysis, output_dir):
     """Generate plots for visualization"""
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Check if results are empty
-    if not results:
-        print("No results to analyze. Creating placeholder report.")
-        with open(os.path.join(output_dir, "evaluation_report.md"), "w") as f:
-            f.write("# Browser Use Evaluation Report\n\n")
-            f.write("No evaluation results available yet. Please run the evaluations first.\n")
-        return
-    
-    # Success rate plot
-    success_rates = analyze_success_rates(results)
-    if success_rates:
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x=list(success_rates.keys()), y=list(success_rates.values()))
-        plt.title("Success Rate by Benchmark")
-        plt.xlabel("Benchmark")
-        plt.ylabel("Success Rate (%)")
-        plt.savefig(os.path.join(output_dir, "success_rates.png"))
-    
-    # Time taken plot
-    time_stats = analyze_time_taken(results)
-    if time_stats:
-        plt.figure(figsize=(10, 6))
-        data = []
-        for benchmark, stats in time_stats.items():
-            data.append({"benchmark": benchmark, "time": stats["mean"], "metric": "mean"})
-            data.append({"benchmark": benchmark, "time": stats["median"], "metric": "median"})
-        
-        if data:
-            df = pd.DataFrame(data)
-            sns.barplot(x="benchmark", y="time", hue="metric", data=df)
-            plt.title("Time Taken by Benchmark")
-            plt.xlabel("Benchmark")
-            plt.ylabel("Time (seconds)")
-            plt.savefig(os.path.join(output_dir, "time_taken.png"))
-    
-    # Token usage plot
-    token_stats = analyze_token_usage(results)
-    if token_stats:
-        plt.figure(figsize=(10, 6))
-        data = []
-        for benchmark, stats in token_stats.items():
-            data.append({"benchmark": benchmark, "tokens": stats["mean"], "metric": "mean"})
-            data.append({"benchmark": benchmark, "tokens": stats["median"], "metric": "median"})
-        
-        if data:
-            df = pd.DataFrame(data)
-            sns.barplot(x="benchmark", y="tokens", hue="metric", data=df)
-            plt.title("Token Usage by Benchmark")
-            plt.xlabel("Benchmark")
-            plt.ylabel("Tokens")
-            plt.savefig(os.path.join(output_dir, "token_usage.png"))
-    
-    # Steps taken plot
-    step_stats = analyze_steps(results)
-    if step_stats:
-        plt.figure(figsize=(10, 6))
-        data = []
-        for benchmark, stats in step_stats.items():
-            data.append({"benchmark": benchmark, "steps": stats["mean"], "metric": "mean"})
-            data.append({"benchmark": benchmark, "steps": stats["median"], "metric": "median"})
-        
-        if data:
-            df = pd.DataFrame(data)
-            sns.barplot(x="benchmark", y="steps", hue="metric", data=df)
-            plt.title("Steps Taken by Benchmark")
-            plt.xlabel("Benchmark")
-            plt.ylabel("Steps")
-            plt.savefig(os.path.join(output_dir, "steps_taken.png"))
-            
-def generate_report(results, output_dir):
+    summary = analysis["summary"]
+
+    # Success rate plot, with bootstrap confidence intervals
+    success_ci = analysis["success_ci"].reindex(summary.index)
+    plt.figure(figsize=(10, 6))
+    rates = summary["success_rate"]
+    errors = np.vstack([rates - success_ci["lower"], success_ci["upper"] - rates])
+    plt.bar(summary.index.astype(str), rates, yerr=errors, capsize=6,
+            color=sns.color_palette(n_colors=len(summary)))
+    plt.title("Success Rate by Benchmark")
+    plt.xlabel("Benchmark")
+    plt.ylabel("Success Rate (%)")
+    plt.savefig(os.path.join(output_dir, "success_rates.png"))
+    plt.close()
+
+    _plot_metric(summary, "time_taken", "Time Taken by Benchmark", "Time (seconds)", "time_taken.png", output_dir)
+    _plot_metric(summary, "total_tokens", "Token Usage by Benchmark", "Tokens", "token_usage.png", output_dir)
+    _plot_metric(summary, "n_steps", "Steps Taken by Benchmark", "Steps", "steps_taken.png", output_dir)
+
+    # Where the time of a task goes, stacked per benchmark
+    breakdown = analysis["latency_breakdown"][BREAKDOWN_COLUMNS].rename(columns=lambda c: c[:-len("_time")])
+    breakdown.index = breakdown.index.astype(str)
+    ax = breakdown.plot(kind="bar", stacked=True, figsize=(10, 6), rot=0)
+    ax.set_title("Latency Breakdown per Task by Benchmark")
+    ax.set_xlabel("Benchmark")
+    ax.set_ylabel("Mean time per task (seconds)")
+    ax.legend(title="Step section")
+    plt.savefig(os.path.join(output_dir, "latency_breakdown.png"))
+    plt.close()
+
+def generate_report(analysis, output_dir):
     """Generate a comprehensive report"""
-    success_rates = analyze_success_rates(results)
-    time_stats = analyze_time_taken(results)
-    token_stats = analyze_token_usage(results)
-    step_stats = analyze_steps(results)
-    
+    summary = analysis["summary"]
+    success_rates = analyze_success_rates(summary)
+    time_stats = analyze_time_taken(summary)
+    token_stats = analyze_token_usage(summary)
+    step_stats = analyze_steps(summary)
+    success_ci = analysis["success_ci"]
+    time_ci = analysis["time_ci"]
+
     report = "# Browser Use Evaluation Report\n\n"
-    
+
     # Success rates
     report += "## Success Rates\n\n"
-    report += "| Benchmark | Success Rate |\n"
-    report += "|-----------|-------------|\n"
+    report += "| Benchmark | Tasks | Success Rate | 95% CI |\n"
+    report += "|-----------|-------|--------------|--------|\n"
     for benchmark, rate in success_rates.items():
-        report += f"| {benchmark} | {rate:.2f}% |\n"
+        ci = success_ci.loc[benchmark]
+        report += f"| {benchmark} | {summary.loc[benchmark, 'tasks']} | {rate:.2f}% | {ci['lower']:.2f}% - {ci['upper']:.2f}% |\n"
     report += "\n"
-    
+
     # Time taken
     report += "## Time Taken (seconds)\n\n"
-    report += "| Benchmark | Mean | Median | Min | Max |\n"
-    report += "|-----------|------|--------|-----|-----|\n"
+    report += "| Benchmark | Mean | 95% CI of Mean | Median | P90 | P99 | Min | Max |\n"
+    report += "|-----------|------|----------------|--------|-----|-----|-----|-----|\n"
     for benchmark, stats in time_stats.items():
-        report += f"| {benchmark} | {stats['mean']:.2f} | {stats['median']:.2f} | {stats['min']:.2f} | {stats['max']:.2f} |\n"
+        ci = time_ci.loc[benchmark]
+        report += (f"| {benchmark} | {stats['mean']:.2f} | {ci['lower']:.2f} - {ci['upper']:.2f} | {stats['median']:.2f} "
+                   f"| {stats['p90']:.2f} | {stats['p99']:.2f} | {stats['min']:.2f} | {stats['max']:.2f} |\n")
     report += "\n"
-    
+
     # Token usage
     report += "## Token Usage\n\n"
-    report += "| Benchmark | Mean | Median | Min | Max | Total |\n"
-    report += "|-----------|------|--------|-----|-----|-------|\n"
+    report += "| Benchmark | Mean | Median | P90 | P99 | Min | Max | Total | Cached |\n"
+    report += "|-----------|------|--------|-----|-----|-----|-----|-------|--------|\n"
+    for benchmark, stats in token_stats.items():
+        report += (f"| {benchmark} | {stats['mean']:.2f} | {stats['median']:.2f} | {stats['p90']:.2f} | {stats['p99']:.2f} "
+                   f"| {stats['min']:.0f} | {stats['max']:.0f} | {stats['total']:.0f} | {stats['cached']:.0f} |\n")
+    report += "\n"
+
+    # Cost and token throughput
+    report += "## Cost and Token Throughput\n\n"
+    report += "| Benchmark | Total Cost (USD) | Mean Cost per Task (USD) | Output Tokens/sec (LLM) | Tokens/sec (task) |\n"
+    report += "|-----------|------------------|--------------------------|-------------------------|-------------------|\n"
     for benchmark, stats in token_stats.items():
-        report += f"| {benchmark} | {stats['mean']:.2f} | {stats['median']:.2f} | {stats['min']} | {stats['max']} | {stats['total']} |\n"
+        report += (f"| {benchmark} | {stats['cost_total']:.4f} | {stats['cost_mean']:.4f} "
+                   f"| {stats['output_tokens_per_sec']:.1f} | {stats['tokens_per_sec']:.1f} |\n")
     report += "\n"
-    
+
     # Steps taken
     report += "## Steps Taken\n\n"
-    report += "| Benchmark | Mean | Median | Min | Max |\n"
-    report += "|-----------|------|--------|-----|-----|\n"
+    report += "| Benchmark | Mean | Median | P90 | P99 | Min | Max |\n"
+    report += "|-----------|------|--------|-----|-----|-----|-----|\n"
     for benchmark, stats in step_stats.items():
-        report += f"| {benchmark} | {stats['mean']:.2f} | {stats['median']:.2f} | {stats['min']} | {stats['max']} |\n"
-    
+        report += (f"| {benchmark} | {stats['mean']:.2f} | {stats['median']:.2f} | {stats['p90']:.2f} | {stats['p99']:.2f} "
+                   f"| {stats['min']} | {stats['max']} |\n")
+    report += "\n"
+
+    # Latency breakdown
+    report += "## Latency Breakdown (mean seconds per task)\n\n"
+    report += "| Benchmark | " + " | ".join(c[:-len("_time")] for c in BREAKDOWN_COLUMNS) + " |\n"
+    report += "|-----------|" + "|".join("---" for _ in BREAKDOWN_COLUMNS) + "|\n"
+    for benchmark, row in analysis["latency_breakdown"].iterrows():
+        report += f"| {benchmark} | " + " | ".join(f"{row[c]:.2f}" for c in BREAKDOWN_COLUMNS) + " |\n"
+    report += "\n"
+    for benchmark, row in analysis["latency_breakdown"].iterrows():
+        for metric, description in STEP_METRICS.items():
+            unit = "" if metric in STEP_COUNTS else "s"
+            report += f"- {benchmark}: {row[metric]:.2f}{unit} per task {description}\n"
+    report += "\n"
+
+    # Per-domain breakdown
+    report += "## Per-Domain Breakdown\n\n"
+    report += "| Benchmark | Domain | Tasks | Success Rate | Median Time | P90 Time | Median Tokens |\n"
+    report += "|-----------|--------|-------|--------------|-------------|----------|---------------|\n"
+    for (benchmark, domain), row in analysis["per_domain"].iterrows():
+        report += (f"| {benchmark} | {domain} | {int(row['tasks'])} | {row['success_rate']:.2f}% | {row['time_taken_p50']:.2f} "
+                   f"| {row['time_taken_p90']:.2f} | {row['total_tokens_p50']:.0f} |\n")
+
     # Write report to file
     with open(os.path.join(output_dir, "evaluation_report.md"), "w") as f:
         f.write(report)
 
+def save_tables(analysis, output_dir):
+    """Write the summary tables as CSV for further processing"""
+    analysis["summary"].to_csv(os.path.join(output_dir, "summary.csv"))
+    analysis["per_domain"].to_csv(os.path.join(output_dir, "per_domain.csv"))
+
 def main():
     parser = argparse.ArgumentParser(description="Analyze web agent evaluation results")
     parser.add_argument("--results_dir", type=str, default="results",
                         help="Directory containing results")
     parser.add_argument("--output_dir", type=str, default="analysis",
                         help="Directory to save analysis results")
-    
+    parser.add_argument("--bootstrap_resamples", type=int, default=1000,
+                        help="Number of bootstrap resamples for confidence intervals")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for bootstrap resampling")
+
     args = parser.parse_args()
-    
-    results = load_results(args.results_dir)
-    generate_plots(results, args.output_dir)
-    generate_report(results, args.output_dir)
-    
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    df = load_results(args.results_dir)
+    if df.empty:
+        print("No results to analyze. Creating placeholder report.")
+        with open(os.path.join(args.output_dir, "evaluation_report.md"), "w") as f:
+            f.write("# Browser Use Evaluation Report\n\n")
+            f.write("No evaluation results available yet. Please run the evaluations first.\n")
+        return
+
+    analysis = analyze(df, n_resamples=args.bootstrap_resamples, seed=args.seed)
+    generate_plots(analysis, args.output_dir)
+    generate_report(analysis, args.output_dir)
+    save_tables(analysis, args.output_dir)
+
     print(f"Analysis complete. Report saved to {os.path.join(args.output_dir, 'evaluation_report.md')}")
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+"""
+Per-step cost of building the DOM tree with and without a forced gc.collect() after each build,
+as DomService did before, while the process retains a growing heap like a long evaluation run.
+
+    python benchmarks/dom_gc.py
+    python benchmarks/dom_gc.py --nodes 20000 --steps 100 --retained 500000
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_use.dom.service import DomService
+
+
+def synthetic_node_map(items):
+    """A page of `items` cards, each a div with a link and two text nodes, children before parents"""
+    nodes = {}
+    body_children = []
+    next_id = 0
+
+    def add(node):
+        nonlocal next_id
+        nodes[str(next_id)] = node
+        next_id += 1
+        return str(next_id - 1)
+
+    for i in range(items):
+        text = add({"type": "TEXT_NODE", "text": f"Product number {i}", "isVisible": True})
+        link = add({
+            "tagName": "a",
+            "xpath": f"html/body/div[{i + 1}]/a",
+            "attributes": {"href": f"/product/{i}", "class": "card-link"},
+            "children": [text],
+            "isVisible": True,
+            "isInteractive": True,
+            "isTopElement": True,
+            "highlightIndex": i,
+        })
+        price = add({"type": "TEXT_NODE", "text": f"${i}.99", "isVisible": True})
+        body_children.append(add({
+            "tagName": "div",
+            "xpath": f"html/body/div[{i + 1}]",
+            "attributes": {"class": "card"},
+            "children": [link, price],
+            "isVisible": True,
+        }))
+    root = add({"tagName": "body", "xpath": "html/body", "attributes": {}, "children": body_children, "isVisible": True})
+    return {"rootId": root, "map": nodes}
+
+
+async def measure(eval_page, steps, retained_per_step, force_gc):
+    dom_service = DomService(page=None)
+    # Stands in for what a run keeps alive: history, messages, results of earlier tasks
+    retained = []
+    step_times = []
+    state = None
+    for _ in range(steps):
+        retained.extend({"step": len(retained)} for _ in range(retained_per_step))
+
+        start = time.perf_counter()
+        # The previous state is replaced, as BrowserContext does on every step
+        state = await dom_service._construct_dom_tree(eval_page)
+        if force_gc:
+            gc.collect()
+        step_times.append(time.perf_counter() - start)
+
+    del state, retained
+    gc.collect()
+    step_times.sort()
+    return {
+        "median_ms": statistics.median(step_times) * 1000,
+        "p90_ms": step_times[int(len(step_times) * 0.9)] * 1000,
+        "total_s": sum(step_times),
+    }
+
+
+async def run(args):
+    eval_page = synthetic_node_map(args.nodes // 4)
+    retained_per_step = args.retained // args.steps
+
+    results = {}
+    for name, force_gc in (("forced gc", True), ("refcount", False)):
+        results[name] = await measure(eval_page, args.steps, retained_per_step, force_gc)
+
+    print(f"{len(eval_page['map']):,} nodes per step, {args.steps} steps, {args.retained:,} objects retained at the end")
+    print(f"{'mode':<10} {'median ms':>10} {'p90 ms':>10} {'total s':>9}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['median_ms']:>10.1f} {result['p90_ms']:>10.1f} {result['total_s']:>9.2f}")
+    print(f"without forced collections: {results['refcount']['total_s'] / results['forced gc']['total_s']:.0%} of the time")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOM tree construction with and without forced garbage collection")
+    parser.add_argument("--nodes", type=int, default=8000,
+                        help="Nodes per DOM snapshot")
+    parser.add_argument("--steps", type=int, default=50,
+                        help="Snapshots to build")
+    parser.add_argument("--retained", type=int, default=1000000,
+                        help="Objects the process keeps alive by the last step, added evenly over the steps")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Also write the results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
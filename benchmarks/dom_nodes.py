@@ -0,0 +1,78 @@
+"""
+Memory and construction time of the DOM tree DomService builds from a snapshot of a large page.
+
+    python benchmarks/dom_nodes.py
+    python benchmarks/dom_nodes.py --nodes 100000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dom_gc import synthetic_node_map
+
+from browser_use.dom.service import DomService
+
+
+async def measure(eval_page, repeat):
+    dom_service = DomService(page=None)
+    build_times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tree = await dom_service._construct_dom_tree(eval_page)
+        build_times.append(time.perf_counter() - start)
+        del tree
+
+    # Memory held by the finished tree, not counting the snapshot it was built from
+    gc.collect()
+    tracemalloc.start()
+    tree = await dom_service._construct_dom_tree(eval_page)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+
+    nodes = len(eval_page["map"])
+    return {
+        "nodes": nodes,
+        "build_ms": statistics.median(build_times) * 1000,
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "bytes_per_node": retained / nodes,
+    }
+
+
+async def run(args):
+    result = await measure(synthetic_node_map(args.nodes // 4), args.repeat)
+
+    print(f"nodes:          {result['nodes']:,}")
+    print(f"build:          {result['build_ms']:.1f} ms (median of {args.repeat})")
+    print(f"retained:       {result['retained_bytes'] / 2**20:.1f} MB, {result['bytes_per_node']:.0f} bytes per node")
+    print(f"peak:           {result['peak_bytes'] / 2**20:.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory and construction time of DOM trees")
+    parser.add_argument("--nodes", type=int, default=40000,
+                        help="Nodes of the generated page snapshot")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Trees to build for the timing, the median is reported")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Also write the results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
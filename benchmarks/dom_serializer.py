@@ -0,0 +1,120 @@
+"""
+Time of DOMElementNode.clickable_elements_to_string against the previous per-node serializer,
+which walked each highlighted element's subtree and each text node's ancestors, on synthetic
+wide and deep trees of growing size.
+
+    python benchmarks/dom_serializer.py
+    python benchmarks/dom_serializer.py --sizes 1000 10000 100000 --repeat 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dom_gc import synthetic_node_map
+
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+
+
+def per_node_serializer(root):
+    """The previous serializer, without attributes"""
+    formatted_text = []
+
+    def process_node(node):
+        if isinstance(node, DOMElementNode):
+            if node.highlight_index is not None:
+                text = node.get_all_text_till_next_clickable_element()
+                formatted_text.append(f"[{node.highlight_index}]<{node.tag_name} {text}/>")
+            for child in node.children:
+                process_node(child)
+        elif isinstance(node, DOMTextNode):
+            if not node.has_parent_with_highlight_index() and node.is_visible:
+                formatted_text.append(node.text)
+
+    process_node(root)
+    return "\n".join(formatted_text)
+
+
+def deep_node_map(nodes, depth=500, highlight_every=100):
+    """Nested sections `depth` levels deep with some text on every level, a highlighted link every `highlight_every` levels"""
+    node_map = {}
+    sections = []
+    for chain in range(max(1, nodes // (2 * depth))):
+        child_id = None
+        for level in range(depth):
+            text_id = f"{chain}-{level}-text"
+            node_map[text_id] = {"type": "TEXT_NODE", "text": f"Section {chain}.{level}", "isVisible": True}
+            element_id = f"{chain}-{level}"
+            node_map[element_id] = {
+                "tagName": "a" if level % highlight_every == 0 else "div",
+                "xpath": "",
+                "attributes": {},
+                "children": [text_id] + ([child_id] if child_id else []),
+                "isVisible": True,
+            }
+            if level % highlight_every == 0:
+                node_map[element_id]["highlightIndex"] = chain * depth + level
+            child_id = element_id
+        sections.append(child_id)
+    node_map["root"] = {"tagName": "body", "xpath": "", "attributes": {}, "children": sections, "isVisible": True}
+    return {"rootId": "root", "map": node_map}
+
+
+def best_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        times.append(time.perf_counter() - start)
+    return min(times), output
+
+
+async def run(args):
+    dom_service = DomService(page=None)
+    results = []
+    for shape, make_map in (("wide", lambda n: synthetic_node_map(n // 4)), ("deep", deep_node_map)):
+        for size in args.sizes:
+            eval_page = make_map(size)
+            root, _ = await dom_service._construct_dom_tree(eval_page)
+            new_time, new_output = best_time(root.clickable_elements_to_string, args.repeat)
+            old_time, old_output = best_time(lambda: per_node_serializer(root), args.repeat)
+            if new_output != old_output:
+                print(f"WARNING: {shape} tree of {size} nodes serialized differently")
+            results.append({
+                "shape": shape,
+                "nodes": len(eval_page["map"]),
+                "per_node_ms": old_time * 1000,
+                "single_pass_ms": new_time * 1000,
+            })
+
+    print(f"{'shape':<6} {'nodes':>9} {'per node ms':>12} {'single pass ms':>15} {'speedup':>8}")
+    for result in results:
+        print(f"{result['shape']:<6} {result['nodes']:>9,} {result['per_node_ms']:>12.1f} "
+              f"{result['single_pass_ms']:>15.1f} {result['per_node_ms'] / result['single_pass_ms']:>7.1f}x")
+    print(f"single pass: {statistics.mean(r['single_pass_ms'] * 1000 / r['nodes'] for r in results):.2f} us per node")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serializing the DOM tree for the LLM")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Nodes of the generated trees")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per serializer, the fastest is reported")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Also write the results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Compare the node map and the columnar DOM snapshot formats of buildDomTree.js:
+bytes transferred over CDP, time in the browser and decode time in DomService.
+
+    python benchmarks/dom_wire_format.py
+    python benchmarks/dom_wire_format.py --url https://www.amazon.com --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.async_api import async_playwright
+
+from browser_use.dom.service import DomService, register_build_dom_tree_js
+
+
+def synthetic_page(cards):
+    """A large listing page: cards with links, buttons, images and text"""
+    card = """
+    <div class="card" data-testid="product-card-{i}">
+        <a href="/product/{i}" class="card-link"><img src="data:," alt="Product {i}"></a>
+        <h3 class="card-title"><a href="/product/{i}">Product number {i}</a></h3>
+        <p class="card-description">Short description of product {i}, with some detail text.</p>
+        <span class="price">${i}.99</span>
+        <button type="button" class="btn btn-primary" aria-label="Add product {i} to cart">Add to cart</button>
+        <select name="qty-{i}"><option>1</option><option>2</option></select>
+    </div>"""
+    return "<html><body><main>" + "".join(card.format(i=i) for i in range(cards)) + "</main></body></html>"
+
+
+def args_for(columnar):
+    return {
+        "doHighlightElements": False,
+        "focusHighlightIndex": -1,
+        "viewportExpansion": -1,
+        "debugMode": False,
+        "columnar": columnar,
+    }
+
+
+async def measure(page, columnar, repeat):
+    dom_service = DomService(page)
+    script = register_build_dom_tree_js()
+    browser_times, decode_times = [], []
+    payload = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = await page.evaluate(script, args_for(columnar))
+        browser_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        if columnar:
+            root, selector_map = await dom_service._construct_dom_tree_columnar(payload)
+        else:
+            root, selector_map = await dom_service._construct_dom_tree(payload)
+        decode_times.append(time.perf_counter() - start)
+
+    return {
+        "bytes": len(json.dumps(payload, separators=(",", ":"))),
+        "evaluate_ms": statistics.median(browser_times) * 1000,
+        "decode_ms": statistics.median(decode_times) * 1000,
+        "interactive_elements": len(selector_map),
+    }
+
+
+async def run(args):
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        page = await browser.new_page(viewport={"width": 1280, "height": 1100})
+        if args.url:
+            await page.goto(args.url, wait_until="load")
+        else:
+            await page.set_content(synthetic_page(args.cards))
+
+        results = {}
+        for name, columnar in (("map", False), ("columnar", True)):
+            results[name] = await measure(page, columnar, args.repeat)
+        await browser.close()
+
+    if results["map"]["interactive_elements"] != results["columnar"]["interactive_elements"]:
+        print("WARNING: the formats decoded to a different number of interactive elements")
+
+    print(f"{'format':<10} {'bytes':>12} {'evaluate ms':>12} {'decode ms':>10} {'elements':>9}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['bytes']:>12,} {result['evaluate_ms']:>12.1f} {result['decode_ms']:>10.1f} "
+              f"{result['interactive_elements']:>9}")
+    print(f"columnar: {results['columnar']['bytes'] / results['map']['bytes']:.0%} of the bytes, "
+          f"{results['columnar']['decode_ms'] / results['map']['decode_ms']:.0%} of the decode time")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the DOM snapshot wire formats")
+    parser.add_argument("--url", type=str, default=None,
+                        help="Page to snapshot (default: a generated listing page)")
+    parser.add_argument("--cards", type=int, default=2000,
+                        help="Product cards on the generated page")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Snapshots per format, the median is reported")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Also write the results to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -42,7 +42,8 @@ def create_history_gif(
 	images = []
 
 	# if history is empty or first screenshot is None, we can't create a gif
-	if not history.history or not history.history[0].state.screenshot:
+	first_screenshot = history.screenshot(history.history[0]) if history.history else None
+	if not first_screenshot:
 		logger.warning('No history or first screenshot to create GIF from')
 		return
 
@@ -91,7 +92,7 @@ def create_history_gif(
 	if show_task and task:
 		task_frame = _create_task_frame(
 			task,
-			history.history[0].state.screenshot,
+			first_screenshot,
 			title_font,  # type: ignore
 			regular_font,  # type: ignore
 			logo,
@@ -100,12 +101,13 @@ def create_history_gif(
 		images.append(task_frame)
 
 	# Process each history item
-	for i, item in enumerate(history.history, 1):
-		if not item.state.screenshot:
+	# Screenshots kept in a screenshot store are read from disk one at a time
+	for i, (item, screenshot) in enumerate(zip(history.history, history.iter_screenshots()), 1):
+		if not screenshot:
 			continue
 
 		# Convert base64 screenshot to PIL Image
-		img_data = base64.b64decode(item.state.screenshot)
+		img_data = base64.b64decode(screenshot)
 		image = Image.open(io.BytesIO(img_data))
 
 		if show_goals and item.model_output:
@@ -15,6 +15,7 @@ from pydantic import BaseModel
 from browser_use.agent.message_manager.views import MessageMetadata
 from browser_use.agent.prompts import AgentMessagePrompt
 from browser_use.agent.views import ActionResult, AgentOutput, AgentStepInfo, MessageManagerState
+from browser_use.browser.screenshot import estimate_image_tokens
 from browser_use.browser.views import BrowserState
 from browser_use.utils import time_execution_sync
 
@@ -24,6 +25,7 @@ logger = logging.getLogger(__name__)
 class MessageManagerSettings(BaseModel):
 	max_input_tokens: int = 128000
 	estimated_characters_per_token: int = 3
+	# Tokens per screenshot when its size is unknown, otherwise estimated from the size
 	image_tokens: int = 800
 	include_attributes: list[str] = []
 	message_context: Optional[str] = None
@@ -43,6 +45,7 @@ class MessageManager:
 		self.settings = settings
 		self.state = state
 		self.system_prompt = system_message
+		self.image_tokens = settings.image_tokens
 
 		# Only initialize messages if state is empty
 		if len(self.state.history.messages) == 0:
@@ -133,6 +136,12 @@ class MessageManager:
 						self._add_message_with_tokens(msg)
 					result = None  # if result in history, we dont want to add it again
 
+		if use_vision and state.screenshot:
+			if state.screenshot_size:
+				self.image_tokens = estimate_image_tokens(*state.screenshot_size)
+			else:
+				self.image_tokens = self.settings.image_tokens
+
 		# otherwise add state message and result to next message (which will not stay in memory)
 		state_message = AgentMessagePrompt(
 			state,
@@ -223,7 +232,7 @@ class MessageManager:
 		if isinstance(message.content, list):
 			for item in message.content:
 				if 'image_url' in item:
-					tokens += self.settings.image_tokens
+					tokens += self.image_tokens
 				elif isinstance(item, dict) and 'text' in item:
 					tokens += self._count_text_tokens(item['text'])
 		else:
@@ -252,11 +261,12 @@ class MessageManager:
 			for item in msg.message.content:
 				if 'image_url' in item:
 					msg.message.content.remove(item)
-					diff -= self.settings.image_tokens
-					msg.metadata.tokens -= self.settings.image_tokens
-					self.state.history.current_tokens -= self.settings.image_tokens
+					diff -= self.image_tokens
+					msg.metadata.tokens -= self.image_tokens
+					self.state.history.current_tokens -= self.image_tokens
 					logger.debug(
-						f'Removed image with {self.settings.image_tokens} tokens - total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
+						f'Removed image with {self.image_tokens} tokens - '
+						f'total tokens now: {self.state.history.current_tokens}/{self.settings.max_input_tokens}'
 					)
 				elif 'text' in item and isinstance(item, dict):
 					text += item['text']
@@ -0,0 +1,140 @@
+"""
+Content-addressed screenshot storage for agent histories.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import Optional
+
+from browser_use.browser.screenshot import MIME_TYPES
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {mime_type: extension for extension, mime_type in MIME_TYPES.items()}
+
+
+def perceptual_hash(image: bytes) -> Optional[int]:
+	"""
+	64 bit difference hash of an image: similar images have hashes that differ in few bits.
+	None if Pillow is not installed or the image cannot be decoded.
+	"""
+	try:
+		from PIL import Image
+	except ImportError:
+		return None
+
+	try:
+		img = Image.open(io.BytesIO(image))
+		img.draft('L', (64, 64))
+		pixels = img.convert('L').resize((9, 8), Image.Resampling.BILINEAR).tobytes()
+	except Exception as e:
+		logger.debug(f'Could not hash screenshot: {e}')
+		return None
+
+	value = 0
+	for row in range(8):
+		for col in range(8):
+			value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+	return value
+
+
+class ScreenshotStore:
+	"""
+	Stores each distinct screenshot once, as a file named by the hash of its content.
+
+	Histories keep the returned reference instead of the base64 data, so identical screenshots
+	cost one file and long runs do not hold every screenshot in memory.
+
+	With `near_duplicate_distance` set, near-duplicates are detected with a perceptual hash (needs Pillow):
+	a screenshot whose hash is at most that many bits away from an already stored one is not stored,
+	and the reference of the stored one is returned instead. That is lossy: small changes like a typed
+	character can fall under the threshold, so it is off by default, and only exact duplicates are found.
+
+	`put` does blocking work (decoding, hashing, writing), call it from a worker thread in async code.
+	A store can be shared by several agents.
+	"""
+
+	def __init__(self, directory: str, near_duplicate_distance: Optional[int] = None):
+		self.directory = os.path.abspath(directory)
+		self.near_duplicate_distance = near_duplicate_distance
+		os.makedirs(self.directory, exist_ok=True)
+
+		# perceptual hash -> reference, of the screenshots stored by this instance
+		self.hashes: dict[int, str] = {}
+		self._lock = threading.Lock()
+		self.stored = 0
+		self.duplicates = 0
+		self.near_duplicates = 0
+		self.bytes_stored = 0
+		self.bytes_saved = 0
+
+	def path(self, ref: str) -> str:
+		if os.path.basename(ref) != ref:
+			raise ValueError(f'Invalid screenshot reference: {ref}')
+		return os.path.join(self.directory, ref)
+
+	def put(self, screenshot: str, mime_type: str = 'image/png') -> str:
+		"""Store a base64 screenshot, returns its reference"""
+		image = base64.b64decode(screenshot)
+		ref = f'{hashlib.sha256(image).hexdigest()}.{EXTENSIONS.get(mime_type, "png")}'
+		path = self.path(ref)
+
+		if os.path.exists(path):
+			with self._lock:
+				self.duplicates += 1
+				self.bytes_saved += len(image)
+			return ref
+
+		phash = perceptual_hash(image) if self.near_duplicate_distance is not None else None
+		if phash is not None:
+			with self._lock:
+				similar = self._find_similar(phash)
+				if similar is not None:
+					self.near_duplicates += 1
+					self.bytes_saved += len(image)
+					return similar
+				self.hashes.setdefault(phash, ref)
+
+		# Several agents can share a store, write under a private name and move into place
+		tmp_path = f'{path}.{os.getpid()}.{id(image)}.tmp'
+		with open(tmp_path, 'wb') as f:
+			f.write(image)
+		os.replace(tmp_path, path)
+		with self._lock:
+			self.stored += 1
+			self.bytes_stored += len(image)
+		return ref
+
+	def _find_similar(self, phash: int) -> Optional[str]:
+		if phash in self.hashes or not self.near_duplicate_distance:
+			return self.hashes.get(phash)
+		best = None
+		for other, ref in self.hashes.items():
+			distance = (phash ^ other).bit_count()
+			if distance <= self.near_duplicate_distance and (best is None or distance < best[0]):
+				best = (distance, ref)
+		return best[1] if best else None
+
+	def get(self, ref: str) -> Optional[str]:
+		"""The base64 screenshot of a reference, None if it is not in the store"""
+		try:
+			with open(self.path(ref), 'rb') as f:
+				return base64.b64encode(f.read()).decode('utf-8')
+		except FileNotFoundError:
+			logger.warning(f'Screenshot {ref} not found in {self.directory}')
+			return None
+
+	def stats(self) -> dict:
+		return {
+			'stored': self.stored,
+			'duplicates': self.duplicates,
+			'near_duplicates': self.near_duplicates,
+			'bytes_stored': self.bytes_stored,
+			'bytes_saved': self.bytes_saved,
+		}
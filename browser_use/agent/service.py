@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import asyncio
 import inspect
-import gc
 import json
 import logging
 import re
@@ -25,6 +24,7 @@ from browser_use.agent.gif import create_history_gif
 from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
 from browser_use.agent.message_manager.utils import convert_input_messages, extract_json_from_model_output, save_conversation
 from browser_use.agent.prompts import AgentMessagePrompt, PlannerPrompt, SystemPrompt
+from browser_use.agent.screenshot_store import ScreenshotStore
 from browser_use.agent.views import (
 	ActionResult,
 	AgentError,
@@ -39,20 +39,30 @@ from browser_use.agent.views import (
 )
 from browser_use.browser.browser import Browser
 from browser_use.browser.context import BrowserContext
-from browser_use.browser.views import BrowserState, BrowserStateHistory
+from browser_use.browser.views import DOM_ONLY_CAPTURE, BrowserState, BrowserStateHistory, StateCaptureProfile
 from browser_use.controller.registry.views import ActionModel
 from browser_use.controller.service import Controller
 from browser_use.dom.history_tree_processor.service import (
 	DOMHistoryElement,
 	HistoryTreeProcessor,
 )
+from browser_use.memory import MemoryPressureHook
 from browser_use.telemetry.service import ProductTelemetry
 from browser_use.telemetry.views import (
 	AgentEndTelemetryEvent,
 	AgentRunTelemetryEvent,
 	AgentStepTelemetryEvent,
 )
-from browser_use.utils import time_execution_async, time_execution_sync
+from browser_use.utils import (
+	StepTimings,
+	StepTokenUsage,
+	record_token_usage,
+	step_timings,
+	step_token_usage,
+	time_execution_async,
+	time_execution_sync,
+	time_step_section,
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -134,6 +144,10 @@ class Agent(Generic[Context]):
 		page_extraction_llm: Optional[BaseChatModel] = None,
 		planner_llm: Optional[BaseChatModel] = None,
 		planner_interval: int = 1,  # Run planner every N steps
+		# Keep the history's screenshots in this store instead of inline
+		screenshot_store: Optional[ScreenshotStore] = None,
+		# Called after every step, e.g. to collect garbage when memory runs short
+		memory_pressure_hook: Optional[MemoryPressureHook] = None,
 		# Inject state
 		injected_agent_state: Optional[AgentState] = None,
 		#
@@ -170,8 +184,15 @@ class Agent(Generic[Context]):
 			planner_interval=planner_interval,
 		)
 
+		self.memory_pressure_hook = memory_pressure_hook
+
+		# Screenshots are only needed for the LLM and the gif
+		self.state_capture_profile = StateCaptureProfile(screenshot=self.settings.use_vision or bool(self.settings.generate_gif))
+
 		# Initialize state
 		self.state = injected_agent_state or AgentState()
+		if screenshot_store:
+			self.state.history.use_screenshot_store(screenshot_store)
 
 		# Action setup
 		self._setup_action_models()
@@ -338,9 +359,13 @@ class Agent(Generic[Context]):
 		result: list[ActionResult] = []
 		step_start_time = time.time()
 		tokens = 0
+		timings = StepTimings()
+		timings_token = step_timings.set(timings)
+		usage = StepTokenUsage()
+		usage_token = step_token_usage.set(usage)
 
 		try:
-			state = await self.browser_context.get_state()
+			state = await self.browser_context.get_state(self.state_capture_profile)
 
 			await self._raise_if_stopped_or_paused()
 
@@ -411,7 +436,11 @@ class Agent(Generic[Context]):
 			self.state.last_result = result
 
 		finally:
+			if self.memory_pressure_hook:
+				self.memory_pressure_hook()
 			step_end_time = time.time()
+			step_timings.reset(timings_token)
+			step_token_usage.reset(usage_token)
 			actions = [a.model_dump(exclude_unset=True) for a in model_output.action] if model_output else []
 			self.telemetry.capture(
 				AgentStepTelemetryEvent(
@@ -431,8 +460,11 @@ class Agent(Generic[Context]):
 					step_start_time=step_start_time,
 					step_end_time=step_end_time,
 					input_tokens=tokens,
+					timings=timings.totals,
+					metrics=timings.metrics,
+					**usage.to_dict(),
 				)
-				self._make_history_item(model_output, state, result, metadata)
+				await self._make_history_item(model_output, state, result, metadata)
 
 	@time_execution_async('--handle_step_error (agent)')
 	async def _handle_step_error(self, error: Exception) -> list[ActionResult]:
@@ -469,7 +501,7 @@ class Agent(Generic[Context]):
 
 		return [ActionResult(error=error_msg, include_in_memory=True)]
 
-	def _make_history_item(
+	async def _make_history_item(
 		self,
 		model_output: AgentOutput | None,
 		state: BrowserState,
@@ -483,12 +515,20 @@ class Agent(Generic[Context]):
 		else:
 			interacted_elements = [None]
 
+		screenshot, screenshot_ref = state.screenshot, None
+		store = self.state.history.screenshot_store
+		if store and screenshot:
+			# Decoding, hashing and writing the file would block the other agents on this loop
+			screenshot_ref = await asyncio.to_thread(store.put, screenshot, state.screenshot_mime_type)
+			screenshot = None
+
 		state_history = BrowserStateHistory(
 			url=state.url,
 			title=state.title,
 			tabs=state.tabs,
 			interacted_element=interacted_elements,
-			screenshot=state.screenshot,
+			screenshot=screenshot,
+			screenshot_ref=screenshot_ref,
 		)
 
 		history_item = AgentHistory(model_output=model_output, result=result, state=state_history, metadata=metadata)
@@ -514,12 +554,14 @@ class Agent(Generic[Context]):
 			return input_messages
 
 	@time_execution_async('--get_next_action (agent)')
+	@time_step_section('llm')
 	async def get_next_action(self, input_messages: list[BaseMessage]) -> AgentOutput:
 		"""Get next action from LLM based on current state"""
 		input_messages = self._convert_input_messages(input_messages)
 
 		if self.tool_calling_method == 'raw':
 			output = self.llm.invoke(input_messages)
+			record_token_usage(output)
 			# TODO: currently invoke does not return reasoning_content, we should override invoke
 			output.content = self._remove_think_tags(str(output.content))
 			try:
@@ -532,10 +574,12 @@ class Agent(Generic[Context]):
 		elif self.tool_calling_method is None:
 			structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True)
 			response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
+			record_token_usage(response['raw'])
 			parsed: AgentOutput | None = response['parsed']
 		else:
 			structured_llm = self.llm.with_structured_output(self.AgentOutput, include_raw=True, method=self.tool_calling_method)
 			response: dict[str, Any] = await structured_llm.ainvoke(input_messages)  # type: ignore
+			record_token_usage(response['raw'])
 			parsed: AgentOutput | None = response['parsed']
 			if not parsed:
 				try:
@@ -678,7 +722,7 @@ class Agent(Generic[Context]):
 
 		for i, action in enumerate(actions):
 			if action.get_index() is not None and i != 0:
-				new_state = await self.browser_context.get_state()
+				new_state = await self.browser_context.get_state(DOM_ONLY_CAPTURE)
 				new_path_hashes = set(e.hash.branch_path_hash for e in new_state.selector_map.values())
 				if check_for_new_elements and not new_path_hashes.issubset(cached_path_hashes):
 					# next action requires index but there are new elements on the page
@@ -704,7 +748,7 @@ class Agent(Generic[Context]):
 			if results[-1].is_done or results[-1].error or i == len(actions) - 1:
 				break
 
-			await asyncio.sleep(self.browser_context.config.wait_between_actions)
+			await self.browser_context.wait_between_actions()
 			# hash all elements. if it is a subset of cached_state its fine - else break (new elements on page)
 
 		return results
@@ -723,7 +767,7 @@ class Agent(Generic[Context]):
 		)
 
 		if self.browser_context.session:
-			state = await self.browser_context.get_state()
+			state = await self.browser_context.get_state(self.state_capture_profile)
 			content = AgentMessagePrompt(
 				state=state,
 				result=self.state.last_result,
@@ -744,6 +788,7 @@ class Agent(Generic[Context]):
 
 		validator = self.llm.with_structured_output(ValidationResult, include_raw=True)
 		response: dict[str, Any] = await validator.ainvoke(msg)  # type: ignore
+		self._add_token_usage_to_last_step(response['raw'])
 		parsed: ValidationResult = response['parsed']
 		is_valid = parsed.is_valid
 		if not is_valid:
@@ -754,6 +799,17 @@ class Agent(Generic[Context]):
 			logger.info(f'✅ Validator decision: {parsed.reason}')
 		return is_valid
 
+	def _add_token_usage_to_last_step(self, message: Any) -> None:
+		"""Count an LLM call made between steps (e.g. validation) towards the step before it"""
+		usage = StepTokenUsage()
+		usage.add(message)
+		if self.state.history.history and self.state.history.history[-1].metadata:
+			metadata = self.state.history.history[-1].metadata
+			metadata.prompt_tokens += usage.prompt_tokens
+			metadata.completion_tokens += usage.completion_tokens
+			metadata.cached_tokens += usage.cached_tokens
+			metadata.llm_calls += usage.llm_calls
+
 	async def log_completion(self) -> None:
 		"""Log the completion of the task"""
 		logger.info('✅ Task completed')
@@ -962,6 +1018,7 @@ class Agent(Generic[Context]):
 
 		# Get planner output
 		response = await self.settings.planner_llm.ainvoke(planner_messages)
+		record_token_usage(response)
 		plan = str(response.content)
 		# if deepseek-reasoner, remove think tags
 		if self.planner_model_name and ('deepseek-r1' in self.planner_model_name or 'deepseek-reasoner' in self.planner_model_name):
@@ -989,9 +1046,5 @@ class Agent(Generic[Context]):
 				await self.browser_context.close()
 			if self.browser and not self.injected_browser:
 				await self.browser.close()
-			
-			# Force garbage collection
-			gc.collect()
-			
 		except Exception as e:
 			logger.error(f"Error during cleanup: {e}")
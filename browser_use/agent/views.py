@@ -5,13 +5,14 @@ import traceback
 import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Type
+from typing import Any, Dict, Iterator, List, Literal, Optional, Type
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from openai import RateLimitError
-from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, ValidationError, create_model
 
 from browser_use.agent.message_manager.views import MessageManagerState
+from browser_use.agent.screenshot_store import ScreenshotStore
 from browser_use.browser.views import BrowserStateHistory
 from browser_use.controller.registry.views import ActionModel
 from browser_use.dom.history_tree_processor.service import (
@@ -105,6 +106,15 @@ class StepMetadata(BaseModel):
 	step_end_time: float
 	input_tokens: int  # Approximate tokens from message manager for this step
 	step_number: int
+	# Exclusive seconds per section: page_load, dom_extraction, screenshot, llm, action
+	timings: Dict[str, float] = Field(default_factory=dict)
+	# Other per-step measurements in seconds, e.g. network_idle_wait
+	metrics: Dict[str, float] = Field(default_factory=dict)
+	# Token counts reported by the LLM provider for all calls of this step
+	prompt_tokens: int = 0
+	completion_tokens: int = 0
+	cached_tokens: int = 0
+	llm_calls: int = 0
 
 	@property
 	def duration_seconds(self) -> float:
@@ -197,6 +207,21 @@ class AgentHistoryList(BaseModel):
 	"""List of agent history items"""
 
 	history: list[AgentHistory]
+	# Directory of the ScreenshotStore that holds the screenshots of this history, if any
+	screenshot_dir: Optional[str] = None
+
+	_screenshot_store: Optional[ScreenshotStore] = PrivateAttr(default=None)
+
+	@property
+	def screenshot_store(self) -> Optional[ScreenshotStore]:
+		if self._screenshot_store is None and self.screenshot_dir:
+			self._screenshot_store = ScreenshotStore(self.screenshot_dir)
+		return self._screenshot_store
+
+	def use_screenshot_store(self, store: ScreenshotStore) -> None:
+		"""Keep the screenshots of new history items in `store` instead of inline"""
+		self.screenshot_dir = store.directory
+		self._screenshot_store = store
 
 	def total_duration_seconds(self) -> float:
 		"""Get total duration of all steps in seconds"""
@@ -218,6 +243,18 @@ class AgentHistoryList(BaseModel):
 				total += h.metadata.input_tokens
 		return total
 
+	def total_prompt_tokens(self) -> int:
+		"""Prompt tokens across all steps, as reported by the LLM provider"""
+		return sum(h.metadata.prompt_tokens for h in self.history if h.metadata)
+
+	def total_completion_tokens(self) -> int:
+		"""Completion tokens across all steps, as reported by the LLM provider"""
+		return sum(h.metadata.completion_tokens for h in self.history if h.metadata)
+
+	def total_cached_tokens(self) -> int:
+		"""Prompt tokens served from the provider's prompt cache, across all steps"""
+		return sum(h.metadata.cached_tokens for h in self.history if h.metadata)
+
 	def input_token_usage(self) -> list[int]:
 		"""Get token usage for each step"""
 		return [h.metadata.input_tokens for h in self.history if h.metadata]
@@ -242,9 +279,12 @@ class AgentHistoryList(BaseModel):
 
 	def model_dump(self, **kwargs) -> Dict[str, Any]:
 		"""Custom serialization that properly uses AgentHistory's model_dump"""
-		return {
+		data: Dict[str, Any] = {
 			'history': [h.model_dump(**kwargs) for h in self.history],
 		}
+		if self.screenshot_dir:
+			data['screenshot_dir'] = self.screenshot_dir
+		return data
 
 	@classmethod
 	def load_from_file(cls, filepath: str | Path, output_model: Type[AgentOutput]) -> 'AgentHistoryList':
@@ -308,9 +348,22 @@ class AgentHistoryList(BaseModel):
 		"""Get all unique URLs from history"""
 		return [h.state.url if h.state.url is not None else None for h in self.history]
 
+	def screenshot(self, item: AgentHistory) -> str | None:
+		"""Base64 screenshot of a history item, read from the screenshot store if it is kept there"""
+		if item.state.screenshot is not None:
+			return item.state.screenshot
+		if item.state.screenshot_ref and self.screenshot_store:
+			return self.screenshot_store.get(item.state.screenshot_ref)
+		return None
+
+	def iter_screenshots(self) -> Iterator[str | None]:
+		"""Screenshots of all steps, loaded one at a time"""
+		for h in self.history:
+			yield self.screenshot(h)
+
 	def screenshots(self) -> list[str | None]:
 		"""Get all screenshots from history"""
-		return [h.state.screenshot if h.state.screenshot is not None else None for h in self.history]
+		return list(self.iter_screenshots())
 
 	def action_names(self) -> list[str]:
 		"""Get all action names from history"""
@@ -226,6 +226,7 @@ class Browser:
 				'--no-startup-window',
 			],
 		}
+		browser_class = getattr(playwright, self.config.browser_class)
 		browser = await browser_class.launch(
 			headless=self.config.headless,
 			args=args[self.config.browser_class] + self.disable_security_args + self.config.extra_browser_args,
@@ -267,8 +268,6 @@ class Browser:
 			self.playwright_browser = None
 			self.playwright = None
 
-			gc.collect()
-
 	def __del__(self):
 		"""Async cleanup when object is destroyed"""
 		try:
@@ -284,11 +283,7 @@ class Browser:
 	async def cleanup_httpx_clients(self):
 		"""Cleanup all httpx clients"""
 		import httpx
-		import gc
 
-		# Force garbage collection to make sure all clients are in memory
-		gc.collect()
-		
 		# Get all httpx clients
 		clients = [obj for obj in gc.get_objects() if isinstance(obj, httpx.AsyncClient)]
 		
@@ -3,8 +3,6 @@ Playwright browser on steroids.
 """
 
 import asyncio
-import base64
-import gc
 import json
 import logging
 import os
@@ -12,7 +10,8 @@ import re
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Optional, TypedDict
+from typing import TYPE_CHECKING, Any, Awaitable, Optional, TypedDict, TypeVar
+from urllib.parse import urlparse
 
 from playwright._impl._errors import TimeoutError
 from playwright.async_api import Browser as PlaywrightBrowser
@@ -21,25 +20,72 @@ from playwright.async_api import (
 )
 from playwright.async_api import (
 	ElementHandle,
+	Frame,
 	FrameLocator,
 	Page,
 )
 
+from browser_use.browser.network import NetworkIdleWatcher
+from browser_use.browser.screenshot import Screenshot, ScreenshotConfig, encode_screenshot
+from browser_use.browser.settle import (
+	DOM_QUIESCENCE_SCRIPT,
+	PAGE_FINGERPRINT,
+	WAIT_FOR_DOM_QUIET,
+	SettleBudget,
+	SettlePolicy,
+)
 from browser_use.browser.views import (
 	BrowserError,
 	BrowserState,
+	StateCaptureProfile,
 	TabInfo,
 	URLNotAllowedError,
 )
 from browser_use.dom.service import DomService
 from browser_use.dom.views import DOMElementNode, SelectorMap
-from browser_use.utils import time_execution_async, time_execution_sync
+from browser_use.utils import record_step_metric, time_execution_async, time_execution_sync, time_step_section
 
 if TYPE_CHECKING:
 	from browser_use.browser.browser import Browser
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+# Scroll position and title in one round-trip
+PAGE_INFO = """
+() => ({
+    title: document.title,
+    pixels_above: window.scrollY,
+    pixels_below: document.documentElement.scrollHeight - (window.scrollY + window.innerHeight),
+})
+"""
+
+# Without scroll info: reading scrollHeight forces a layout
+PAGE_TITLE = """
+() => ({ title: document.title, pixels_above: 0, pixels_below: 0 })
+"""
+
+
+async def gather_stages(*stages: Awaitable[Any]) -> list[Any]:
+	"""
+	Run the stages concurrently and return their results, like asyncio.gather. The first failure
+	cancels the stages still running and is raised once they stopped, so none keeps working on
+	the page and no exception is left unretrieved.
+	"""
+	tasks = [asyncio.ensure_future(stage) for stage in stages]
+	try:
+		await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+	finally:
+		pending = [task for task in tasks if not task.done()]
+		for task in pending:
+			task.cancel()
+		await asyncio.gather(*pending, return_exceptions=True)
+
+	errors = [task.exception() for task in tasks if not task.cancelled() and task.exception() is not None]
+	if errors:
+		raise errors[0]
+	return [task.result() for task in tasks]
 
 class BrowserContextWindowSize(TypedDict):
 	width: int
@@ -69,7 +115,10 @@ class BrowserContextConfig:
 	        Maximum time to wait for page load before proceeding anyway
 
 	    wait_between_actions: 1.0
-	        Time to wait between multiple per step actions
+	        Maximum time to wait between multiple per step actions for the DOM to settle
+
+	    dom_quiet_time: 0.1
+	        The DOM counts as settled after this long without mutations
 
 	    browser_window_size: {
 	            'width': 1280,
@@ -122,6 +171,18 @@ class BrowserContextConfig:
 
 	    timezone_id: None
 	        Changes the timezone of the browser. Example: 'Europe/Berlin'
+
+	    settle_policy: None
+	        SettlePolicy that learns per-domain settle times and shortens the page load waits accordingly.
+	        The fixed wait times above are used as floor and ceiling. If None, the fixed wait times are always used.
+
+	    screenshot: ScreenshotConfig()
+	        Format, quality, maximum size and grayscale of the screenshots. Defaults to full size PNG.
+	        Example: ScreenshotConfig(format='jpeg', quality=80) or ScreenshotConfig.preset('compact')
+
+	    columnar_dom_snapshot: False
+	        Transfer the DOM snapshot in the compact columnar format instead of the node map.
+	        Fewer bytes over CDP and faster to decode on large pages.
 	"""
 
 	cookies_file: str | None = None
@@ -129,6 +190,7 @@ class BrowserContextConfig:
 	wait_for_network_idle_page_load_time: float = 0.5
 	maximum_wait_page_load_time: float = 5
 	wait_between_actions: float = 0.5
+	dom_quiet_time: float = 0.1
 
 	disable_security: bool = True
 
@@ -155,12 +217,23 @@ class BrowserContextConfig:
 	geolocation: dict | None = None
 	permissions: list[str] | None = None
 	timezone_id: str | None = None
+	settle_policy: SettlePolicy | None = None
+	screenshot: ScreenshotConfig = field(default_factory=ScreenshotConfig)
+	columnar_dom_snapshot: bool = False
 
 
 @dataclass
 class BrowserSession:
 	context: PlaywrightBrowserContext
 	cached_state: BrowserState | None
+	# Long-lived network trackers of the open pages, see _track_page
+	network_watchers: dict[Page, NetworkIdleWatcher] = field(default_factory=dict)
+	# Tab titles, dropped when the page navigates
+	tab_titles: dict[Page, str] = field(default_factory=dict)
+	# Page fingerprint taken when cached_state was captured, see _page_fingerprint
+	state_fingerprint: tuple | None = None
+	# What cached_state was captured with
+	state_profile: StateCaptureProfile | None = None
 
 
 @dataclass
@@ -190,6 +263,12 @@ class BrowserContext:
 		# Initialize these as None - they'll be set up when needed
 		self.session: BrowserSession | None = None
 
+		# get_state calls answered from the cached state / with a full capture
+		self.state_cache_hits = 0
+		self.state_cache_misses = 0
+		# State captures that skipped each stage because the profile did not ask for it: stage -> count
+		self.state_stages_skipped: dict[str, int] = {}
+
 	async def __aenter__(self):
 		"""Async context manager entry"""
 		await self._initialize_session()
@@ -217,6 +296,14 @@ class BrowserContext:
 					logger.debug(f'Failed to remove CDP listener: {e}')
 				self._page_event_handler = None
 
+			self.session.context.remove_listener('page', self._track_page)
+			for page, watcher in self.session.network_watchers.items():
+				watcher.detach()
+				page.remove_listener('framenavigated', self._forget_tab_title)
+				page.remove_listener('domcontentloaded', self._forget_tab_title)
+			self.session.network_watchers.clear()
+			self.session.tab_titles.clear()
+
 			await self.save_cookies()
 
 			if self.config.trace_path:
@@ -247,7 +334,6 @@ class BrowserContext:
 					asyncio.run(self.session.context._impl_obj.close())
 
 				self.session = None
-				gc.collect()
 			except Exception as e:
 				logger.warning(f'Failed to force close browser context: {e}')
 
@@ -268,6 +354,11 @@ class BrowserContext:
 			cached_state=None,
 		)
 
+		# Track network activity and titles of every page from the moment it exists, also between steps
+		for page in pages:
+			self._track_page(page)
+		context.on('page', self._track_page)
+
 		active_page = None
 		if self.browser.config.cdp_url:
 			# If we have a saved target ID, try to find and activate it
@@ -314,6 +405,7 @@ class BrowserContext:
 
 	def _add_new_page_listener(self, context: PlaywrightBrowserContext):
 		async def on_page(page: Page):
+			self._track_page(page)
 			if self.browser.config.cdp_url:
 				await page.reload()  # Reload the page to avoid timeout errors
 			await page.wait_for_load_state()
@@ -324,6 +416,31 @@ class BrowserContext:
 		self._page_event_handler = on_page
 		context.on('page', on_page)
 
+	def _track_page(self, page: Page) -> NetworkIdleWatcher:
+		"""Attach the network tracker and the title cache invalidation to a page, for its whole lifetime"""
+		session = self.session
+		if page in session.network_watchers:
+			return session.network_watchers[page]
+
+		watcher = NetworkIdleWatcher()
+		watcher.attach(page)
+		session.network_watchers[page] = watcher
+		page.on('framenavigated', self._forget_tab_title)
+		page.on('domcontentloaded', self._forget_tab_title)
+
+		def forget_page(_):
+			session.network_watchers.pop(page, None)
+			session.tab_titles.pop(page, None)
+
+		page.once('close', forget_page)
+		return watcher
+
+	def _forget_tab_title(self, frame_or_page: Frame | Page):
+		# framenavigated passes the frame, domcontentloaded the page
+		page = frame_or_page.page if isinstance(frame_or_page, Frame) else frame_or_page
+		if self.session is not None:
+			self.session.tab_titles.pop(page, None)
+
 	async def get_session(self) -> BrowserSession:
 		"""Lazy initialization of the browser and related components"""
 		if self.session is None:
@@ -408,189 +525,87 @@ class BrowserContext:
             """
 		)
 
-		return context
-
-	async def _wait_for_stable_network(self):
-		page = await self.get_current_page()
-
-		pending_requests = set()
-		last_activity = asyncio.get_event_loop().time()
-
-		# Define relevant resource types and content types
-		RELEVANT_RESOURCE_TYPES = {
-			'document',
-			'stylesheet',
-			'image',
-			'font',
-			'script',
-			'iframe',
-		}
-
-		RELEVANT_CONTENT_TYPES = {
-			'text/html',
-			'text/css',
-			'application/javascript',
-			'image/',
-			'font/',
-			'application/json',
-		}
-
-		# Additional patterns to filter out
-		IGNORED_URL_PATTERNS = {
-			# Analytics and tracking
-			'analytics',
-			'tracking',
-			'telemetry',
-			'beacon',
-			'metrics',
-			# Ad-related
-			'doubleclick',
-			'adsystem',
-			'adserver',
-			'advertising',
-			# Social media widgets
-			'facebook.com/plugins',
-			'platform.twitter',
-			'linkedin.com/embed',
-			# Live chat and support
-			'livechat',
-			'zendesk',
-			'intercom',
-			'crisp.chat',
-			'hotjar',
-			# Push notifications
-			'push-notifications',
-			'onesignal',
-			'pushwoosh',
-			# Background sync/heartbeat
-			'heartbeat',
-			'ping',
-			'alive',
-			# WebRTC and streaming
-			'webrtc',
-			'rtmp://',
-			'wss://',
-			# Common CDNs for dynamic content
-			'cloudfront.net',
-			'fastly.net',
-		}
-
-		async def on_request(request):
-			# Filter by resource type
-			if request.resource_type not in RELEVANT_RESOURCE_TYPES:
-				return
-
-			# Filter out streaming, websocket, and other real-time requests
-			if request.resource_type in {
-				'websocket',
-				'media',
-				'eventsource',
-				'manifest',
-				'other',
-			}:
-				return
-
-			# Filter out by URL patterns
-			url = request.url.lower()
-			if any(pattern in url for pattern in IGNORED_URL_PATTERNS):
-				return
-
-			# Filter out data URLs and blob URLs
-			if url.startswith(('data:', 'blob:')):
-				return
-
-			# Filter out requests with certain headers
-			headers = request.headers
-			if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in [
-				'video',
-				'audio',
-			]:
-				return
-
-			nonlocal last_activity
-			pending_requests.add(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request started: {request.url} ({request.resource_type})')
-
-		async def on_response(response):
-			request = response.request
-			if request not in pending_requests:
-				return
-
-			# Filter by content type if available
-			content_type = response.headers.get('content-type', '').lower()
-
-			# Skip if content type indicates streaming or real-time data
-			if any(
-				t in content_type
-				for t in [
-					'streaming',
-					'video',
-					'audio',
-					'webm',
-					'mp4',
-					'event-stream',
-					'websocket',
-					'protobuf',
-				]
-			):
-				pending_requests.remove(request)
-				return
-
-			# Only process relevant content types
-			if not any(ct in content_type for ct in RELEVANT_CONTENT_TYPES):
-				pending_requests.remove(request)
-				return
+		# Lets the waits below end as soon as the DOM stops changing
+		await context.add_init_script(DOM_QUIESCENCE_SCRIPT)
 
-			# Skip if response is too large (likely not essential for page load)
-			content_length = response.headers.get('content-length')
-			if content_length and int(content_length) > 5 * 1024 * 1024:  # 5MB
-				pending_requests.remove(request)
-				return
+		return context
 
-			nonlocal last_activity
-			pending_requests.remove(request)
-			last_activity = asyncio.get_event_loop().time()
-			# logger.debug(f'Request resolved: {request.url} ({content_type})')
+	def _settle_budget(self, page: Page) -> tuple[str, SettleBudget]:
+		"""Domain of the page and how long to wait for it to settle"""
+		domain = urlparse(page.url).netloc.lower()
+		if self.config.settle_policy is None:
+			return domain, SettleBudget.fixed(self.config)
+		return domain, self.config.settle_policy.budget(domain, self.config)
 
-		# Attach event listeners
-		page.on('request', on_request)
-		page.on('response', on_response)
+	async def _wait_for_stable_network(self, budget: SettleBudget | None = None) -> float:
+		"""Wait for the current page's network to go idle, returning for how long it has been idle"""
+		page = await self.get_current_page()
+		watcher = self._track_page(page)
+		budget = budget or SettleBudget.fixed(self.config)
+
+		start_time = time.monotonic()
+		waited = await watcher.wait_for_idle(budget.network_idle, budget.maximum_wait)
+
+		policy = self.config.settle_policy
+		if policy is not None:
+			domain = urlparse(page.url).netloc.lower()
+			# Settled at the last request, or not at all within the wait
+			settled_after = waited if watcher.pending_requests else watcher.last_activity - start_time
+			policy.observe(domain, 'network', settled_after)
+			if watcher.pending_requests and budget.maximum_wait < self.config.maximum_wait_page_load_time:
+				policy.record_saving(self.config.maximum_wait_page_load_time - budget.maximum_wait)
+
+		record_step_metric('network_idle_wait', waited)
+		logger.debug(f'Network stabilized for {budget.network_idle} seconds')
+		return watcher.idle_for()
+
+	async def _wait_for_dom_quiet(self, page: Page, timeout: float) -> float:
+		"""
+		Wait until the DOM of the page had no mutations for `dom_quiet_time`, at most `timeout` seconds.
 
+		Returns the seconds waited. Pages without the quiescence probe get the full timeout.
+		"""
+		if timeout <= 0:
+			return 0.0
+		start_time = time.monotonic()
 		try:
-			# Wait for idle time
-			start_time = asyncio.get_event_loop().time()
-			while True:
-				await asyncio.sleep(0.1)
-				now = asyncio.get_event_loop().time()
-				if len(pending_requests) == 0 and (now - last_activity) >= self.config.wait_for_network_idle_page_load_time:
-					break
-				if now - start_time > self.config.maximum_wait_page_load_time:
-					logger.debug(
-						f'Network timeout after {self.config.maximum_wait_page_load_time}s with {len(pending_requests)} '
-						f'pending requests: {[r.url for r in pending_requests]}'
-					)
-					break
-
-		finally:
-			# Clean up event listeners
-			page.remove_listener('request', on_request)
-			page.remove_listener('response', on_response)
-
-		logger.debug(f'Network stabilized for {self.config.wait_for_network_idle_page_load_time} seconds')
+			result = await page.evaluate(WAIT_FOR_DOM_QUIET, [self.config.dom_quiet_time * 1000, timeout * 1000])
+		except Exception as e:
+			# e.g. the page navigated away while waiting
+			logger.debug(f'DOM quiescence probe failed: {e}')
+			result = None
+
+		if result is None:
+			await asyncio.sleep(max(timeout - (time.monotonic() - start_time), 0))
+		elif self.config.settle_policy is not None:
+			settled_after = result['settledAfter'] / 1000 if result['quiet'] else timeout
+			self.config.settle_policy.observe(urlparse(page.url).netloc.lower(), 'dom', settled_after)
+		return time.monotonic() - start_time
+
+	async def wait_between_actions(self):
+		"""Pause between two actions of one step until the page stopped reacting to the first one"""
+		page = await self.get_current_page()
+		_, budget = self._settle_budget(page)
+		waited = await self._wait_for_dom_quiet(page, budget.between_actions)
+		if self.config.settle_policy is not None:
+			self.config.settle_policy.record_saving(self.config.wait_between_actions - waited)
 
+	@time_step_section('page_load')
 	async def _wait_for_page_and_frames_load(self, timeout_overwrite: float | None = None):
 		"""
 		Ensures page is fully loaded before continuing.
-		Waits for either network to be idle or minimum WAIT_TIME, whichever is longer.
+		Waits for the network to be idle, then for the rest of the minimum WAIT_TIME only while the DOM keeps changing.
 		Also checks if the loaded URL is allowed.
 		"""
 		# Start timing
 		start_time = time.time()
+		budget = SettleBudget.fixed(self.config)
+		idle_for = 0.0
 
 		# Wait for page load
 		try:
-			await self._wait_for_stable_network()
+			_, budget = self._settle_budget(await self.get_current_page())
+			idle_for = await self._wait_for_stable_network(budget)
 
 			# Check if the loaded URL is allowed
 			page = await self.get_current_page()
@@ -603,13 +618,25 @@ class BrowserContext:
 
 		# Calculate remaining time to meet minimum WAIT_TIME
 		elapsed = time.time() - start_time
-		remaining = max((timeout_overwrite or self.config.minimum_wait_page_load_time) - elapsed, 0)
+		minimum_wait = timeout_overwrite or budget.minimum_wait
+		# A page whose network has been idle for longer than that is settled already
+		remaining = 0 if idle_for >= minimum_wait else max(minimum_wait - elapsed, 0)
 
-		logger.debug(f'--Page loaded in {elapsed:.2f} seconds, waiting for additional {remaining:.2f} seconds')
+		logger.debug(f'--Page loaded in {elapsed:.2f} seconds, waiting up to {remaining:.2f} seconds for the DOM to settle')
 
-		# Sleep remaining time if needed
+		# Wait out the remaining time only while the DOM is still changing
+		waited = 0.0
 		if remaining > 0:
-			await asyncio.sleep(remaining)
+			try:
+				waited = await self._wait_for_dom_quiet(await self.get_current_page(), remaining)
+			except Exception:
+				await asyncio.sleep(remaining)
+				waited = remaining
+
+		if self.config.settle_policy is not None and not timeout_overwrite:
+			fixed_minimum_wait = self.config.minimum_wait_page_load_time
+			fixed_remaining = 0 if idle_for >= fixed_minimum_wait else max(fixed_minimum_wait - elapsed, 0)
+			self.config.settle_policy.record_saving(fixed_remaining - waited)
 
 	def _is_url_allowed(self, url: str) -> bool:
 		"""Check if a URL is allowed based on the whitelist configuration."""
@@ -778,11 +805,35 @@ class BrowserContext:
 		return structure
 
 	@time_execution_sync('--get_state')  # This decorator might need to be updated to handle async
-	async def get_state(self) -> BrowserState:
-		"""Get the current state of the browser"""
+	async def get_state(self, profile: StateCaptureProfile | None = None) -> BrowserState:
+		"""
+		Get the current state of the browser.
+
+		`profile` declares which parts of the state are needed, the rest is not captured. Default: everything.
+		"""
+		profile = profile or StateCaptureProfile()
 		await self._wait_for_page_and_frames_load()
 		session = await self.get_session()
-		session.cached_state = await self._update_state()
+
+		# Skip the DOM tree build and screenshot when the page did not change since the last capture
+		fingerprint = await self._page_fingerprint()
+		if (
+			fingerprint is not None
+			and session.cached_state is not None
+			and fingerprint == session.state_fingerprint
+			and session.state_profile is not None
+			and session.state_profile.covers(profile)
+		):
+			self.state_cache_hits += 1
+			logger.debug('Page unchanged since the last state, reusing it')
+			return session.cached_state
+
+		self.state_cache_misses += 1
+		previous_state = session.cached_state
+		session.cached_state = await self._update_state(profile=profile)
+		# A failed capture returns the previous state, which must not be matched again
+		session.state_fingerprint = fingerprint if session.cached_state is not previous_state else None
+		session.state_profile = profile
 
 		# Save cookies if a file is specified
 		if self.config.cookies_file:
@@ -790,15 +841,43 @@ class BrowserContext:
 
 		return session.cached_state
 
-	async def _update_state(self, focus_element: int = -1) -> BrowserState:
+	@property
+	def state_cache_hit_rate(self) -> float:
+		"""Share of get_state calls that reused the cached state"""
+		total = self.state_cache_hits + self.state_cache_misses
+		return self.state_cache_hits / total if total else 0.0
+
+	async def _page_fingerprint(self) -> tuple | None:
+		"""
+		Cheap summary of the current page: tab, document, URL, viewport, window scroll position, and a
+		change count over the DOM, its shadow roots and same-origin frames. Scrolled containers, typing
+		and hover or transition changes count as changes too (see DOM_QUIESCENCE_SCRIPT).
+
+		None when it cannot be taken (e.g. no quiescence probe in the page or one of its frames), which never matches.
+		"""
+		try:
+			session = await self.get_session()
+			page = await self.get_current_page()
+			values = await page.evaluate(PAGE_FINGERPRINT)
+		except Exception as e:
+			logger.debug(f'Failed to take page fingerprint: {e}')
+			return None
+		if values is None:
+			return None
+		return (page, len(session.context.pages), *values)
+
+	async def _update_state(self, focus_element: int = -1, profile: StateCaptureProfile | None = None) -> BrowserState:
 		"""Update and return state."""
+		profile = profile or StateCaptureProfile()
 		session = await self.get_session()
+		stage_timings: dict[str, float] = {}
+		start_time = time.perf_counter()
 
 		# Check if current page is still valid, if not switch to another available page
 		try:
 			page = await self.get_current_page()
 			# Test if page is still accessible
-			await page.evaluate('1')
+			await self._timed_stage(stage_timings, 'page_check', page.evaluate('1'))
 		except Exception as e:
 			logger.debug(f'Current page is no longer accessible: {str(e)}')
 			# Get all available pages
@@ -811,19 +890,50 @@ class BrowserContext:
 				raise BrowserError('Browser closed: no valid pages available')
 
 		try:
-			await self.remove_highlights()
 			dom_service = DomService(page)
-			content = await dom_service.get_clickable_elements(
-				focus_element=focus_element,
-				viewport_expansion=self.config.viewport_expansion,
-				highlight_elements=self.config.highlight_elements,
-			)
 
-			tabs_info = await self.get_tabs_info()
+			async def capture_page():
+				# The screenshot has to show the highlights of this DOM tree, so these run in order
+				await self._timed_stage(stage_timings, 'remove_highlights', self.remove_highlights())
+				content = await self._timed_stage(
+					stage_timings,
+					'dom_tree',
+					dom_service.get_clickable_elements(
+						focus_element=focus_element,
+						viewport_expansion=self.config.viewport_expansion,
+						highlight_elements=self.config.highlight_elements,
+						columnar=self.config.columnar_dom_snapshot,
+					),
+				)
+				screenshot = None
+				if profile.screenshot:
+					screenshot = await self._timed_stage(stage_timings, 'screenshot', self.capture_screenshot())
+				return content, screenshot
+
+			async def skipped(value: T) -> T:
+				return value
 
-			# Get all cross-origin iframes within the page and open them in new tabs
+			# Opening the iframes as tabs needs the tabs
+			if profile.tabs or profile.iframes:
+				tabs = self._timed_stage(stage_timings, 'tabs', self.get_tabs_info())
+			else:
+				tabs = skipped([])
+			if profile.iframes:
+				iframes = self._timed_stage(stage_timings, 'iframes', dom_service.get_cross_origin_iframes())
+			else:
+				iframes = skipped([])
+			if profile.scroll_info:
+				info = self._timed_stage(stage_timings, 'page_info', page.evaluate(PAGE_INFO))
+			else:
+				info = page.evaluate(PAGE_TITLE)
+
+			# Everything else is independent of the DOM tree, fetch it meanwhile
+			(content, screenshot), tabs_info, iframe_urls, page_info = await gather_stages(
+				capture_page(), tabs, iframes, info
+			)
+
+			# Open all cross-origin iframes within the page in new tabs
 			# mark the titles of the new tabs so the LLM knows to check them for additional content
-			iframe_urls = await dom_service.get_cross_origin_iframes()
 			for url in iframe_urls:
 				if url in [tab.url for tab in tabs_info]:
 					continue  # skip if the iframe if we already have it open in a tab
@@ -839,20 +949,28 @@ class BrowserContext:
 					)
 				)
 
-			screenshot_b64 = await self.take_screenshot()
-			pixels_above, pixels_below = await self.get_scroll_info(page)
-
 			self.current_state = BrowserState(
 				element_tree=content.element_tree,
 				selector_map=content.selector_map,
 				url=page.url,
-				title=await page.title(),
+				title=page_info['title'],
 				tabs=tabs_info,
-				screenshot=screenshot_b64,
-				pixels_above=pixels_above,
-				pixels_below=pixels_below,
+				screenshot=screenshot.data if screenshot else None,
+				screenshot_mime_type=screenshot.mime_type if screenshot else 'image/png',
+				screenshot_size=(screenshot.width, screenshot.height) if screenshot and screenshot.width else None,
+				pixels_above=page_info['pixels_above'],
+				pixels_below=page_info['pixels_below'],
 			)
 
+			# Stages overlap, so the capture takes about as long as its slowest chain, not their sum
+			total = time.perf_counter() - start_time
+			record_step_metric('state_capture', total)
+			for stage, seconds in stage_timings.items():
+				record_step_metric(f'state_{stage}', seconds)
+			self._record_skipped_stages(profile)
+			stages = ', '.join(f'{stage} {seconds:.3f}s' for stage, seconds in stage_timings.items())
+			logger.debug(f'State captured in {total:.3f}s: {stages}')
+
 			return self.current_state
 		except Exception as e:
 			logger.error(f'Failed to update state: {str(e)}')
@@ -861,27 +979,65 @@ class BrowserContext:
 				return self.current_state
 			raise
 
+	def _record_skipped_stages(self, profile: StateCaptureProfile):
+		"""Count the stages left out by `profile`, per context and in the step metrics"""
+		skipped = [
+			stage
+			for stage, needed in (
+				('screenshot', profile.screenshot),
+				('tabs', profile.tabs or profile.iframes),
+				('iframes', profile.iframes),
+				('page_info', profile.scroll_info),
+			)
+			if not needed
+		]
+		if not skipped:
+			return
+		for stage in skipped:
+			self.state_stages_skipped[stage] = self.state_stages_skipped.get(stage, 0) + 1
+		record_step_metric('state_stages_skipped', len(skipped))
+		logger.debug(f'Skipped state capture stages {", ".join(skipped)}')
+
+	@staticmethod
+	async def _timed_stage(stage_timings: dict[str, float], name: str, awaitable: Awaitable[T]) -> T:
+		"""Await one stage of the state capture and record its wall time"""
+		start_time = time.perf_counter()
+		try:
+			return await awaitable
+		finally:
+			stage_timings[name] = time.perf_counter() - start_time
+
 	# region - Browser Actions
-	@time_execution_async('--take_screenshot')
 	async def take_screenshot(self, full_page: bool = False) -> str:
 		"""
-		Returns a base64 encoded screenshot of the current page.
+		Returns a base64 encoded screenshot of the current page, encoded as configured in `config.screenshot`.
+		"""
+		return (await self.capture_screenshot(full_page=full_page)).data
+
+	@time_execution_async('--take_screenshot')
+	@time_step_section('screenshot')
+	async def capture_screenshot(self, full_page: bool = False) -> Screenshot:
+		"""
+		Takes a screenshot of the current page, with its mime type and size.
 		"""
 		page = await self.get_current_page()
 
 		await page.bring_to_front()
 		await page.wait_for_load_state()
 
+		config = self.config.screenshot
+		options = {}
+		# The browser encodes JPEG itself, everything else starts from a lossless PNG
+		if config.format == 'jpeg' and not config.needs_pillow:
+			options = {'type': 'jpeg', 'quality': config.quality}
 		screenshot = await page.screenshot(
 			full_page=full_page,
 			animations='disabled',
+			**options,
 		)
 
-		screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
-
-		# await self.remove_highlights()
-
-		return screenshot_b64
+		# Decoding, resizing and base64 of a full page image take long enough to stall the event loop
+		return await asyncio.to_thread(encode_screenshot, screenshot, config)
 
 	@time_execution_async('--remove_highlights')
 	async def remove_highlights(self):
@@ -1234,20 +1390,41 @@ class BrowserContext:
 	async def get_tabs_info(self) -> list[TabInfo]:
 		"""Get information about all tabs"""
 		session = await self.get_session()
+		pages = session.context.pages
+
+		# Titles of tabs that did not navigate since the last call are cached, the others are fetched concurrently
+		titles = await asyncio.gather(*(self._get_tab_title(session, page) for page in pages))
 
 		tabs_info = []
-		for page_id, page in enumerate(session.context.pages):
-			try:
-				tab_info = TabInfo(page_id=page_id, url=page.url, title=await asyncio.wait_for(page.title(), timeout=1))
-			except asyncio.TimeoutError:
+		for page_id, (page, title) in enumerate(zip(pages, titles)):
+			if title is None:
 				# page.title() can hang forever on tabs that are crashed/dissapeared/about:blank
 				# we dont want to try automating those tabs because they will hang the whole script
 				logger.debug('Failed to get tab info for tab #%s: %s (ignoring)', page_id, page.url)
 				tab_info = TabInfo(page_id=page_id, url='about:blank', title='ignore this tab and do not use it')
+			else:
+				tab_info = TabInfo(page_id=page_id, url=page.url, title=title)
 			tabs_info.append(tab_info)
 
 		return tabs_info
 
+	async def _get_tab_title(self, session: BrowserSession, page: Page) -> str | None:
+		"""Title of a tab, None if it does not answer within a second"""
+		if page in session.tab_titles:
+			return session.tab_titles[page]
+
+		# Tracking the page is what invalidates its cached title on navigation
+		self._track_page(page)
+		url = page.url
+		try:
+			title = await asyncio.wait_for(page.title(), timeout=1)
+		except asyncio.TimeoutError:
+			return None
+		# Do not cache a title that raced with a navigation
+		if page.url == url:
+			session.tab_titles[page] = title
+		return title
+
 	@time_execution_async('--switch_to_tab')
 	async def switch_to_tab(self, page_id: int) -> None:
 		"""Switch to a specific tab by its page_id"""
@@ -1375,12 +1552,8 @@ class BrowserContext:
 
 	async def get_scroll_info(self, page: Page) -> tuple[int, int]:
 		"""Get scroll position information for the current page."""
-		scroll_y = await page.evaluate('window.scrollY')
-		viewport_height = await page.evaluate('window.innerHeight')
-		total_height = await page.evaluate('document.documentElement.scrollHeight')
-		pixels_above = scroll_y
-		pixels_below = total_height - (scroll_y + viewport_height)
-		return pixels_above, pixels_below
+		page_info = await page.evaluate(PAGE_INFO)
+		return page_info['pixels_above'], page_info['pixels_below']
 
 	async def reset_context(self):
 		"""Reset the browser session
@@ -0,0 +1,221 @@
+"""
+Network activity tracking, used to tell when a page has stopped loading.
+"""
+
+import asyncio
+import logging
+import re
+import time
+
+from playwright.async_api import Page, Request, Response
+
+logger = logging.getLogger(__name__)
+
+# Resource types a page needs before it is usable
+RELEVANT_RESOURCE_TYPES = {
+	'document',
+	'stylesheet',
+	'image',
+	'font',
+	'script',
+	'iframe',
+}
+
+RELEVANT_CONTENT_TYPES = (
+	'text/html',
+	'text/css',
+	'application/javascript',
+	'image/',
+	'font/',
+	'application/json',
+)
+
+# Streaming and real-time responses never really finish
+STREAMING_CONTENT_TYPES = (
+	'streaming',
+	'video',
+	'audio',
+	'webm',
+	'mp4',
+	'event-stream',
+	'websocket',
+	'protobuf',
+)
+
+# Requests to these never block the page
+IGNORED_URL_PATTERNS = (
+	# Analytics and tracking
+	'analytics',
+	'tracking',
+	'telemetry',
+	'beacon',
+	'metrics',
+	# Ad-related
+	'doubleclick',
+	'adsystem',
+	'adserver',
+	'advertising',
+	# Social media widgets
+	'facebook.com/plugins',
+	'platform.twitter',
+	'linkedin.com/embed',
+	# Live chat and support
+	'livechat',
+	'zendesk',
+	'intercom',
+	'crisp.chat',
+	'hotjar',
+	# Push notifications
+	'push-notifications',
+	'onesignal',
+	'pushwoosh',
+	# Background sync/heartbeat
+	'heartbeat',
+	'ping',
+	'alive',
+	# WebRTC and streaming
+	'webrtc',
+	'rtmp://',
+	'wss://',
+	# Common CDNs for dynamic content
+	'cloudfront.net',
+	'fastly.net',
+)
+
+MAX_RELEVANT_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB
+
+
+def _any_of(patterns) -> re.Pattern:
+	"""One regex matching any of the substrings, so a URL is scanned once instead of once per pattern"""
+	return re.compile('|'.join(re.escape(pattern) for pattern in patterns))
+
+
+IGNORED_URL_REGEX = _any_of(IGNORED_URL_PATTERNS)
+RELEVANT_CONTENT_TYPE_REGEX = _any_of(RELEVANT_CONTENT_TYPES)
+STREAMING_CONTENT_TYPE_REGEX = _any_of(STREAMING_CONTENT_TYPES)
+
+
+def is_relevant_request(request: Request) -> bool:
+	"""Whether the page load should wait for this request"""
+	if request.resource_type not in RELEVANT_RESOURCE_TYPES:
+		return False
+
+	url = request.url.lower()
+	if url.startswith(('data:', 'blob:')) or IGNORED_URL_REGEX.search(url):
+		return False
+
+	headers = request.headers
+	if headers.get('purpose') == 'prefetch' or headers.get('sec-fetch-dest') in ('video', 'audio'):
+		return False
+	return True
+
+
+def is_relevant_response(response: Response) -> bool:
+	"""Whether this response counts as network activity of the page load"""
+	content_type = response.headers.get('content-type', '').lower()
+	if STREAMING_CONTENT_TYPE_REGEX.search(content_type) or not RELEVANT_CONTENT_TYPE_REGEX.search(content_type):
+		return False
+
+	content_length = response.headers.get('content-length')
+	try:
+		if content_length and int(content_length) > MAX_RELEVANT_CONTENT_LENGTH:
+			return False
+	except ValueError:
+		pass
+	return True
+
+
+class NetworkIdleWatcher:
+	"""
+	Tracks the in-flight requests of a page and wakes waiters as soon as the network is idle.
+
+	Every request start or finish sets an asyncio.Event, so `wait_for_idle` sleeps until
+	either something changes or the quiet period is over, instead of polling.
+	"""
+
+	def __init__(self):
+		self.pending_requests: set[Request] = set()
+		self.last_activity = time.monotonic()
+		self._activity = asyncio.Event()
+		self._page: Page | None = None
+
+	def attach(self, page: Page):
+		self._page = page
+		page.on('request', self.on_request)
+		page.on('response', self.on_response)
+		page.on('requestfailed', self.on_request_failed)
+
+	def detach(self):
+		if self._page is None:
+			return
+		self._page.remove_listener('request', self.on_request)
+		self._page.remove_listener('response', self.on_response)
+		self._page.remove_listener('requestfailed', self.on_request_failed)
+		self._page = None
+
+	def on_request(self, request: Request):
+		if not is_relevant_request(request):
+			return
+		self.pending_requests.add(request)
+		self._mark_activity()
+
+	def on_response(self, response: Response):
+		request = response.request
+		if request not in self.pending_requests:
+			return
+		self.pending_requests.discard(request)
+		if is_relevant_response(response):
+			self._mark_activity()
+		else:
+			self._notify()
+
+	def on_request_failed(self, request: Request):
+		# Failed and aborted requests get no response, without this they would stay in flight forever
+		if request in self.pending_requests:
+			self.pending_requests.discard(request)
+			self._mark_activity()
+
+	def _mark_activity(self):
+		self.last_activity = time.monotonic()
+		self._notify()
+
+	def _notify(self):
+		# Wake the current waiters and hand out a fresh event for the next ones
+		self._activity.set()
+		self._activity = asyncio.Event()
+
+	def idle_for(self) -> float:
+		"""Seconds since the last network activity, 0 while requests are in flight"""
+		if self.pending_requests:
+			return 0.0
+		return time.monotonic() - self.last_activity
+
+	async def wait_for_idle(self, idle_time: float, timeout: float) -> float:
+		"""
+		Wait until no request has been in flight for `idle_time` seconds, or `timeout` seconds passed.
+
+		Returns the seconds waited.
+		"""
+		start_time = time.monotonic()
+		deadline = start_time + timeout
+		while True:
+			now = time.monotonic()
+			if now >= deadline:
+				logger.debug(
+					f'Network timeout after {timeout}s with {len(self.pending_requests)} '
+					f'pending requests: {[r.url for r in self.pending_requests]}'
+				)
+				break
+
+			quiet_left = idle_time - self.idle_for()
+			if not self.pending_requests and quiet_left <= 0:
+				break
+
+			# Sleep until the next request event, the end of the quiet period or the deadline
+			wake_up = deadline - now if self.pending_requests else min(quiet_left, deadline - now)
+			try:
+				await asyncio.wait_for(self._activity.wait(), timeout=wake_up)
+			except asyncio.TimeoutError:
+				pass
+
+		return time.monotonic() - start_time
@@ -0,0 +1,280 @@
+"""
+Pool of warm browsers shared by many short-lived browser contexts.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from playwright.async_api import Playwright, async_playwright
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.memory import process_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BrowserPoolConfig:
+	"""
+	Configuration for the BrowserPool.
+
+	Default values:
+		size: 2
+			Number of browsers kept running
+
+		max_tasks_per_browser: 50
+			Recycle a browser after it served this many contexts
+
+		max_rss_mb: None
+			Recycle a browser once its processes use more resident memory than this (Chromium only)
+
+		health_check_timeout: 5.0
+			Seconds a browser has to answer the health check before it is replaced
+	"""
+
+	size: int = 2
+	max_tasks_per_browser: int = 50
+	max_rss_mb: Optional[float] = None
+	health_check_timeout: float = 5.0
+
+
+@dataclass
+class BrowserPoolStats:
+	"""Hit/miss, launch and recycle counters of a BrowserPool"""
+
+	hits: int = 0
+	misses: int = 0
+	launch_times: list[float] = field(default_factory=list)
+	recycles: dict[str, int] = field(default_factory=dict)
+	health_check_failures: int = 0
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def summary(self) -> str:
+		launches = len(self.launch_times)
+		mean_launch = sum(self.launch_times) / launches if launches else 0.0
+		return (
+			f'browser pool {self.hits} hits / {self.misses} misses ({self.hit_rate:.0%}), '
+			f'{launches} launches (mean {mean_launch:.2f}s), {sum(self.recycles.values())} recycles'
+		)
+
+	def to_dict(self) -> dict:
+		launches = len(self.launch_times)
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'hit_rate': self.hit_rate,
+			'launches': launches,
+			'launch_time_total': sum(self.launch_times),
+			'launch_time_mean': sum(self.launch_times) / launches if launches else 0.0,
+			'launch_time_max': max(self.launch_times, default=0.0),
+			'recycles': dict(self.recycles),
+			'health_check_failures': self.health_check_failures,
+		}
+
+
+class _PooledBrowser:
+	"""One pool slot: a Browser plus its bookkeeping"""
+
+	def __init__(self, browser: Browser):
+		self.browser = browser
+		self.active = 0
+		self.served = 0
+		self.recycling = False
+		self.lock = asyncio.Lock()
+
+	@property
+	def running(self) -> bool:
+		return self.browser.playwright_browser is not None
+
+
+class BrowserPool:
+	"""
+	Keeps `size` browsers running and hands out fresh BrowserContexts on them.
+
+	All browsers share one Playwright driver. Contexts are spread over the least busy
+	browser, so starting a task only costs a new context instead of a Playwright start
+	and a browser launch. A browser is health-checked before it gets a new context,
+	and recycled (closed and relaunched in the background) after it served
+	`max_tasks_per_browser` contexts or went over `max_rss_mb`.
+	"""
+
+	def __init__(
+		self,
+		config: BrowserConfig = BrowserConfig(),
+		pool_config: BrowserPoolConfig = BrowserPoolConfig(),
+	):
+		if pool_config.size < 1:
+			raise ValueError(f'Browser pool size must be at least 1, got {pool_config.size}')
+
+		self.config = config
+		self.pool_config = pool_config
+		self.stats = BrowserPoolStats()
+		self.playwright: Playwright | None = None
+		self._slots = [_PooledBrowser(Browser(config=config)) for _ in range(pool_config.size)]
+		self._available = asyncio.Condition()
+		self._recycle_tasks: set[asyncio.Task] = set()
+		self._closed = False
+
+	async def start(self):
+		"""Start the Playwright driver and launch all browsers up front"""
+		if self.playwright is None:
+			self.playwright = await async_playwright().start()
+		await asyncio.gather(*(self._launch(slot) for slot in self._slots if not slot.running))
+
+	@asynccontextmanager
+	async def context(self, config: BrowserContextConfig | None = None) -> AsyncIterator[BrowserContext]:
+		"""A fresh browser context on a warm browser, closed and returned to the pool on exit"""
+		slot = await self._acquire()
+		try:
+			context = await slot.browser.new_context(config or self.config.new_context_config)
+			try:
+				yield context
+			finally:
+				try:
+					await context.close()
+				except Exception as e:
+					logger.debug(f'Failed to close pooled browser context: {e}')
+		finally:
+			await self._release(slot)
+
+	async def close(self):
+		"""Close all browsers and the Playwright driver"""
+		self._closed = True
+		if self._recycle_tasks:
+			await asyncio.gather(*self._recycle_tasks, return_exceptions=True)
+		await asyncio.gather(*(self._shutdown(slot) for slot in self._slots))
+		if self.playwright:
+			try:
+				await self.playwright.stop()
+			except Exception as e:
+				logger.debug(f'Failed to stop Playwright: {e}')
+			self.playwright = None
+
+	async def _acquire(self) -> _PooledBrowser:
+		if self._closed:
+			raise RuntimeError('Browser pool is closed')
+		if self.playwright is None:
+			await self.start()
+
+		async with self._available:
+			await self._available.wait_for(lambda: any(not slot.recycling for slot in self._slots))
+			# Least busy browser first, running ones before the ones that need a launch
+			slot = min(
+				(slot for slot in self._slots if not slot.recycling),
+				key=lambda slot: (not slot.running, slot.active),
+			)
+			slot.active += 1
+
+		try:
+			async with slot.lock:
+				if slot.running and await self._is_healthy(slot):
+					self.stats.hits += 1
+				else:
+					self.stats.misses += 1
+					await self._shutdown(slot)
+					await self._launch(slot)
+		except Exception:
+			await self._release(slot, served=False)
+			raise
+		return slot
+
+	async def _release(self, slot: _PooledBrowser, served: bool = True):
+		slot.active -= 1
+		if served:
+			slot.served += 1
+
+		reason = None
+		if not slot.recycling and slot.running and not self._closed:
+			if slot.served >= self.pool_config.max_tasks_per_browser:
+				reason = 'max_tasks'
+			elif self.pool_config.max_rss_mb and await self._rss_mb(slot) > self.pool_config.max_rss_mb:
+				reason = 'max_rss'
+
+		async with self._available:
+			if reason:
+				self.stats.recycles[reason] = self.stats.recycles.get(reason, 0) + 1
+				slot.recycling = True
+			# Recycle once the last context on the browser is gone
+			if slot.recycling and slot.active == 0 and not self._closed:
+				task = asyncio.create_task(self._recycle(slot))
+				self._recycle_tasks.add(task)
+				task.add_done_callback(self._recycle_tasks.discard)
+			self._available.notify_all()
+
+	async def _recycle(self, slot: _PooledBrowser):
+		try:
+			async with slot.lock:
+				await self._shutdown(slot)
+				if not self._closed:
+					await self._launch(slot)
+		except Exception as e:
+			# Leave the slot empty, the next context handed out on it relaunches the browser
+			logger.warning(f'Failed to relaunch pooled browser: {e}')
+		finally:
+			async with self._available:
+				slot.recycling = False
+				self._available.notify_all()
+
+	async def _launch(self, slot: _PooledBrowser):
+		start_time = time.time()
+		slot.browser.playwright_browser = await slot.browser._setup_browser(self.playwright)
+		slot.served = 0
+		launch_time = time.time() - start_time
+		self.stats.launch_times.append(launch_time)
+		logger.debug(f'Launched pooled browser in {launch_time:.2f}s')
+
+	async def _shutdown(self, slot: _PooledBrowser):
+		# Not Browser.close(): that stops the shared Playwright driver and closes every httpx client in the process
+		playwright_browser = slot.browser.playwright_browser
+		slot.browser.playwright_browser = None
+		if playwright_browser is None:
+			return
+		try:
+			await playwright_browser.close()
+		except Exception as e:
+			logger.debug(f'Failed to close pooled browser: {e}')
+
+	async def _is_healthy(self, slot: _PooledBrowser) -> bool:
+		playwright_browser = slot.browser.playwright_browser
+		try:
+			if not playwright_browser.is_connected():
+				raise RuntimeError('browser disconnected')
+			if self.config.browser_class == 'chromium':
+				await asyncio.wait_for(
+					self._cdp_send(playwright_browser, 'Browser.getVersion'),
+					self.pool_config.health_check_timeout,
+				)
+			return True
+		except Exception as e:
+			self.stats.health_check_failures += 1
+			logger.warning(f'Pooled browser failed its health check, replacing it: {e}')
+			return False
+
+	async def _rss_mb(self, slot: _PooledBrowser) -> float:
+		"""Resident memory of all processes of a Chromium browser, 0 when it cannot be measured"""
+		if self.config.browser_class != 'chromium':
+			return 0.0
+		try:
+			info = await self._cdp_send(slot.browser.playwright_browser, 'SystemInfo.getProcessInfo')
+		except Exception as e:
+			logger.debug(f'Failed to list browser processes: {e}')
+			return 0.0
+		return sum(process_rss_bytes(process['id']) for process in info.get('processInfo', [])) / 2**20
+
+	@staticmethod
+	async def _cdp_send(playwright_browser, method: str) -> dict:
+		session = await playwright_browser.new_browser_cdp_session()
+		try:
+			return await session.send(method)
+		finally:
+			await session.detach()
+
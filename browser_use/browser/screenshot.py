@@ -0,0 +1,141 @@
+"""
+Screenshot encoding: image format, quality, downscaling and grayscale for the screenshots sent to the LLM.
+"""
+
+import base64
+import io
+import math
+import struct
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+MIME_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+@dataclass
+class ScreenshotConfig:
+	"""
+	How screenshots are encoded.
+
+	format: 'png' (lossless), 'jpeg' or 'webp'
+	quality: 1-100, for jpeg and webp
+	max_width / max_height: downscale to fit, keeping the aspect ratio. None means no limit.
+	grayscale: drop the colors
+
+	PNG and JPEG at full size are encoded by the browser. WebP, downscaling and grayscale
+	need Pillow and are encoded in a worker thread.
+	"""
+
+	format: Literal['png', 'jpeg', 'webp'] = 'png'
+	quality: int = 80
+	max_width: int | None = None
+	max_height: int | None = None
+	grayscale: bool = False
+
+	def __post_init__(self):
+		if self.format not in MIME_TYPES:
+			raise ValueError(f'Unsupported screenshot format: {self.format}, use one of {list(MIME_TYPES)}')
+		if not 1 <= self.quality <= 100:
+			raise ValueError(f'Screenshot quality must be between 1 and 100, got {self.quality}')
+
+	@property
+	def mime_type(self) -> str:
+		return MIME_TYPES[self.format]
+
+	@property
+	def needs_pillow(self) -> bool:
+		return self.format == 'webp' or self.grayscale or self.max_width is not None or self.max_height is not None
+
+	@classmethod
+	def preset(cls, name: str) -> 'ScreenshotConfig':
+		"""One of SCREENSHOT_PRESETS"""
+		if name not in SCREENSHOT_PRESETS:
+			raise ValueError(f'Unknown screenshot preset: {name}, use one of {list(SCREENSHOT_PRESETS)}')
+		return cls(**SCREENSHOT_PRESETS[name])
+
+
+SCREENSHOT_PRESETS = {
+	# Full size PNG, what the LLM always got before
+	'lossless': {},
+	# Full size, a fraction of the PNG size, no visible loss for text
+	'balanced': {'format': 'jpeg', 'quality': 80},
+	# Smallest payloads: downscaled grayscale WebP, still readable for most pages
+	'compact': {'format': 'webp', 'quality': 60, 'max_width': 1024, 'max_height': 1024, 'grayscale': True},
+}
+
+
+@dataclass
+class Screenshot:
+	"""An encoded screenshot"""
+
+	data: str  # base64
+	mime_type: str
+	width: int | None
+	height: int | None
+
+
+def image_size(image: bytes) -> Optional[tuple[int, int]]:
+	"""Width and height from the header of a PNG or JPEG image, None for anything else"""
+	if image[:8] == b'\x89PNG\r\n\x1a\n':
+		return struct.unpack('>II', image[16:24])
+
+	if image[:2] == b'\xff\xd8':
+		offset = 2
+		while offset + 9 < len(image):
+			if image[offset] != 0xFF:
+				offset += 1
+				continue
+			marker = image[offset + 1]
+			# Start of frame markers, except DHT (C4), JPG (C8) and DAC (CC)
+			if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+				height, width = struct.unpack('>HH', image[offset + 5 : offset + 9])
+				return width, height
+			if marker == 0xFF or marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+				offset += 1 if marker == 0xFF else 2
+				continue
+			(length,) = struct.unpack('>H', image[offset + 2 : offset + 4])
+			offset += 2 + length
+
+	return None
+
+
+def encode_screenshot(image: bytes, config: ScreenshotConfig) -> Screenshot:
+	"""
+	Encode a screenshot as configured. `image` is a PNG, or already in the configured format
+	when the browser did the encoding. Blocking, run it in a worker thread.
+	"""
+	if not config.needs_pillow:
+		width, height = image_size(image) or (None, None)
+		return Screenshot(base64.b64encode(image).decode('utf-8'), config.mime_type, width, height)
+
+	try:
+		from PIL import Image
+	except ImportError as e:
+		raise ImportError('WebP, downscaled and grayscale screenshots need Pillow: pip install pillow') from e
+
+	img = Image.open(io.BytesIO(image))
+	if config.max_width is not None or config.max_height is not None:
+		img.thumbnail((config.max_width or img.width, config.max_height or img.height), Image.Resampling.LANCZOS)
+	if config.grayscale:
+		img = img.convert('L')
+	elif img.mode not in ('RGB', 'L'):
+		img = img.convert('RGB')
+
+	output = io.BytesIO()
+	if config.format == 'png':
+		img.save(output, format='PNG')
+	else:
+		img.save(output, format=config.format.upper(), quality=config.quality)
+	return Screenshot(base64.b64encode(output.getvalue()).decode('utf-8'), config.mime_type, img.width, img.height)
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+	"""
+	Input tokens of an image of this size, using the OpenAI high detail tiling: the image is scaled
+	to fit 2048x2048, then its short side to 768, and costs 85 tokens plus 170 per 512x512 tile.
+	"""
+	scale = min(1.0, 2048 / max(width, height))
+	width, height = width * scale, height * scale
+	scale = min(1.0, 768 / min(width, height))
+	width, height = width * scale, height * scale
+	return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
@@ -0,0 +1,276 @@
+"""
+Per-domain page settle times, used to size the page-load waits of a BrowserContext.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+	from browser_use.browser.context import BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+# Injected into every document: counts DOM mutations, form input, scrolling and hover changes, and
+# resolves waitForQuiet(quietMs, timeoutMs) once there were none for quietMs, or after timeoutMs.
+# Shadow roots are watched as well: the observer on `document` does not reach into them.
+# Changes to our own element highlights are not counted.
+DOM_QUIESCENCE_SCRIPT = """
+(() => {
+    if (window.__browserUseQuiescence) return;
+    const HIGHLIGHT_CONTAINER_ID = 'playwright-highlight-container';
+    const state = { lastMutation: performance.now(), mutations: 0 };
+    const touch = (count) => {
+        state.mutations += count;
+        state.lastMutation = performance.now();
+    };
+    const isHighlight = (record) => {
+        if (record.type === 'attributes' && record.attributeName === 'browser-user-highlight-id') return true;
+        const target = record.target.nodeType === Node.ELEMENT_NODE ? record.target : record.target.parentElement;
+        if (target && target.closest('#' + HIGHLIGHT_CONTAINER_ID)) return true;
+        const nodes = [...record.addedNodes, ...record.removedNodes];
+        return nodes.length > 0 && nodes.every((node) => node.id === HIGHLIGHT_CONTAINER_ID);
+    };
+    const observer = new MutationObserver((records) => {
+        const count = records.filter((record) => !isHighlight(record)).length;
+        if (count) touch(count);
+    });
+    const observed = new WeakSet();
+    const observe = (root) => {
+        if (observed.has(root)) return;
+        observed.add(root);
+        observer.observe(root, { subtree: true, childList: true, attributes: true, characterData: true });
+        // Changes that mutate no node but change what buildDomTree sees: typed values, scrolled
+        // containers (their elements enter or leave the viewport) and menus shown by :hover or a transition.
+        // Scroll events do not bubble, capture catches those of every element.
+        for (const type of ['input', 'change', 'scroll', 'mouseover', 'transitionend', 'animationend']) {
+            root.addEventListener(type, () => touch(1), { capture: true, passive: true });
+        }
+    };
+    observe(document);
+
+    const attachShadow = Element.prototype.attachShadow;
+    Element.prototype.attachShadow = function (...args) {
+        const shadowRoot = attachShadow.apply(this, args);
+        observe(shadowRoot);
+        return shadowRoot;
+    };
+    // Declarative shadow roots are created by the parser, without attachShadow
+    const observeDeclarativeShadowRoots = () => {
+        const walker = document.createTreeWalker(document.documentElement || document, NodeFilter.SHOW_ELEMENT);
+        for (let node = walker.currentNode; node; node = walker.nextNode()) {
+            if (node.shadowRoot) observe(node.shadowRoot);
+        }
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', observeDeclarativeShadowRoots, { once: true });
+    } else {
+        observeDeclarativeShadowRoots();
+    }
+
+    window.__browserUseQuiescence = {
+        state,
+        waitForQuiet(quietMs, timeoutMs) {
+            const start = performance.now();
+            return new Promise((resolve) => {
+                const check = () => {
+                    const now = performance.now();
+                    const idle = now - state.lastMutation;
+                    if (idle >= quietMs || now - start >= timeoutMs) {
+                        resolve({
+                            quiet: idle >= quietMs,
+                            waited: now - start,
+                            settledAfter: Math.max(state.lastMutation - start, 0),
+                            mutations: state.mutations,
+                        });
+                        return;
+                    }
+                    setTimeout(check, Math.min(quietMs - idle, timeoutMs - (now - start)));
+                };
+                check();
+            });
+        },
+    };
+})();
+"""
+
+# What the page shows, in one round-trip: equal between two calls only if nothing changed in between.
+# buildDomTree walks into same-origin frames, which count their own changes: their counters are added up.
+# null (never reused) when a same-origin frame with content has no probe to vouch for it.
+PAGE_FINGERPRINT = """
+() => {
+    const probe = window.__browserUseQuiescence;
+    if (!probe) return null;
+    let mutations = probe.state.mutations;
+    const frames = [];
+    const visit = (win) => {
+        for (let i = 0; i < win.frames.length; i++) {
+            const frame = win.frames[i];
+            let frameProbe, frameDocument;
+            try {
+                frameProbe = frame.__browserUseQuiescence;
+                frameDocument = [frame.location.href, frame.performance.timeOrigin];
+            } catch (e) {
+                continue;  // cross-origin, not part of the DOM tree
+            }
+            if (!frameProbe) {
+                const body = frame.document && frame.document.body;
+                if (body && body.childNodes.length) return false;
+                continue;
+            }
+            mutations += frameProbe.state.mutations;
+            frames.push(frameDocument);
+            if (visit(frame) === false) return false;
+        }
+    };
+    if (visit(window) === false) return null;
+    return [
+        performance.timeOrigin,
+        location.href,
+        mutations,
+        frames,
+        window.scrollX,
+        window.scrollY,
+        window.innerWidth,
+        window.innerHeight,
+    ];
+}
+"""
+
+WAIT_FOR_DOM_QUIET = """
+([quietMs, timeoutMs]) => window.__browserUseQuiescence
+    ? window.__browserUseQuiescence.waitForQuiet(quietMs, timeoutMs)
+    : null
+"""
+
+
+@dataclass
+class SettleBudget:
+	"""How long to wait for a page to settle, in seconds"""
+
+	minimum_wait: float
+	network_idle: float
+	maximum_wait: float
+	between_actions: float
+
+	@classmethod
+	def fixed(cls, config: 'BrowserContextConfig') -> 'SettleBudget':
+		"""The fixed waits of a context config"""
+		return cls(
+			minimum_wait=config.minimum_wait_page_load_time,
+			network_idle=config.wait_for_network_idle_page_load_time,
+			maximum_wait=config.maximum_wait_page_load_time,
+			between_actions=config.wait_between_actions,
+		)
+
+
+def _percentile(values: list[float], q: float) -> float:
+	ordered = sorted(values)
+	rank = (len(ordered) - 1) * q / 100
+	lower = int(rank)
+	upper = min(lower + 1, len(ordered) - 1)
+	return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+class SettlePolicy:
+	"""
+	Learns how long pages of each domain take to settle and sizes the page-load waits to match.
+
+	Every page load records its settle time per signal ('network': until the last request
+	finished, 'dom': until the last DOM mutation). Once a domain has `min_samples` loads, its
+	budget is the `percentile` of the recent settle times (the slowest signal wins):
+
+	- minimum wait and wait between actions: the budget, at most the fixed config value
+	- maximum wait: budget * `headroom` plus the network idle time, between
+		minimum wait + network idle time and the fixed maximum
+
+	Domains without enough history get the fixed config values. The history is kept in a small
+	JSON file at `path`, so later runs start with what earlier runs learned.
+	"""
+
+	def __init__(
+		self,
+		path: str | None = None,
+		percentile: float = 90,
+		min_samples: int = 5,
+		history_size: int = 50,
+		headroom: float = 1.5,
+	):
+		self.path = path
+		self.percentile = percentile
+		self.min_samples = min_samples
+		self.history_size = history_size
+		self.headroom = headroom
+
+		# domain -> signal -> recent settle times
+		self.history: dict[str, dict[str, list[float]]] = {}
+		self.seconds_saved = 0.0
+		self.waits = 0
+		self.adapted_waits = 0
+
+		if path:
+			self.history = self._load()
+
+	def _load(self) -> dict[str, dict[str, list[float]]]:
+		if not os.path.exists(self.path):
+			return {}
+		try:
+			with open(self.path, 'r') as f:
+				return json.load(f).get('domains', {})
+		except (OSError, ValueError) as e:
+			logger.warning(f'Could not read settle stats from {self.path}, starting fresh: {e}')
+			return {}
+
+	def observe(self, domain: str, signal: str, seconds: float):
+		"""Record how long a page of `domain` took to settle according to `signal`"""
+		samples = self.history.setdefault(domain, {}).setdefault(signal, [])
+		samples.append(round(max(seconds, 0.0), 3))
+		del samples[: -self.history_size]
+
+	def settle_time(self, domain: str) -> Optional[float]:
+		"""The learned settle time of a domain, None while there is not enough history"""
+		signals = self.history.get(domain, {})
+		times = [_percentile(samples, self.percentile) for samples in signals.values() if len(samples) >= self.min_samples]
+		return max(times) if times else None
+
+	def budget(self, domain: str, config: 'BrowserContextConfig') -> SettleBudget:
+		"""Waits for a page of `domain`; the fixed config values are the floor and ceiling"""
+		fixed = SettleBudget.fixed(config)
+		self.waits += 1
+		settle_time = self.settle_time(domain)
+		if settle_time is None:
+			return fixed
+
+		self.adapted_waits += 1
+		maximum_wait = settle_time * self.headroom + fixed.network_idle
+		return SettleBudget(
+			minimum_wait=min(settle_time, fixed.minimum_wait),
+			network_idle=fixed.network_idle,
+			maximum_wait=min(max(maximum_wait, fixed.minimum_wait + fixed.network_idle), fixed.maximum_wait),
+			between_actions=min(settle_time, fixed.between_actions),
+		)
+
+	def record_saving(self, seconds: float):
+		"""Add seconds not waited compared to the fixed config"""
+		self.seconds_saved += max(seconds, 0.0)
+
+	def stats(self) -> dict:
+		return {
+			'domains': len(self.history),
+			'waits': self.waits,
+			'adapted_waits': self.adapted_waits,
+			'seconds_saved': self.seconds_saved,
+		}
+
+	def save(self):
+		"""Write the settle history to `path`, keeping domains other processes saved in the meantime"""
+		if not self.path:
+			return
+		os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+		history = {**self._load(), **self.history}
+		tmp_path = f'{self.path}.{os.getpid()}.tmp'
+		with open(tmp_path, 'w') as f:
+			json.dump({'percentile': self.percentile, 'domains': history}, f)
+		os.replace(tmp_path, self.path)
@@ -29,11 +29,39 @@ class BrowserState(DOMState):
 	title: str
 	tabs: list[TabInfo]
 	screenshot: Optional[str] = None
+	screenshot_mime_type: str = 'image/png'
+	screenshot_size: Optional[tuple[int, int]] = None  # width, height
 	pixels_above: int = 0
 	pixels_below: int = 0
 	browser_errors: list[str] = field(default_factory=list)
 
 
+@dataclass(frozen=True)
+class StateCaptureProfile:
+	"""
+	Which parts of the browser state get_state captures. The DOM tree is always captured,
+	skipped parts are left empty in the BrowserState.
+
+	screenshot: screenshot of the viewport
+	tabs: info of all open tabs
+	iframes: open cross-origin iframes in new tabs (needs the tabs)
+	scroll_info: pixels above and below the viewport
+	"""
+
+	screenshot: bool = True
+	tabs: bool = True
+	iframes: bool = True
+	scroll_info: bool = True
+
+	def covers(self, other: 'StateCaptureProfile') -> bool:
+		"""Whether a state captured with this profile has everything `other` asks for"""
+		return all(getattr(self, name) or not getattr(other, name) for name in self.__dataclass_fields__)
+
+
+# Everything but the DOM tree, for checks that only need the interactive elements
+DOM_ONLY_CAPTURE = StateCaptureProfile(screenshot=False, tabs=False, iframes=False, scroll_info=False)
+
+
 @dataclass
 class BrowserStateHistory:
 	url: str
@@ -41,11 +69,15 @@ class BrowserStateHistory:
 	tabs: list[TabInfo]
 	interacted_element: list[DOMHistoryElement | None] | list[None]
 	screenshot: Optional[str] = None
+	# Reference into the history's ScreenshotStore, when the screenshot is kept there instead of inline
+	screenshot_ref: Optional[str] = None
 
 	def to_dict(self) -> dict[str, Any]:
 		data = {}
 		data['tabs'] = [tab.model_dump() for tab in self.tabs]
 		data['screenshot'] = self.screenshot
+		if self.screenshot_ref:
+			data['screenshot_ref'] = self.screenshot_ref
 		data['interacted_element'] = [el.to_dict() if el else None for el in self.interacted_element]
 		data['url'] = self.url
 		data['title'] = self.title
@@ -28,7 +28,7 @@ from browser_use.controller.views import (
 	SwitchTabAction,
 	UngroupTabsAction,
 )
-from browser_use.utils import time_execution_sync
+from browser_use.utils import record_token_usage, time_execution_sync, time_step_section
 
 logger = logging.getLogger(__name__)
 
@@ -222,6 +222,7 @@ class Controller(Generic[Context]):
 			template = PromptTemplate(input_variables=['goal', 'page'], template=prompt)
 			try:
 				output = page_extraction_llm.invoke(template.format(goal=goal, page=content))
+				record_token_usage(output)
 				msg = f'📄  Extracted from page\n: {output.content}\n'
 				logger.info(msg)
 				return ActionResult(extracted_content=msg, include_in_memory=True)
@@ -508,6 +509,7 @@ class Controller(Generic[Context]):
 	# Act --------------------------------------------------------------------
 
 	@time_execution_sync('--act')
+	@time_step_section('action')
 	async def act(
 		self,
 		action: ActionModel,
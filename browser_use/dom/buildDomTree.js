@@ -4,9 +4,10 @@
     focusHighlightIndex: -1,
     viewportExpansion: 0,
     debugMode: false,
+    columnar: false,
   }
 ) => {
-  const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode } = args;
+  const { doHighlightElements, focusHighlightIndex, viewportExpansion, debugMode, columnar } = args;
   let highlightIndex = 0; // Reset highlight index
 
   // Add timing stack to handle recursion
@@ -1001,6 +1002,93 @@
     return id;
   }
 
+  // Bits of the columnar `flags` field, see encodeColumnar
+  const FLAG_TEXT = 1;
+  const FLAG_VISIBLE = 2;
+  const FLAG_INTERACTIVE = 4;
+  const FLAG_TOP_ELEMENT = 8;
+  const FLAG_IN_VIEWPORT = 16;
+  const FLAG_SHADOW_ROOT = 32;
+
+  /**
+   * Encodes DOM_HASH_MAP as parallel arrays indexed by node id, with every string interned
+   * in one table. Lists (xpath segments, attributes, children) are flattened, with a count per node.
+   */
+  function encodeColumnar(rootId) {
+    const strings = [];
+    const stringIds = new Map();
+    const intern = (value) => {
+      let id = stringIds.get(value);
+      if (id === undefined) {
+        id = strings.length;
+        strings.push(value);
+        stringIds.set(value, id);
+      }
+      return id;
+    };
+
+    const count = ID.current;
+    const name = new Array(count);
+    const flags = new Array(count);
+    const highlightIndex = new Array(count);
+    const xpathCount = new Array(count);
+    const xpath = [];
+    const attributeCount = new Array(count);
+    const attributes = [];
+    const childCount = new Array(count);
+    const children = [];
+
+    for (let id = 0; id < count; id++) {
+      const node = DOM_HASH_MAP[id];
+      if (node.type === "TEXT_NODE") {
+        name[id] = intern(node.text);
+        flags[id] = FLAG_TEXT | (node.isVisible ? FLAG_VISIBLE : 0);
+        highlightIndex[id] = -1;
+        xpathCount[id] = 0;
+        attributeCount[id] = 0;
+        childCount[id] = 0;
+        continue;
+      }
+
+      name[id] = intern(node.tagName);
+      flags[id] =
+        (node.isVisible ? FLAG_VISIBLE : 0) |
+        (node.isInteractive ? FLAG_INTERACTIVE : 0) |
+        (node.isTopElement ? FLAG_TOP_ELEMENT : 0) |
+        (node.isInViewport ? FLAG_IN_VIEWPORT : 0) |
+        (node.shadowRoot ? FLAG_SHADOW_ROOT : 0);
+      highlightIndex[id] = node.highlightIndex ?? -1;
+
+      const segments = node.xpath.split("/");
+      xpathCount[id] = segments.length;
+      for (const segment of segments) xpath.push(intern(segment));
+
+      const attributeNames = Object.keys(node.attributes);
+      attributeCount[id] = attributeNames.length;
+      for (const attributeName of attributeNames) {
+        attributes.push(intern(attributeName), intern(node.attributes[attributeName]));
+      }
+
+      childCount[id] = node.children.length;
+      for (const child of node.children) children.push(Number(child));
+    }
+
+    return {
+      format: "columnar",
+      rootId: rootId === null ? -1 : Number(rootId),
+      strings,
+      name,
+      flags,
+      highlightIndex,
+      xpathCount,
+      xpath,
+      attributeCount,
+      attributes,
+      childCount,
+      children,
+    };
+  }
+
   // After all functions are defined, wrap them with performance measurement
   // Remove buildDomTree from here as we measure it separately
   highlightElement = measureTime(highlightElement);
@@ -1066,7 +1154,7 @@
     }
   }
 
-  return debugMode ?
-    { rootId, map: DOM_HASH_MAP, perfMetrics: PERF_METRICS } :
-    { rootId, map: DOM_HASH_MAP };
+  const result = columnar ? encodeColumnar(rootId) : { rootId, map: DOM_HASH_MAP };
+  if (debugMode) result.perfMetrics = PERF_METRICS;
+  return result;
 };
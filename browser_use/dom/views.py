@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from functools import cached_property
+import weakref
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Dict, List, Optional
 
 from browser_use.dom.history_tree_processor.view import CoordinateSet, HashedDomElement, ViewportInfo
@@ -10,14 +10,34 @@ if TYPE_CHECKING:
 	from .views import DOMElementNode
 
 
+# Nodes are slotted: a large page has tens of thousands of them per step, and without a
+# per-instance __dict__ they take less memory. Subclasses get their slots from dataclass(slots=True),
+# this base declares its own: the parent is stored in `_parent`, and listing `parent` keeps the
+# subclasses from adding a slot of that name that would hide the property below.
 @dataclass(frozen=False)
 class DOMBaseNode:
+	__slots__ = ('is_visible', 'parent', '_parent', '__weakref__')
+
 	is_visible: bool
 	# Use None as default and set parent later to avoid circular reference issues
 	parent: Optional['DOMElementNode']
 
 
-@dataclass(frozen=False)
+def _get_parent(node: DOMBaseNode) -> Optional['DOMElementNode']:
+	return node._parent() if node._parent is not None else None
+
+
+def _set_parent(node: DOMBaseNode, parent: Optional['DOMElementNode']) -> None:
+	node._parent = weakref.ref(parent) if parent is not None else None
+
+
+# The parent is held weakly, so a tree has no reference cycles and is freed by reference counting
+# as soon as its root is dropped, without waiting for (or forcing) a garbage collection.
+# A node only has a parent while something holds the root of its tree.
+DOMBaseNode.parent = property(_get_parent, _set_parent)  # type: ignore
+
+
+@dataclass(frozen=False, slots=True)
 class DOMTextNode(DOMBaseNode):
 	text: str
 	type: str = 'TEXT_NODE'
@@ -43,7 +63,7 @@ class DOMTextNode(DOMBaseNode):
 		return self.parent.is_top_element
 
 
-@dataclass(frozen=False)
+@dataclass(frozen=False, slots=True)
 class DOMElementNode(DOMBaseNode):
 	"""
 	xpath: the xpath of the element from the last root node (shadow root or iframe OR document if no shadow root or iframe).
@@ -62,6 +82,7 @@ class DOMElementNode(DOMBaseNode):
 	viewport_coordinates: Optional[CoordinateSet] = None
 	page_coordinates: Optional[CoordinateSet] = None
 	viewport_info: Optional[ViewportInfo] = None
+	_hash: Optional[HashedDomElement] = field(default=None, init=False, repr=False, compare=False)
 
 	def __repr__(self) -> str:
 		tag_str = f'<{self.tag_name}'
@@ -89,13 +110,16 @@ class DOMElementNode(DOMBaseNode):
 
 		return tag_str
 
-	@cached_property
+	@property
 	def hash(self) -> HashedDomElement:
-		from browser_use.dom.history_tree_processor.service import (
-			HistoryTreeProcessor,
-		)
+		# Computed once, like a cached_property (which needs a __dict__)
+		if self._hash is None:
+			from browser_use.dom.history_tree_processor.service import (
+				HistoryTreeProcessor,
+			)
 
-		return HistoryTreeProcessor._hash_dom_element(self)
+			self._hash = HistoryTreeProcessor._hash_dom_element(self)
+		return self._hash
 
 	def get_all_text_till_next_clickable_element(self, max_depth: int = -1) -> str:
 		text_parts = []
@@ -105,7 +129,7 @@ class DOMElementNode(DOMBaseNode):
 				return
 
 			# Skip this branch if we hit a highlighted element (except for the current node)
-			if isinstance(node, DOMElementNode) and node != self and node.highlight_index is not None:
+			if isinstance(node, DOMElementNode) and node is not self and node.highlight_index is not None:
 				return
 
 			if isinstance(node, DOMTextNode):
@@ -122,46 +146,65 @@ class DOMElementNode(DOMBaseNode):
 		"""Convert the processed DOM content to HTML."""
 		formatted_text = []
 
-		def process_node(node: DOMBaseNode, depth: int) -> None:
-			if isinstance(node, DOMElementNode):
-				# Add element with highlight_index
-				if node.highlight_index is not None:
-					attributes_str = ''
-					text = node.get_all_text_till_next_clickable_element()
-					if include_attributes:
-						attributes = list(
-							set(
-								[
-									str(value)
-									for key, value in node.attributes.items()
-									if key in include_attributes and value != node.tag_name
-								]
-							)
-						)
-						if text in attributes:
-							attributes.remove(text)
-						attributes_str = ';'.join(attributes)
-					line = f'[{node.highlight_index}]<{node.tag_name} '
-					if attributes_str:
-						line += f'{attributes_str}'
-					if text:
-						if attributes_str:
-							line += f'>{text}'
-						else:
-							line += f'{text}'
-					line += '/>'
-					formatted_text.append(line)
+		def format_element(node: DOMElementNode, text: str) -> str:
+			attributes_str = ''
+			if include_attributes:
+				attributes = list(
+					set(
+						[
+							str(value)
+							for key, value in node.attributes.items()
+							if key in include_attributes and value != node.tag_name
+						]
+					)
+				)
+				if text in attributes:
+					attributes.remove(text)
+				attributes_str = ';'.join(attributes)
+			line = f'[{node.highlight_index}]<{node.tag_name} '
+			if attributes_str:
+				line += f'{attributes_str}'
+			if text:
+				if attributes_str:
+					line += f'>{text}'
+				else:
+					line += f'{text}'
+			line += '/>'
+			return line
+
+		# Text below a highlighted element above this one is part of that element's line
+		inside_highlighted_parent = False
+		current = self.parent
+		while current is not None and not inside_highlighted_parent:
+			inside_highlighted_parent = current.highlight_index is not None
+			current = current.parent
 
+		# A single depth first pass. Each highlighted element reserves its line when it is entered and
+		# collects the text nodes it is the nearest highlighted ancestor of, which is the text of
+		# get_all_text_till_next_clickable_element. The line is written when its subtree is done (None on the stack).
+		open_elements: list[tuple[DOMElementNode, int, list[str]]] = []
+		stack: list[Optional[DOMBaseNode]] = [self]
+		while stack:
+			node = stack.pop()
+			if node is None:
+				element, line_index, text_parts = open_elements.pop()
+				formatted_text[line_index] = format_element(element, '\n'.join(text_parts).strip())
+
+			elif isinstance(node, DOMElementNode):
+				if node.highlight_index is not None:
+					open_elements.append((node, len(formatted_text), []))
+					formatted_text.append('')
+					stack.append(None)
 				# Process children regardless
-				for child in node.children:
-					process_node(child, depth + 1)
+				stack.extend(reversed(node.children))
 
 			elif isinstance(node, DOMTextNode):
+				if open_elements:
+					open_elements[-1][2].append(node.text)
 				# Add text only if it doesn't have a highlighted parent
-				if not node.has_parent_with_highlight_index() and node.is_visible:  # and node.is_parent_top_element()
+				elif not inside_highlighted_parent and node.is_visible:
 					formatted_text.append(f'{node.text}')
 
-		process_node(self, 0)
 		return '\n'.join(formatted_text)
 
 	def get_file_upload_element(self, check_siblings: bool = True) -> Optional['DOMElementNode']:
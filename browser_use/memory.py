@@ -0,0 +1,77 @@
+"""
+Opt-in garbage collection when the process runs short of memory.
+
+browser_use does not force collections: DOM trees hold their parents weakly, so they are freed by
+reference counting as soon as the state that holds them is dropped. A MemoryPressureHook is for
+runs that still want a full collection once the process grows beyond a limit.
+"""
+
+import gc
+import logging
+import os
+import time
+
+from browser_use.utils import record_step_metric
+
+logger = logging.getLogger(__name__)
+
+try:
+	import psutil
+except ImportError:
+	psutil = None
+
+
+def process_rss_bytes(pid: int) -> int:
+	"""Resident memory of a process, 0 if it cannot be read"""
+	if psutil is not None:
+		try:
+			return psutil.Process(pid).memory_info().rss
+		except psutil.Error:
+			return 0
+	try:
+		with open(f'/proc/{pid}/status') as f:
+			for line in f:
+				if line.startswith('VmRSS:'):
+					return int(line.split()[1]) * 1024
+	except (OSError, ValueError):
+		pass
+	return 0
+
+
+class MemoryPressureHook:
+	"""
+	Runs gc.collect() when this process uses more than `threshold_mb` of resident memory,
+	at most once every `min_interval` seconds.
+
+	Call it between units of work, e.g. pass it to Agent(memory_pressure_hook=...) to check after
+	every step. One hook can be shared by all agents of a process.
+	"""
+
+	def __init__(self, threshold_mb: float, min_interval: float = 30.0):
+		self.threshold_mb = threshold_mb
+		self.min_interval = min_interval
+		self.last_collect = float('-inf')
+		self.collections = 0
+		self.seconds = 0.0
+
+	def __call__(self) -> bool:
+		"""Collect if needed, returns whether it did"""
+		now = time.monotonic()
+		if now - self.last_collect < self.min_interval:
+			return False
+		rss_mb = process_rss_bytes(os.getpid()) / 2**20
+		if rss_mb <= self.threshold_mb:
+			return False
+
+		self.last_collect = now
+		start_time = time.perf_counter()
+		collected = gc.collect()
+		seconds = time.perf_counter() - start_time
+		self.collections += 1
+		self.seconds += seconds
+		record_step_metric('gc_collect', seconds)
+		logger.debug(
+			f'Memory pressure ({rss_mb:.0f} MB > {self.threshold_mb:.0f} MB): '
+			f'collected {collected} objects in {seconds:.3f}s'
+		)
+		return True
@@ -1,7 +1,10 @@
+import inspect
 import logging
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps
-from typing import Any, Callable, Coroutine, ParamSpec, TypeVar
+from typing import Any, Callable, Coroutine, Iterator, Optional, ParamSpec, TypeVar
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +46,147 @@ def time_execution_async(
 	return decorator
 
 
+class _SectionFrame:
+	"""The sections run inside one section, or at the top level of a step"""
+
+	__slots__ = ('intervals', 'covered')
+
+	def __init__(self) -> None:
+		self.intervals: list[tuple[float, float]] = []
+		# Seconds during which at least one of them was running
+		self.covered = 0.0
+
+	def add(self, start: float, end: float) -> float:
+		"""Record a finished section, return the seconds it overlaps with the ones recorded before"""
+		self.intervals.append((start, end))
+		covered = 0.0
+		covered_until = float('-inf')
+		for interval_start, interval_end in sorted(self.intervals):
+			if interval_end > covered_until:
+				covered += interval_end - max(interval_start, covered_until)
+				covered_until = interval_end
+		overlap = (end - start) - (covered - self.covered)
+		self.covered = covered
+		return overlap
+
+
+class StepTimings:
+	"""Seconds spent per named section during one agent step.
+
+	Time is exclusive: when a section runs inside another one (e.g. a page load inside an
+	action), the inner time is only counted for the inner section. Sections running at the
+	same time in concurrent tasks (e.g. the state capture stages) are each counted in full,
+	and the seconds counted more than once go to the `section_overlap` metric, so the sections
+	minus the overlap add up to the time spent in sections. `metrics` holds other per-step
+	measurements (e.g. time spent waiting for network idle) that are not sections.
+	"""
+
+	def __init__(self) -> None:
+		self.totals: dict[str, float] = {}
+		self.metrics: dict[str, float] = {}
+		self._top_level = _SectionFrame()
+
+	def add_metric(self, name: str, value: float) -> None:
+		self.metrics[name] = self.metrics.get(name, 0.0) + value
+
+	@contextmanager
+	def section(self, name: str) -> Iterator[None]:
+		frame = _SectionFrame()
+		parents = _section_stack.get()
+		token = _section_stack.set(parents + (frame,))
+		start_time = time.perf_counter()
+		try:
+			yield
+		finally:
+			end_time = time.perf_counter()
+			_section_stack.reset(token)
+			# Nested sections that ran concurrently are only subtracted once
+			self.totals[name] = self.totals.get(name, 0.0) + (end_time - start_time) - frame.covered
+			overlap = (parents[-1] if parents else self._top_level).add(start_time, end_time)
+			if overlap > 1e-6:
+				self.add_metric('section_overlap', overlap)
+
+
+# Timings of the agent step running in the current task, None outside of a step
+step_timings: ContextVar[Optional[StepTimings]] = ContextVar('step_timings', default=None)
+_section_stack: ContextVar[tuple] = ContextVar('step_timing_sections', default=())
+
+
+def record_step_metric(name: str, value: float) -> None:
+	"""Add `value` to the current step's metric `name`, if a step is running"""
+	timings = step_timings.get()
+	if timings is not None:
+		timings.add_metric(name, value)
+
+
+class StepTokenUsage:
+	"""Token counts reported by the LLM provider for the calls made during one agent step"""
+
+	def __init__(self) -> None:
+		self.prompt_tokens = 0
+		self.completion_tokens = 0
+		self.cached_tokens = 0
+		self.llm_calls = 0
+
+	def add(self, message: Any) -> None:
+		"""Add the `usage_metadata` of a LangChain AI message, if the provider returned one"""
+		usage = getattr(message, 'usage_metadata', None)
+		if not usage:
+			return
+		self.prompt_tokens += usage.get('input_tokens', 0) or 0
+		self.completion_tokens += usage.get('output_tokens', 0) or 0
+		self.cached_tokens += (usage.get('input_token_details') or {}).get('cache_read', 0) or 0
+		self.llm_calls += 1
+
+	def to_dict(self) -> dict[str, int]:
+		return {
+			'prompt_tokens': self.prompt_tokens,
+			'completion_tokens': self.completion_tokens,
+			'cached_tokens': self.cached_tokens,
+			'llm_calls': self.llm_calls,
+		}
+
+
+# Token usage of the agent step running in the current task, None outside of a step
+step_token_usage: ContextVar[Optional[StepTokenUsage]] = ContextVar('step_token_usage', default=None)
+
+
+def record_token_usage(message: Any) -> None:
+	"""Count the tokens of an LLM response towards the current step"""
+	usage = step_token_usage.get()
+	if usage is not None:
+		usage.add(message)
+
+
+def time_step_section(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+	"""Add the time spent in the decorated function to the current step's timings under `name`"""
+
+	def decorator(func: Callable[P, R]) -> Callable[P, R]:
+		if inspect.iscoroutinefunction(func):
+
+			@wraps(func)
+			async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+				timings = step_timings.get()
+				if timings is None:
+					return await func(*args, **kwargs)
+				with timings.section(name):
+					return await func(*args, **kwargs)
+
+			return async_wrapper  # type: ignore
+
+		@wraps(func)
+		def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+			timings = step_timings.get()
+			if timings is None:
+				return func(*args, **kwargs)
+			with timings.section(name):
+				return func(*args, **kwargs)
+
+		return wrapper
+
+	return decorator
+
+
 def singleton(cls):
 	instance = [None]
 
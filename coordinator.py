@@ -0,0 +1,421 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from result_sink import (
+    JsonlResultSink,
+    load_result_stream,
+    load_run_fingerprint,
+    materialize_results,
+    results_jsonl_path,
+    run_manifest_path,
+    settle_stats_path,
+    shard_run_name,
+)
+
+logger = logging.getLogger("browser_use_eval.coordinator")
+
+BENCHMARKS = ["mind2web", "webarena", "webvoyager", "webcanvas"]
+RUNNER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "run_evaluations.py")
+# Seconds between refreshes of a claimed job's file while its shard runs
+HEARTBEAT_INTERVAL = 60
+SHARD_STREAM_PATTERN = re.compile(r"\.shard-(\d+)-of-(\d+)_results\.jsonl$")
+
+
+def shard_job(benchmark, shard, output_dir, runner_args=()):
+    """Job description for one shard of a benchmark"""
+    index, count = shard
+    return {
+        "name": shard_run_name(benchmark, shard),
+        "benchmark": benchmark,
+        "shard": [index, count],
+        "args": ["--benchmark", benchmark, "--shard", f"{index}/{count}",
+                 "--output_dir", output_dir, *runner_args],
+    }
+
+
+def run_job(job, log_dir, python=sys.executable, heartbeat=None):
+    """
+    Run one shard in its own process (and so its own browser), returning the exit code.
+    `heartbeat` is called every HEARTBEAT_INTERVAL seconds while the shard runs.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    log_file = os.path.join(log_dir, f"{job['name']}.log")
+    logger.info(f"Starting {job['name']} (log: {log_file})")
+
+    start_time = time.time()
+    with open(log_file, 'a') as log:
+        process = subprocess.Popen([python, RUNNER_SCRIPT, *job["args"]], stdout=log, stderr=subprocess.STDOUT)
+        while True:
+            try:
+                returncode = process.wait(timeout=HEARTBEAT_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if heartbeat:
+                    heartbeat()
+
+    if returncode == 0:
+        logger.info(f"Finished {job['name']} in {time.time() - start_time:.1f}s")
+    else:
+        logger.error(f"{job['name']} exited with code {returncode}, see {log_file}")
+    return returncode
+
+
+class WorkQueue:
+    """
+    File-based queue of shard jobs in a directory shared by all nodes.
+
+    A job is a JSON file that moves pending/ -> claimed/ -> done/ or failed/. Claiming is
+    an atomic rename, so any number of workers on any number of nodes can pull from the
+    same queue without a server; the results land in the shared output directory.
+
+    A claimed job's file is refreshed while its shard runs, so a claim whose file has not
+    changed for a while belongs to a worker that died.
+    """
+
+    STATES = ("pending", "claimed", "done", "failed")
+
+    def __init__(self, root):
+        self.root = root
+        for state in self.STATES:
+            os.makedirs(os.path.join(root, state), exist_ok=True)
+
+    def _path(self, state, name):
+        return os.path.join(self.root, state, name)
+
+    def put(self, job):
+        file_name = f"{job['name']}.json"
+        tmp_path = self._path("pending", f".{file_name}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f, indent=2)
+        os.replace(tmp_path, self._path("pending", file_name))
+
+    def claim(self, worker_id):
+        """Take the next pending job, or return None when the queue is drained"""
+        for file_name in sorted(os.listdir(os.path.join(self.root, "pending"))):
+            if file_name.startswith("."):
+                continue
+            claimed_path = self._path("claimed", f"{file_name[:-len('.json')]}@{worker_id}.json")
+            try:
+                os.rename(self._path("pending", file_name), claimed_path)
+            except FileNotFoundError:
+                # Another worker claimed it first
+                continue
+            # The rename keeps the enqueue time, start the claim's age now
+            self.heartbeat(claimed_path)
+            with open(claimed_path, 'r') as f:
+                return claimed_path, json.load(f)
+        return None
+
+    def heartbeat(self, claimed_path):
+        """Mark a claimed job as still running"""
+        os.utime(claimed_path)
+
+    def finish(self, claimed_path, ok):
+        file_name = os.path.basename(claimed_path).rsplit("@", 1)[0] + ".json"
+        os.replace(claimed_path, self._path("done" if ok else "failed", file_name))
+
+    def requeue(self, stale_after=None, all_claimed=False):
+        """
+        Put failed jobs back in pending/, and the claimed jobs of dead workers: those without a
+        heartbeat for `stale_after` seconds, or all of them with `all_claimed` (only safe when no
+        worker is running). Claimed jobs are left alone otherwise, their workers may still be running.
+        """
+        moved = 0
+        now = time.time()
+        for state in ("claimed", "failed"):
+            for file_name in os.listdir(os.path.join(self.root, state)):
+                path = self._path(state, file_name)
+                if state == "claimed" and not all_claimed:
+                    try:
+                        age = now - os.path.getmtime(path)
+                    except FileNotFoundError:
+                        # Finished in the meantime
+                        continue
+                    if stale_after is None or age < stale_after:
+                        continue
+                pending_name = file_name.rsplit("@", 1)[0] + ".json" if "@" in file_name else file_name
+                try:
+                    os.replace(path, self._path("pending", pending_name))
+                except FileNotFoundError:
+                    continue
+                moved += 1
+        return moved
+
+    def counts(self):
+        return {state: len(os.listdir(os.path.join(self.root, state))) for state in self.STATES}
+
+
+def run_worker(queue, workers, log_dir):
+    """Pull jobs from the queue until it is empty, running `workers` shards at a time"""
+    worker_prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    def loop(slot):
+        failures = 0
+        while True:
+            claimed = queue.claim(f"{worker_prefix}-{slot}")
+            if claimed is None:
+                return failures
+            claimed_path, job = claimed
+            ok = run_job(job, log_dir, heartbeat=lambda: queue.heartbeat(claimed_path)) == 0
+            queue.finish(claimed_path, ok)
+            failures += not ok
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        failures = sum(pool.map(loop, range(workers)))
+
+    logger.info(f"Queue drained: {queue.counts()}")
+    return failures
+
+
+def run_local(benchmarks, shards, workers, output_dir, runner_args=()):
+    """Run every shard of every benchmark on this machine, at most `workers` at a time"""
+    jobs = [shard_job(benchmark, (i, shards), output_dir, runner_args)
+            for benchmark in benchmarks for i in range(shards)]
+    log_dir = os.path.join(output_dir, "logs")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        returncodes = list(pool.map(lambda job: run_job(job, log_dir), jobs))
+    return sum(code != 0 for code in returncodes)
+
+
+def shard_stream_files(output_dir, benchmark, shards=None):
+    """
+    Shard result streams of the N-way split of a benchmark. Without N, the split found in
+    output_dir, which fails if there are several (e.g. an old 4-way and a new 8-way run).
+    """
+    pattern = f"{benchmark}.shard-*-of-{shards if shards else '*'}_results.jsonl"
+    stream_files = [path for path in sorted(glob.glob(os.path.join(output_dir, pattern)))
+                    if SHARD_STREAM_PATTERN.search(path)]
+    if shards is None:
+        splits = sorted({int(SHARD_STREAM_PATTERN.search(path).group(2)) for path in stream_files})
+        if len(splits) > 1:
+            raise ValueError(
+                f"{benchmark}: {output_dir} has results of several shard splits ({', '.join(map(str, splits))}), "
+                f"choose one with --shards"
+            )
+    return stream_files
+
+
+def merge_shards(output_dir, benchmark, shards=None, formats=("json", "csv")):
+    """Merge the shard streams of a benchmark into its canonical result set"""
+    stream_files = shard_stream_files(output_dir, benchmark, shards)
+    if not stream_files:
+        logger.warning(f"No shard results found for {benchmark} in {output_dir}")
+        return []
+
+    if shards:
+        missing = [i for i in range(shards)
+                   if not os.path.exists(results_jsonl_path(output_dir, shard_run_name(benchmark, (i, shards))))]
+        if missing:
+            logger.warning(f"{benchmark}: no results for shards {missing} of {shards}, merging the rest")
+
+    # All shards of a split run with the same config, so they share one fingerprint
+    fingerprints = {}
+    for stream_file in list(stream_files):
+        run_name = os.path.basename(stream_file)[:-len("_results.jsonl")]
+        fingerprint = load_run_fingerprint(output_dir, run_name)
+        if fingerprint is None:
+            logger.warning(f"{run_name} has no run manifest, not merging its results")
+            stream_files.remove(stream_file)
+            continue
+        fingerprints.setdefault(fingerprint, run_name)
+    if not stream_files:
+        return []
+    if len(fingerprints) > 1:
+        raise ValueError(
+            f"{benchmark}: shards were run with different configurations ({', '.join(fingerprints.values())} differ), "
+            f"rerun them or merge the matching ones from a separate --output_dir"
+        )
+    fingerprint, run_name = next(iter(fingerprints.items()))
+
+    records = {}
+    for stream_file in stream_files:
+        for record in load_result_stream(stream_file, fingerprint):
+            records[record.get("task_id")] = record
+    merged = sorted(records.values(), key=lambda r: r.get("task_index", 0))
+
+    with JsonlResultSink(results_jsonl_path(output_dir, benchmark)) as sink:
+        for record in merged:
+            sink.append(record)
+    # The merged stream belongs to the shards' run configuration
+    shutil.copyfile(run_manifest_path(output_dir, run_name), run_manifest_path(output_dir, benchmark))
+
+    merge_throughput(output_dir, benchmark, stream_files)
+    merge_settle_stats(output_dir, benchmark, stream_files)
+    logger.info(f"Merged {len(merged)} {benchmark} results from {len(stream_files)} shards")
+    return materialize_results(output_dir, benchmark, formats, fingerprint)
+
+
+def merge_settle_stats(output_dir, benchmark, stream_files):
+    """Combine the per-domain settle histories the shards learned, for the next run to start from"""
+    shard_stats = []
+    for stream_file in stream_files:
+        run_name = os.path.basename(stream_file)[:-len("_results.jsonl")]
+        stats_file = settle_stats_path(output_dir, run_name)
+        if os.path.exists(stats_file):
+            with open(stats_file, 'r') as f:
+                shard_stats.append(json.load(f))
+    if not shard_stats:
+        return
+
+    # Shards keep the same number of recent samples per signal, so the merge keeps as many
+    history_size = max((len(samples) for stats in shard_stats for signals in stats.get("domains", {}).values()
+                        for samples in signals.values()), default=0)
+    domains = {}
+    for stats in shard_stats:
+        for domain, signals in stats.get("domains", {}).items():
+            for signal, samples in signals.items():
+                domains.setdefault(domain, {}).setdefault(signal, []).extend(samples)
+    for signals in domains.values():
+        for signal, samples in signals.items():
+            signals[signal] = samples[-history_size:]
+    with open(settle_stats_path(output_dir, benchmark), 'w') as f:
+        json.dump({"percentile": shard_stats[0].get("percentile"), "domains": domains}, f)
+
+
+def merge_throughput(output_dir, benchmark, stream_files):
+    """Combine per-shard throughput files; shards run side by side, so wall time is the slowest shard"""
+    shard_stats = []
+    for stream_file in stream_files:
+        throughput_file = stream_file[:-len("_results.jsonl")] + "_throughput.json"
+        if os.path.exists(throughput_file):
+            with open(throughput_file, 'r') as f:
+                shard_stats.append(json.load(f))
+    if not shard_stats:
+        return
+
+    completed = sum(s["completed"] for s in shard_stats)
+    wall_time = max(s["wall_time"] for s in shard_stats)
+    merged = {
+        "shards": len(shard_stats),
+        "concurrency": sum(s["concurrency"] for s in shard_stats),
+        "completed": completed,
+        "failed": sum(s["failed"] for s in shard_stats),
+        "timed_out": sum(s["timed_out"] for s in shard_stats),
+        "wall_time": wall_time,
+        "tasks_per_minute": completed / wall_time * 60 if wall_time > 0 else 0.0,
+        "per_shard": shard_stats,
+    }
+    settle_stats = [s["settle"] for s in shard_stats if "settle" in s]
+    if settle_stats:
+        merged["settle"] = {
+            "waits": sum(s["waits"] for s in settle_stats),
+            "adapted_waits": sum(s["adapted_waits"] for s in settle_stats),
+            "seconds_saved": sum(s["seconds_saved"] for s in settle_stats),
+        }
+    pool_stats = [s["browser_pool"] for s in shard_stats if "browser_pool" in s]
+    if pool_stats:
+        hits = sum(p["hits"] for p in pool_stats)
+        misses = sum(p["misses"] for p in pool_stats)
+        launches = sum(p["launches"] for p in pool_stats)
+        launch_time_total = sum(p["launch_time_total"] for p in pool_stats)
+        merged["browser_pool"] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "launches": launches,
+            "launch_time_total": launch_time_total,
+            "launch_time_mean": launch_time_total / launches if launches else 0.0,
+        }
+    with open(os.path.join(output_dir, f"{benchmark}_throughput.json"), 'w') as f:
+        json.dump(merged, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run sharded evaluations locally or through a shared work queue, and merge shard results",
+        epilog="Arguments not listed here (--model, --max_samples, --concurrency, ...) are passed to run_evaluations.py",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_shard_args(p):
+        p.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS,
+                       help="Benchmarks to shard")
+        p.add_argument("--shards", type=int, default=4,
+                       help="Number of shards per benchmark")
+        p.add_argument("--output_dir", type=str, default="results",
+                       help="Directory the shards write to (shared between nodes when using a queue)")
+
+    local = subparsers.add_parser("local", help="Run all shards on this machine, then merge")
+    add_shard_args(local)
+    local.add_argument("--workers", type=int, default=4,
+                       help="Number of shard processes to run at the same time")
+    local.add_argument("--formats", nargs="+", choices=["json", "csv", "parquet"], default=["json", "csv"],
+                       help="Merged result formats")
+
+    enqueue = subparsers.add_parser("enqueue", help="Add shard jobs to a shared work queue")
+    add_shard_args(enqueue)
+    enqueue.add_argument("--queue_dir", type=str, required=True,
+                         help="Work queue directory on a filesystem shared by all nodes")
+
+    worker = subparsers.add_parser("worker", help="Run shard jobs from a shared work queue until it is empty")
+    worker.add_argument("--queue_dir", type=str, required=True,
+                        help="Work queue directory on a filesystem shared by all nodes")
+    worker.add_argument("--workers", type=int, default=1,
+                        help="Number of shard processes to run at the same time on this node")
+    worker.add_argument("--log_dir", type=str, default="logs",
+                        help="Directory for per-shard logs")
+
+    requeue = subparsers.add_parser("requeue", help="Move failed jobs, and claimed jobs of dead workers, back to pending")
+    requeue.add_argument("--queue_dir", type=str, required=True,
+                         help="Work queue directory")
+    requeue.add_argument("--stale_after", type=float, default=None,
+                         help=f"Also requeue claimed jobs without a heartbeat for this many seconds "
+                              f"(workers send one every {HEARTBEAT_INTERVAL}s)")
+    requeue.add_argument("--all_claimed", action="store_true",
+                         help="Also requeue every claimed job, only when no worker is running")
+
+    merge = subparsers.add_parser("merge", help="Merge shard results into canonical per-benchmark results")
+    merge.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS,
+                       help="Benchmarks to merge")
+    merge.add_argument("--shards", type=int, default=None,
+                       help="Only merge the shards of an N-way split (default: the one split found)")
+    merge.add_argument("--output_dir", type=str, default="results",
+                       help="Directory containing the shard results")
+    merge.add_argument("--formats", nargs="+", choices=["json", "csv", "parquet"], default=["json", "csv"],
+                       help="Merged result formats")
+
+    args, runner_args = parser.parse_known_args()
+    if runner_args and args.command not in ("local", "enqueue"):
+        parser.error(f"unrecognized arguments: {' '.join(runner_args)}")
+
+    failures = 0
+    if args.command == "local":
+        failures = run_local(args.benchmarks, args.shards, args.workers, args.output_dir, runner_args)
+        for benchmark in args.benchmarks:
+            merge_shards(args.output_dir, benchmark, args.shards, args.formats)
+    elif args.command == "enqueue":
+        queue = WorkQueue(args.queue_dir)
+        for benchmark in args.benchmarks:
+            for i in range(args.shards):
+                queue.put(shard_job(benchmark, (i, args.shards), args.output_dir, runner_args))
+        logger.info(f"Queue {args.queue_dir}: {queue.counts()}")
+    elif args.command == "worker":
+        failures = run_worker(WorkQueue(args.queue_dir), args.workers, args.log_dir)
+    elif args.command == "requeue":
+        if args.stale_after is not None and args.stale_after <= HEARTBEAT_INTERVAL:
+            parser.error(f"--stale_after must be longer than the {HEARTBEAT_INTERVAL}s heartbeat interval")
+        queue = WorkQueue(args.queue_dir)
+        logger.info(f"Requeued {queue.requeue(args.stale_after, args.all_claimed)} jobs")
+    elif args.command == "merge":
+        for benchmark in args.benchmarks:
+            merge_shards(args.output_dir, benchmark, args.shards, args.formats)
+
+    if failures:
+        logger.error(f"{failures} shard runs failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main()
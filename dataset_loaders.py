@@ -0,0 +1,260 @@
+import hashlib
+import json
+import logging
+import os
+from urllib.parse import urlparse
+
+logger = logging.getLogger("browser_use_eval.datasets")
+
+DATASET_PATHS = {
+    "mind2web": "datasets/mind2web/test_data.json",
+    "webarena": "datasets/webarena/tasks.json",
+    "webvoyager": "datasets/webvoyager/tasks.json",
+    "webcanvas": "datasets/webcanvas/tasks.json",
+}
+
+# Written by prepare_datasets.py next to each dataset: one normalised task per line
+NORMALIZED_TASKS_FILE = "tasks.normalized.jsonl"
+
+DEFAULT_START_URL = "https://www.google.com"
+
+# Source field names per benchmark, first match wins
+TASK_FIELDS = {
+    "mind2web": {
+        "task_id": ["id", "annotation_id"],
+        "instruction": ["instruction", "confirmed_task", "task_description"],
+        "start_url": ["starting_url", "url"],
+        "website": ["website", "domain"],
+    },
+    "webarena": {
+        "task_id": ["id", "task_id"],
+        "instruction": ["instruction", "intent", "task_description"],
+        "start_url": ["url", "start_url"],
+        "website": ["website", "sites"],
+    },
+    "webvoyager": {
+        "task_id": ["id"],
+        "instruction": ["instruction", "ques", "task_description"],
+        "start_url": ["website_url", "web"],
+        "website": ["website", "web_name"],
+    },
+    "webcanvas": {
+        "task_id": ["id", "task_id"],
+        "instruction": ["instruction", "task", "task_description"],
+        "start_url": ["url", "website_url"],
+        "website": ["website", "domain"],
+    },
+}
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def _first(task, keys, default=None):
+    for key in keys:
+        value = task.get(key)
+        if value not in (None, "", []):
+            return value
+    return default
+
+
+def normalize_task(benchmark, index, task):
+    """
+    Map a raw benchmark task to the common task schema:
+
+    index, task_id, benchmark, instruction, start_url, website, domain, raw
+    """
+    fields = TASK_FIELDS[benchmark]
+    start_url = _first(task, fields["start_url"], DEFAULT_START_URL)
+    domain = urlparse(start_url).netloc.lower()
+    website = _first(task, fields["website"], domain)
+    if isinstance(website, list):
+        website = ",".join(website)
+    return {
+        "index": index,
+        "task_id": str(_first(task, fields["task_id"], f"{benchmark}_{index}")),
+        "benchmark": benchmark,
+        "instruction": _first(task, fields["instruction"], ""),
+        "start_url": start_url,
+        "website": str(website),
+        "domain": domain,
+        "raw": task,
+    }
+
+
+def _iter_jsonl(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable line {line_number} in {path}")
+
+
+class _JsonReader:
+    """Incremental JSON value reader over a text file, holding one value at a time in memory"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size=0):
+        chunk = self.f.read(max(size, READ_CHUNK_SIZE))
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at end of file"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, got {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """
+        Decode the next complete JSON value, reading more of the file as needed.
+
+        Each retry at least doubles the buffered part of the value, so a value of n bytes
+        is decoded from the start O(log n) times and O(n) bytes are decoded in total.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill(len(self.buffer) - self.pos):
+                    raise
+                continue
+            # A number can be cut in half at the end of the buffer, make sure it is complete
+            if end == len(self.buffer) and self._fill(end - self.pos):
+                continue
+            self.pos = end
+            return value
+
+    def array_items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def _iter_json(path, key="tasks"):
+    """Stream the items of a top-level JSON array, or of the array under `key` of a top-level object"""
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _JsonReader(f)
+        if reader.peek() == "[":
+            yield from reader.array_items()
+            return
+
+        reader.expect("{")
+        while reader.peek() not in ("}", ""):
+            name = reader.value()
+            reader.expect(":")
+            if name == key and reader.peek() == "[":
+                yield from reader.array_items()
+                return
+            # Other top-level fields (metadata) are small, decode and drop them
+            reader.value()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+
+def iter_raw_tasks(path):
+    """Stream raw task dicts from a JSON (`[...]` or `{"tasks": [...]}`) or JSONL file"""
+    if path.endswith(".jsonl"):
+        return _iter_jsonl(path)
+    return _iter_json(path)
+
+
+def dataset_path(benchmark):
+    """The prepared, pre-normalised task file if there is one, else the raw dataset file"""
+    normalized = os.path.join(os.path.dirname(DATASET_PATHS[benchmark]), NORMALIZED_TASKS_FILE)
+    return normalized if os.path.exists(normalized) else DATASET_PATHS[benchmark]
+
+
+def _in_sample(task_id, fraction, seed):
+    """Deterministic per-task coin flip: the same tasks are picked for a seed, whatever the order or shard"""
+    digest = hashlib.sha256(f"{seed}:{task_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 < fraction
+
+
+class TaskStream:
+    """
+    Lazy, re-iterable stream of normalised tasks for one benchmark.
+
+    Every iteration re-reads the dataset file and applies the filters on the fly, so
+    only the task being handed out is held in memory. Filters:
+
+    - task_ids: only these task ids
+    - websites: only tasks whose website or start URL domain matches one of these
+    - sample_fraction / seed: a seeded random subset, picked per task id
+    - max_samples: stop after this many matching tasks
+    """
+
+    def __init__(self, benchmark, path=None, max_samples=None, task_ids=None, websites=None,
+                 sample_fraction=None, seed=0):
+        if benchmark not in TASK_FIELDS:
+            raise ValueError(f"Unknown benchmark: {benchmark}")
+        if sample_fraction is not None and not 0 < sample_fraction <= 1:
+            raise ValueError(f"sample_fraction must be in (0, 1], got {sample_fraction}")
+
+        self.benchmark = benchmark
+        self.path = path or dataset_path(benchmark)
+        self.normalized = os.path.basename(self.path) == NORMALIZED_TASKS_FILE
+        self.max_samples = max_samples
+        self.task_ids = set(task_ids) if task_ids else None
+        self.websites = [w.lower() for w in websites] if websites else None
+        self.sample_fraction = sample_fraction
+        self.seed = seed
+
+    def matches(self, task):
+        if self.task_ids is not None and task["task_id"] not in self.task_ids:
+            return False
+        if self.websites is not None and not any(
+            w in task["website"].lower() or task["domain"] == w or task["domain"].endswith("." + w)
+            for w in self.websites
+        ):
+            return False
+        if self.sample_fraction is not None and not _in_sample(task["task_id"], self.sample_fraction, self.seed):
+            return False
+        return True
+
+    def __iter__(self):
+        if not os.path.exists(self.path):
+            logger.error(f"Dataset file for {self.benchmark} not found: {self.path}")
+            return
+
+        yielded = 0
+        try:
+            for index, raw in enumerate(iter_raw_tasks(self.path)):
+                if self.max_samples and yielded >= self.max_samples:
+                    return
+                task = raw if self.normalized else normalize_task(self.benchmark, index, raw)
+                if self.matches(task):
+                    yielded += 1
+                    yield task
+        except (ValueError, OSError) as e:
+            logger.error(f"Error loading {self.benchmark} dataset: {str(e)}")
+
@@ -1,7 +1,17 @@
 import os
-import subprocess
+import glob
+import json
+import shutil
+import hashlib
+import zipfile
 import argparse
 import logging
+import subprocess
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dataset_loaders import DATASET_PATHS, NORMALIZED_TASKS_FILE, iter_raw_tasks, normalize_task
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,114 +23,354 @@ logging.basicConfig(
 )
 logger = logging.getLogger("dataset_prep")
 
-def prepare_mind2web():
-    """Download and prepare Mind2Web dataset"""
-    import os
-    import urllib.request
-    import zipfile
-    
-    os.makedirs("datasets/mind2web", exist_ok=True)
-    
-    logger.info("Downloading Mind2Web dataset...")
-    # Use urllib instead of wget
-    download_url = "https://github.com/OSU-NLP-Group/Mind2Web/releases/download/v0.1/data.zip"
-    download_path = "datasets/mind2web/data.zip"
-    
+DATASETS = ["mind2web", "webarena", "webvoyager", "webcanvas"]
+
+# Where each benchmark comes from, and which files in it hold the tasks.
+# Set "sha256" to pin a downloaded archive to a known checksum.
+SOURCES = {
+    "mind2web": {
+        "kind": "url",
+        "url": "https://github.com/OSU-NLP-Group/Mind2Web/releases/download/v0.1/data.zip",
+        "sha256": None,
+        "tasks": ["data/test_task/*.json", "data/test_website/*.json", "data/test_domain/*.json"],
+    },
+    "webarena": {
+        "kind": "git",
+        "url": "https://github.com/web-arena-x/webarena.git",
+        "tasks": ["config_files/test.raw.json"],
+    },
+    "webvoyager": {
+        "kind": "git",
+        "url": "https://github.com/MinorJerry/WebVoyager.git",
+        "tasks": ["data/WebVoyager_data.jsonl"],
+    },
+    "webcanvas": {
+        "kind": "git",
+        "url": "https://github.com/iMeanAI/WebCanvas.git",
+        "tasks": ["data/*.json", "data/*.jsonl"],
+    },
+}
+
+# Bump when the normalised task format changes, so existing task files are rebuilt
+CONVERTER_VERSION = 1
+
+# Per-action page snapshots make up most of the Mind2Web dump and are never used to run a task
+COMPACT_DROP_FIELDS = {
+    "mind2web": ("raw_html", "cleaned_html"),
+}
+
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sha256_tree(path):
+    """Checksum of a directory: relative paths and contents of all files, in sorted order"""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d != ".git")
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            digest.update(os.path.relpath(file_path, path).encode() + b"\0")
+            digest.update(sha256_file(file_path).encode())
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed store of downloaded dataset artifacts.
+
+    blobs/<sha256>     downloaded files, named by their checksum
+    trees/<digest>     extracted archives and checkouts, named by blob checksum or git commit
+    refs/<name>.json   which tree currently backs a dataset, and where it came from
+    """
+
+    def __init__(self, root):
+        self.root = root
+        for sub in ("blobs", "trees", "refs", "tmp"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest)
+
+    def tree_path(self, digest):
+        return os.path.join(self.root, "trees", digest)
+
+    def tmp_path(self, name):
+        return os.path.join(self.root, "tmp", f"{name}.{os.getpid()}")
+
+    def ref_path(self, name):
+        return os.path.join(self.root, "refs", f"{name}.json")
+
+    def read_ref(self, name):
+        try:
+            with open(self.ref_path(name), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def write_ref(self, name, ref):
+        tmp_path = self.tmp_path(f"{name}.ref")
+        with open(tmp_path, 'w') as f:
+            json.dump(ref, f, indent=2)
+        os.replace(tmp_path, self.ref_path(name))
+
+    def add_blob(self, tmp_path):
+        """Move a downloaded file into the store under its checksum"""
+        digest = sha256_file(tmp_path)
+        os.replace(tmp_path, self.blob_path(digest))
+        return digest
+
+    def add_tree(self, tmp_dir, digest):
+        """Move a fully extracted or checked-out directory into the store"""
+        target = self.tree_path(digest)
+        if os.path.exists(target):
+            shutil.rmtree(tmp_dir)
+        else:
+            os.replace(tmp_dir, target)
+        return target
+
+    def is_valid(self, ref):
+        """Check that the tree a ref points to is still present and matches its checksum"""
+        if not ref or not os.path.isdir(self.tree_path(ref["digest"])):
+            return False
+        if ref["kind"] == "url":
+            blob = self.blob_path(ref["digest"])
+            return os.path.exists(blob) and sha256_file(blob) == ref["digest"]
+        if ref["kind"] == "git":
+            return _git_head(self.tree_path(ref["digest"])) == ref["digest"]
+        return sha256_tree(self.tree_path(ref["digest"])) == ref["digest"]
+
+
+def _git_head(path):
+    result = subprocess.run(["git", "-C", path, "rev-parse", "HEAD"], capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _download(url, target):
+    """Stream a URL to a file without holding it in memory"""
+    with urllib.request.urlopen(url) as response, open(target, 'wb') as f:
+        shutil.copyfileobj(response, f, DOWNLOAD_CHUNK_SIZE)
+
+
+def fetch_url_source(name, source, cache, mirror_dir=None, offline=False):
+    """Download (or copy from the mirror) an archive, verify it and extract it into the cache"""
+    file_name = os.path.basename(source["url"])
+    tmp_file = cache.tmp_path(file_name)
+    mirror_file = os.path.join(mirror_dir, file_name) if mirror_dir else None
+
+    if mirror_file and os.path.exists(mirror_file):
+        logger.info(f"Copying {name} archive from mirror {mirror_file}")
+        shutil.copyfile(mirror_file, tmp_file)
+        origin = mirror_file
+    elif offline:
+        raise FileNotFoundError(f"{name}: offline and {file_name} is neither cached nor in the mirror directory")
+    else:
+        logger.info(f"Downloading {name} from {source['url']}")
+        _download(source["url"], tmp_file)
+        origin = source["url"]
+
+    digest = cache.add_blob(tmp_file)
+    if source.get("sha256") and digest != source["sha256"]:
+        os.remove(cache.blob_path(digest))
+        raise ValueError(f"{name}: checksum mismatch for {file_name}, expected {source['sha256']}, got {digest}")
+
+    if not os.path.isdir(cache.tree_path(digest)):
+        logger.info(f"Extracting {name} archive")
+        tmp_dir = cache.tmp_path(f"{name}.tree")
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+        with zipfile.ZipFile(cache.blob_path(digest), 'r') as zip_ref:
+            zip_ref.extractall(tmp_dir)
+        cache.add_tree(tmp_dir, digest)
+
+    return {"kind": "url", "digest": digest, "origin": origin}
+
+
+def fetch_git_source(name, source, cache, mirror_dir=None, offline=False):
+    """Shallow-clone a repository (or take it from the mirror) into the cache, addressed by commit"""
+    repo_name = os.path.basename(source["url"])[:-len(".git")]
+    mirror_repo = os.path.join(mirror_dir, repo_name) if mirror_dir else None
+    tmp_dir = cache.tmp_path(f"{name}.tree")
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+
+    if mirror_repo and os.path.isdir(mirror_repo):
+        logger.info(f"Copying {name} from mirror {mirror_repo}")
+        if os.path.isdir(os.path.join(mirror_repo, ".git")):
+            subprocess.run(["git", "clone", "--quiet", mirror_repo, tmp_dir], check=True)
+            digest, kind = _git_head(tmp_dir), "git"
+        else:
+            shutil.copytree(mirror_repo, tmp_dir)
+            digest, kind = sha256_tree(tmp_dir), "tree"
+        origin = mirror_repo
+    elif offline:
+        raise FileNotFoundError(f"{name}: offline and {repo_name} is neither cached nor in the mirror directory")
+    else:
+        logger.info(f"Cloning {name} from {source['url']}")
+        subprocess.run(["git", "clone", "--quiet", "--depth", "1", source["url"], tmp_dir], check=True)
+        digest, kind = _git_head(tmp_dir), "git"
+        origin = source["url"]
+
+    cache.add_tree(tmp_dir, digest)
+    return {"kind": kind, "digest": digest, "origin": origin}
+
+
+def fetch_dataset(name, cache, mirror_dir=None, offline=False, refresh=False):
+    """Make sure the dataset's source is in the cache, reusing a valid cached copy"""
+    ref = cache.read_ref(name)
+    if not refresh and cache.is_valid(ref):
+        logger.info(f"{name}: cached source {ref['digest'][:12]} is valid, skipping download")
+        return ref
+
+    source = SOURCES[name]
+    fetch = fetch_url_source if source["kind"] == "url" else fetch_git_source
+    ref = fetch(name, source, cache, mirror_dir=mirror_dir, offline=offline)
+    ref["fetched_at"] = datetime.now().isoformat()
+    cache.write_ref(name, ref)
+    return ref
+
+
+def _compact(name, raw):
+    drop = COMPACT_DROP_FIELDS.get(name)
+    if drop and isinstance(raw.get("actions"), list):
+        raw = {**raw, "actions": [
+            {k: v for k, v in action.items() if k not in drop} if isinstance(action, dict) else action
+            for action in raw["actions"]
+        ]}
+    return raw
+
+
+def task_source_files(name, tree):
+    files = []
+    for pattern in SOURCES[name]["tasks"]:
+        files.extend(sorted(glob.glob(os.path.join(tree, pattern))))
+    # Fall back to a hand-placed dataset file in the legacy location
+    if not files and os.path.exists(DATASET_PATHS[name]):
+        files.append(DATASET_PATHS[name])
+    return files
+
+
+def normalized_tasks_path(name):
+    return os.path.join("datasets", name, NORMALIZED_TASKS_FILE)
+
+
+def manifest_path(name):
+    return os.path.join("datasets", name, "manifest.json")
+
+
+def convert_dataset(name, ref, cache, refresh=False):
+    """Write the compact, pre-normalised task file evaluation runs read, unless it is up to date"""
+    tasks_file = normalized_tasks_path(name)
     try:
-        logger.info(f"Downloading from {download_url} to {download_path}") 
-        urllib.request.urlretrieve(download_url, download_path)
-        
-        logger.info("Extracting Mind2Web dataset...")
-        with zipfile.ZipFile(download_path, 'r') as zip_ref:
-            zip_ref.extractall("datasets/mind2web/")
-        
-        logger.info("Mind2Web dataset prepared successfully")
-    except Exception as e:
-        logger.error(f"Error downloading Mind2Web dataset: {str(e)}")
-        # Create a minimal placeholder file if download fails
-        with open("datasets/mind2web/test_data.json", 'w') as f:
-            f.write('{"tasks": [{"id": "mind2web_001", "instruction": "Book a flight from New York to London", "starting_url": "https://www.google.com"}]}') 
-        logger.info("Created placeholder Mind2Web dataset")
-
-def prepare_webarena():
-    """Download and prepare WebArena dataset"""
-    os.makedirs("datasets/webarena", exist_ok=True)
-    
-    logger.info("Cloning WebArena repository...")
-    subprocess.run([
-        "git", "clone", "https://github.com/web-arena-x/webarena.git", 
-        "datasets/webarena_repo"
-    ]) 
-    
-    logger.info("Preparing WebArena dataset...")
-    # Copy necessary files
-    subprocess.run([
-        "cp", "-r", "datasets/webarena_repo/data", "datasets/webarena/"
-    ])
-    
-    logger.info("WebArena dataset prepared successfully")
-
-def prepare_webvoyager():
-    """Download and prepare WebVoyager dataset"""
-    os.makedirs("datasets/webvoyager", exist_ok=True)
-    
-    logger.info("Cloning WebVoyager repository...")
-    subprocess.run([
-        "git", "clone", "https://github.com/MinorJerry/WebVoyager.git", 
-        "datasets/webvoyager_repo"
-    ]) 
-    
-    logger.info("Preparing WebVoyager dataset...")
-    # Copy necessary files
-    subprocess.run([
-        "cp", "-r", "datasets/webvoyager_repo/data", "datasets/webvoyager/"
-    ])
-    
-    logger.info("WebVoyager dataset prepared successfully")
-
-def prepare_webcanvas():
-    """Download and prepare WebCanvas dataset"""
-    os.makedirs("datasets/webcanvas", exist_ok=True)
-    
-    logger.info("Cloning WebCanvas repository...")
-    subprocess.run([
-        "git", "clone", "https://github.com/iMeanAI/WebCanvas.git", 
-        "datasets/webcanvas_repo"
-    ]) 
-    
-    logger.info("Preparing WebCanvas dataset...")
-    # Copy necessary files
-    subprocess.run([
-        "cp", "-r", "datasets/webcanvas_repo/data", "datasets/webcanvas/"
-    ])
-    
-    logger.info("WebCanvas dataset prepared successfully")
+        with open(manifest_path(name), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        manifest = None
+
+    if (not refresh and manifest
+            and manifest.get("source_digest") == ref["digest"]
+            and manifest.get("converter_version") == CONVERTER_VERSION
+            and os.path.exists(tasks_file)
+            and sha256_file(tasks_file) == manifest.get("sha256")):
+        logger.info(f"{name}: {manifest['count']} normalised tasks are up to date")
+        return manifest
+
+    source_files = task_source_files(name, cache.tree_path(ref["digest"]))
+    if not source_files:
+        raise FileNotFoundError(f"{name}: no task files found in the downloaded source")
+
+    os.makedirs(os.path.dirname(tasks_file), exist_ok=True)
+    tmp_file = tasks_file + ".tmp"
+    count = 0
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for source_file in source_files:
+            for raw in iter_raw_tasks(source_file):
+                task = normalize_task(name, count, _compact(name, raw))
+                f.write(json.dumps(task, separators=(",", ":")) + "\n")
+                count += 1
+    os.replace(tmp_file, tasks_file)
+
+    manifest = {
+        "source_digest": ref["digest"],
+        "source": ref["origin"],
+        "converter_version": CONVERTER_VERSION,
+        "sha256": sha256_file(tasks_file),
+        "count": count,
+        "created_at": datetime.now().isoformat(),
+    }
+    with open(manifest_path(name), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"{name}: wrote {count} normalised tasks to {tasks_file}")
+    return manifest
+
+
+def prepare_dataset(name, cache, mirror_dir=None, offline=False, refresh=False):
+    """Fetch (or reuse) a dataset's source and convert it to the normalised task file"""
+    logger.info(f"Preparing {name} dataset...")
+    ref = fetch_dataset(name, cache, mirror_dir=mirror_dir, offline=offline, refresh=refresh)
+    return convert_dataset(name, ref, cache, refresh=refresh)
+
+
+def write_placeholder_mind2web():
+    """Minimal Mind2Web dataset so a run can still start when the download fails"""
+    os.makedirs("datasets/mind2web", exist_ok=True)
+    with open(DATASET_PATHS["mind2web"], 'w') as f:
+        f.write('{"tasks": [{"id": "mind2web_001", "instruction": "Book a flight from New York to London", "starting_url": "https://www.google.com"}]}')
+    logger.info("Created placeholder Mind2Web dataset")
+
 
 def main():
     parser = argparse.ArgumentParser(description="Prepare datasets for web agent evaluation")
-    parser.add_argument("--datasets", nargs="+", 
-                        choices=["mind2web", "webarena", "webvoyager", "webcanvas", "all"],
+    parser.add_argument("--datasets", nargs="+",
+                        choices=DATASETS + ["all"],
                         default=["all"],
                         help="Datasets to prepare")
-    
+    parser.add_argument("--cache_dir", type=str, default="datasets/.cache",
+                        help="Content-addressed cache for downloaded dataset sources")
+    parser.add_argument("--mirror_dir", type=str, default=None,
+                        help="Local mirror with data.zip and repository directories, used instead of the network")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never use the network, only the cache and the mirror directory")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-fetch and re-convert even when the cache is valid")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Number of datasets to prepare concurrently")
+
     args = parser.parse_args()
-    
+
     datasets = args.datasets
     if "all" in datasets:
-        datasets = ["mind2web", "webarena", "webvoyager", "webcanvas"]
-    
-    for dataset in datasets:
-        logger.info(f"Preparing {dataset} dataset...")
-        if dataset == "mind2web":
-            prepare_mind2web()
-        elif dataset == "webarena":
-            prepare_webarena()
-        elif dataset == "webvoyager":
-            prepare_webvoyager()
-        elif dataset == "webcanvas":
-            prepare_webcanvas()
-    
-    logger.info("All datasets prepared successfully")
+        datasets = DATASETS
+
+    cache = ArtifactCache(args.cache_dir)
+    failed = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(prepare_dataset, name, cache, args.mirror_dir, args.offline, args.refresh): name
+            for name in datasets
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Error preparing {name} dataset: {str(e)}")
+                failed.append(name)
+                if name == "mind2web" and not os.path.exists(DATASET_PATHS["mind2web"]):
+                    write_placeholder_mind2web()
+
+    if failed:
+        logger.error(f"Failed to prepare: {', '.join(sorted(failed))}")
+    else:
+        logger.info("All datasets prepared successfully")
 
 if __name__ == "__main__":
     main()
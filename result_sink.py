@@ -0,0 +1,190 @@
+import argparse
+import json
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger("browser_use_eval.sink")
+
+
+def results_jsonl_path(output_dir, benchmark):
+    """Path of the append-only result stream for a benchmark"""
+    return os.path.join(output_dir, f"{benchmark}_results.jsonl")
+
+
+def shard_run_name(benchmark, shard=None):
+    """File name prefix for a benchmark run, or for one (index, count) shard of it"""
+    if shard is None:
+        return benchmark
+    index, count = shard
+    return f"{benchmark}.shard-{index}-of-{count}"
+
+
+def run_manifest_path(output_dir, run_name):
+    """Path of the manifest with the fingerprint of the run that writes a result stream"""
+    return os.path.join(output_dir, f"{run_name}_run.json")
+
+
+def settle_stats_path(output_dir, run_name):
+    """Path of the per-domain page settle history a run learns and keeps across runs"""
+    return os.path.join(output_dir, f"{run_name}_settle_stats.json")
+
+
+def load_run_fingerprint(output_dir, run_name):
+    """Fingerprint id from the run manifest, None if there is no manifest"""
+    manifest_file = run_manifest_path(output_dir, run_name)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file, 'r') as f:
+        return json.load(f).get("id")
+
+
+class JsonlResultSink:
+    """
+    Append-only result stream: one JSON record per finished task.
+
+    Every record is flushed and fsync'ed as soon as it is appended, so a crash loses
+    at most the task that was running. Pretty JSON / CSV / Parquet are derived from
+    this file with `materialize_results` instead of being rewritten during the run.
+    """
+
+    def __init__(self, path, truncate=True):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, 'w' if truncate else 'a', encoding='utf-8')
+        self.count = 0
+
+        # A run killed mid-write leaves a torn last line, start new records on a fresh line
+        if not truncate and self._file.tell() > 0:
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self._file.write("\n")
+
+    def append(self, record):
+        """Write one record and make sure it is on disk before returning"""
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_jsonl(path):
+    """Yield records from a JSONL result stream, skipping lines that cannot be parsed"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Usually the last line, torn by a process killed mid-write. Any other unreadable
+                # line is skipped as well, so one bad record does not lose the rest of the stream
+                logger.warning(f"Skipping unreadable line {line_number} in {path}")
+
+
+def iter_run_records(path, fingerprint=None):
+    """
+    Yield the records of a result stream, with a fingerprint only those written by a run
+    with that fingerprint. Every reader of a stream filters through here, so they agree.
+    """
+    skipped = 0
+    for record in read_jsonl(path):
+        if fingerprint is not None and record.get("run_fingerprint") != fingerprint:
+            skipped += 1
+            continue
+        yield record
+    if skipped:
+        logger.warning(f"Ignoring {skipped} records of {path} written by a different run configuration")
+
+
+def load_result_stream(path, fingerprint=None):
+    """
+    Load a result stream, keeping the latest record per task_id, in dataset order.
+    With a fingerprint, only records written by a run with that fingerprint are kept.
+    """
+    records = {}
+    for record in iter_run_records(path, fingerprint):
+        records[record.get("task_id", len(records))] = record
+    return sorted(records.values(), key=lambda r: r.get("task_index", 0))
+
+
+def completed_task_ids(path, fingerprint):
+    """Task ids that finished without error in a run with the given fingerprint"""
+    records = {record.get("task_id"): record for record in iter_run_records(path, fingerprint)}
+    # Failed and timed out tasks are retried on resume
+    return {task_id for task_id, record in records.items() if not record.get("error")}
+
+
+def materialize_results(output_dir, benchmark, formats=("json", "csv"), fingerprint=None):
+    """
+    Build pretty JSON / CSV / Parquet files from the benchmark's JSONL stream,
+    with a fingerprint only from the records of that run configuration
+    """
+    results = load_result_stream(results_jsonl_path(output_dir, benchmark), fingerprint)
+    written = []
+
+    if "json" in formats:
+        output_file = os.path.join(output_dir, f"{benchmark}_results.json")
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        written.append(output_file)
+
+    df = pd.DataFrame(results)
+
+    if "csv" in formats:
+        csv_file = os.path.join(output_dir, f"{benchmark}_results.csv")
+        df.to_csv(csv_file, index=False)
+        written.append(csv_file)
+
+    if "parquet" in formats:
+        parquet_file = os.path.join(output_dir, f"{benchmark}_results.parquet")
+        # Nested columns (steps, token usage, ...) have no fixed schema, store them as JSON text
+        for column in df.columns:
+            if df[column].map(lambda v: isinstance(v, (dict, list))).any():
+                df[column] = df[column].map(json.dumps)
+        try:
+            df.to_parquet(parquet_file, index=False)
+            written.append(parquet_file)
+        except ImportError as e:
+            logger.warning(f"Skipping Parquet output, no parquet engine installed: {e}")
+
+    logger.info(f"Materialized {len(results)} results to {', '.join(written)}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize JSON/CSV/Parquet files from JSONL result streams")
+    parser.add_argument("--results_dir", type=str, default="results",
+                        help="Directory containing <benchmark>_results.jsonl files")
+    parser.add_argument("--benchmarks", nargs="+",
+                        default=["mind2web", "webarena", "webvoyager", "webcanvas"],
+                        help="Benchmarks to materialize")
+    parser.add_argument("--formats", nargs="+", choices=["json", "csv", "parquet"],
+                        default=["json", "csv"],
+                        help="Output formats")
+
+    args = parser.parse_args()
+
+    for benchmark in args.benchmarks:
+        if os.path.exists(results_jsonl_path(args.results_dir, benchmark)):
+            # Only the records of the run configuration in the manifest, when there is one
+            fingerprint = load_run_fingerprint(args.results_dir, benchmark)
+            materialize_results(args.results_dir, benchmark, args.formats, fingerprint)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -3,6 +3,10 @@
 # Set variables
 MODEL="gpt-4o"
 MAX_SAMPLES=100  # Set to None for full evaluation
+CONCURRENCY=4  # Tasks run in parallel per shard, each in its own browser context
+SHARDS=2  # Shard processes per benchmark, each with its own browser
+WORKERS=2  # Shard processes running at the same time
+RESUME=""  # Set to "--resume" to skip tasks completed by a previous run with the same config
 
 # Create directories
 mkdir -p results
@@ -12,12 +16,10 @@ mkdir -p analysis
 echo "Preparing datasets..."
 python prepare_datasets.py --datasets all
 
-# Run evaluations for each benchmark
-for benchmark in mind2web webarena webvoyager webcanvas
-do
-    echo "Running evaluation on $benchmark..."
-    python run_evaluations.py --benchmark $benchmark --output_dir results --model $MODEL --max_samples $MAX_SAMPLES
-done
+# Run evaluations for each benchmark, sharded across processes, and merge the shard results
+# (use `coordinator.py enqueue` + `coordinator.py worker` on each node to spread shards across machines)
+echo "Running evaluations..."
+python coordinator.py local --benchmarks mind2web webarena webvoyager webcanvas --shards $SHARDS --workers $WORKERS --output_dir results --model $MODEL --max_samples $MAX_SAMPLES --concurrency $CONCURRENCY $RESUME
 
 # Analyze results
 echo "Analyzing results..."
@@ -1,10 +1,11 @@
 import os
 import json
 import time
-import pandas as pd
+import asyncio
+import hashlib
 import argparse
+import shutil
 from datetime import datetime
-from tqdm import tqdm
 import logging
 import sys
 from dotenv import load_dotenv
@@ -29,16 +30,53 @@ if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
 # Import the real Browser Use agent and browser
-from browser_use.agent import BrowserUseAgent
-from browser_use.browser import Browser
-from browser_use.controller import Controller
+from langchain_openai import ChatOpenAI
+from browser_use.agent.service import Agent
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.context import BrowserContextConfig
+from browser_use.browser.pool import BrowserPool, BrowserPoolConfig
+from browser_use.browser.screenshot import SCREENSHOT_PRESETS, ScreenshotConfig
+from browser_use.browser.settle import SettlePolicy
+from browser_use.memory import MemoryPressureHook
+from task_scheduler import TaskScheduler
+from dataset_loaders import TaskStream
+from result_sink import (
+    JsonlResultSink,
+    completed_task_ids,
+    load_result_stream,
+    materialize_results,
+    results_jsonl_path,
+    run_manifest_path,
+    settle_stats_path,
+    shard_run_name,
+)
 
 class EvaluationRunner:
-    def __init__(self, benchmark, output_dir, model="gpt-4o", max_samples=None):
+    def __init__(self, benchmark, output_dir, model="gpt-4o", max_samples=None,
+                 max_steps=50, concurrency=1, task_timeout=None, output_formats=("json", "csv"),
+                 resume=False, shard=None, task_ids=None, websites=None, sample_fraction=None, seed=0,
+                 browser_pool_size=1, browser_max_tasks=50, browser_max_rss_mb=None,
+                 adaptive_settle=True, settle_stats_file=None, screenshot_preset="lossless",
+                 columnar_dom=False, gc_threshold_mb=None, use_vision=True):
         self.benchmark = benchmark
         self.output_dir = output_dir
         self.model = model
         self.max_samples = max_samples
+        self.max_steps = max_steps
+        self.concurrency = concurrency
+        self.task_timeout = task_timeout
+        self.output_formats = output_formats
+        self.resume = resume
+        # (index, count) when this process only runs one shard of the dataset
+        self.shard = shard
+        self.run_name = shard_run_name(benchmark, shard)
+        self.task_ids = task_ids
+        self.websites = websites
+        self.sample_fraction = sample_fraction
+        self.seed = seed
+        self.screenshot_preset = screenshot_preset
+        # Without vision no screenshots are taken for the model
+        self.use_vision = use_vision
     
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
@@ -49,106 +87,137 @@ class EvaluationRunner:
         # Load dataset
         self.load_dataset()
     
-        # Initialize Browser Use components
-        self.browser = Browser()
-        self.agent = BrowserUseAgent(
-        model=model,
-        browser=self.browser
-    )
+        # Initialize Browser Use components: a pool of warm browsers, one context per task
+        self.browser_pool = BrowserPool(
+            config=BrowserConfig(headless=True),
+            pool_config=BrowserPoolConfig(
+                size=browser_pool_size,
+                max_tasks_per_browser=browser_max_tasks,
+                max_rss_mb=browser_max_rss_mb,
+            ),
+        )
+        # Page-load waits learned per domain, shared by all task contexts and kept across runs
+        self.adaptive_settle = adaptive_settle
+        self.settle_policy = None
+        if adaptive_settle:
+            self.settle_policy = SettlePolicy(settle_stats_file or self.default_settle_stats_file())
+        # Full garbage collections only when the process grows past the threshold, shared by all agents
+        self.memory_pressure_hook = MemoryPressureHook(gc_threshold_mb) if gc_threshold_mb else None
+        self.llm = ChatOpenAI(model=model, temperature=0.0)
+        self.scheduler = TaskScheduler(
+            pool=self.browser_pool,
+            concurrency=concurrency,
+            task_timeout=task_timeout,
+            context_config=BrowserContextConfig(
+                settle_policy=self.settle_policy,
+                screenshot=ScreenshotConfig.preset(self.screenshot_preset),
+                columnar_dom_snapshot=columnar_dom,
+            ),
+        )
         
     def load_dataset(self):
-        """Load the appropriate benchmark dataset"""
-        if self.benchmark == "mind2web":
-            self.dataset = self.load_mind2web()
-        elif self.benchmark == "webarena":
-            self.dataset = self.load_webarena()
-        elif self.benchmark == "webvoyager":
-            self.dataset = self.load_webvoyager()
-        elif self.benchmark == "webcanvas":
-            self.dataset = self.load_webcanvas()
-        else:
-            raise ValueError(f"Unknown benchmark: {self.benchmark}")
-            
-        logger.info(f"Loaded {len(self.dataset)} tasks from {self.benchmark}")
-        
-        # Limit samples if specified
-        if self.max_samples and self.max_samples < len(self.dataset):
-            self.dataset = self.dataset[:self.max_samples]
-            logger.info(f"Limited to {self.max_samples} tasks")
-    
-    def load_mind2web(self):
-        # Implementation for loading Mind2Web dataset
-        data_path = "datasets/mind2web/test_data.json"
-        try:
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            return data.get("tasks", [])
-        except Exception as e:
-            logger.error(f"Error loading Mind2Web dataset: {str(e)}")
-            return []
-    
-    def load_webarena(self):
-        # Implementation for loading WebArena dataset
-        data_path = "datasets/webarena/tasks.json"
-        try:
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            return data.get("tasks", [])
-        except Exception as e:
-            logger.error(f"Error loading WebArena dataset: {str(e)}")
-            return []
-    
-    def load_webvoyager(self):
-        # Implementation for loading WebVoyager dataset
-        data_path = "datasets/webvoyager/tasks.json"
-        try:
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            return data.get("tasks", [])
-        except Exception as e:
-            logger.error(f"Error loading WebVoyager dataset: {str(e)}")
-            return []
-    
-    def load_webcanvas(self):
-        # Implementation for loading WebCanvas dataset
-        data_path = "datasets/webcanvas/tasks.json"
-        try:
-            with open(data_path, 'r') as f:
-                data = json.load(f)
-            return data.get("tasks", [])
-        except Exception as e:
-            logger.error(f"Error loading WebCanvas dataset: {str(e)}")
-            return []
+        """Set up a lazy stream over the benchmark dataset, filtered while it is read"""
+        self.dataset = TaskStream(
+            self.benchmark,
+            max_samples=self.max_samples,
+            task_ids=self.task_ids,
+            websites=self.websites,
+            sample_fraction=self.sample_fraction,
+            seed=self.seed,
+        )
+        logger.info(f"Streaming {self.benchmark} tasks from {self.dataset.path}")
+
+    def iter_tasks(self, completed=()):
+        """Scheduler items for the tasks of this shard that still have to run"""
+        for task in self.dataset:
+            # By dataset index, so a task stays in its shard whatever the filters
+            if self.shard and task["index"] % self.shard[1] != self.shard[0]:
+                continue
+            if task["task_id"] in completed:
+                continue
+            yield task["index"], task["task_id"], task["instruction"], task
     
     def run_evaluation(self):
         """Run evaluation on all tasks in the dataset"""
-        for i, task in enumerate(tqdm(self.dataset)):
-            task_id = task.get('id', f"{self.benchmark}_{i}")
-            instruction = task.get('instruction', task.get('task_description', ''))
-            
-            logger.info(f"Running task {task_id}: {instruction[:50]}...")
-            
-            result = self.run_single_task(task_id, instruction, task)
-            self.results.append(result)
-            
-            # Save intermediate results
-            if i % 10 == 0:
-                self.save_results()
-        
-        # Save final results
-        self.save_results()
+        return asyncio.run(self.run_evaluation_async())
+
+    async def run_evaluation_async(self):
+        """Run all tasks through the concurrent scheduler"""
+        fingerprint = self.run_fingerprint()
+        stream_file = results_jsonl_path(self.output_dir, self.run_name)
+        completed = set()
+        if self.resume:
+            self.check_resumable(fingerprint)
+            if os.path.exists(stream_file):
+                completed = completed_task_ids(stream_file, fingerprint["id"])
+            logger.info(f"Resuming run {fingerprint['id'][:12]}: {len(completed)} tasks already completed")
+        self.save_run_manifest(fingerprint)
+
+        sink = JsonlResultSink(stream_file, truncate=not self.resume)
+
+        def on_complete(outcome):
+            # Stream every finished task to disk right away
+            sink.append({**self.result_from_outcome(outcome), "run_fingerprint": fingerprint["id"]})
+
+        try:
+            # Tasks are pulled from the dataset stream as workers free up, never all at once
+            await self.scheduler.run(
+                self.iter_tasks(completed), self.run_task, on_complete=on_complete, collect_outcomes=False
+            )
+        finally:
+            sink.close()
+            await self.browser_pool.close()
+            if self.settle_policy:
+                self.settle_policy.save()
+
+        # Materialize the other result formats once, in dataset order (includes resumed results)
+        self.results = load_result_stream(stream_file, fingerprint["id"])
+        self.save_results(fingerprint)
+        self.save_throughput()
         return self.results
+
+    async def run_task(self, task, browser_context):
+        """Scheduler entry point for one (task_index, task_id, instruction, task_data) tuple"""
+        _, task_id, instruction, task_data = task
+        logger.info(f"Running task {task_id}: {instruction[:50]}...")
+        return await self.run_single_task(task_id, instruction, task_data, browser_context)
+
+    def result_from_outcome(self, outcome):
+        """Return the task result, or a failed result if the task raised or timed out"""
+        task_index, task_id, instruction, task_data = outcome.item
+        if outcome.error is None:
+            return {"task_index": task_index, **outcome.result}
+
+        return {
+            "task_index": task_index,
+            "task_id": task_id,
+            "benchmark": self.benchmark,
+            "instruction": instruction,
+            "website": task_data["website"],
+            "domain": task_data["domain"],
+            "model": self.model,
+            "timestamp": datetime.now().isoformat(),
+            "steps": [],
+            "token_usage": {"prompt": 0, "completion": 0, "cached": 0, "total": 0},
+            "final_result": "",
+            "success": False,
+            "error": f"Timed out after {self.task_timeout}s" if outcome.timed_out else str(outcome.error),
+            "time_taken": outcome.latency,
+        }
     
-    def run_single_task(self, task_id, instruction, task_data):
+    async def run_single_task(self, task_id, instruction, task_data, browser_context):
         """Run a single task and collect metrics"""
         # Initialize result dictionary
         result = {
             "task_id": task_id,
             "benchmark": self.benchmark,
             "instruction": instruction,
+            "website": task_data["website"],
+            "domain": task_data["domain"],
+            "model": self.model,
             "timestamp": datetime.now().isoformat(),
             "steps": [],
-            "token_usage": {"prompt": 0, "completion": 0, "total": 0},
+            "token_usage": {"prompt": 0, "completion": 0, "cached": 0, "total": 0},
             "final_result": "",
             "success": False
         }
@@ -157,21 +226,32 @@ class EvaluationRunner:
         start_time = time.time()
         
         try:
-            # Reset browser for new task
-            self.browser.reset()
-            
-            # Get starting URL from task data
-            start_url = self.get_start_url(task_data)
-            self.browser.navigate(start_url)
+            # Open the task's starting URL before the first step
+            start_url = task_data["start_url"]
+            agent = Agent(
+                task=instruction,
+                llm=self.llm,
+                browser=browser_context.browser,
+                browser_context=browser_context,
+                initial_actions=[{"go_to_url": {"url": start_url}}],
+                memory_pressure_hook=self.memory_pressure_hook,
+                use_vision=self.use_vision,
+            )
             
             # Run the agent with the real Browser Use implementation
-            agent_response = self.agent.run(instruction)
+            history = await agent.run(max_steps=self.max_steps)
             
             # Record results
-            result["final_result"] = agent_response
-            
-            # Get browser history for steps
-            result["steps"] = self.browser.get_history() if hasattr(self.browser, "get_history") else []
+            result["final_result"] = history.final_result() or ""
+            result["steps"] = self.summarize_steps(history)
+            result["token_usage"] = self.summarize_token_usage(history)
+            # get_state calls that reused the previous state because the page had not changed
+            result["state_cache"] = {
+                "hits": browser_context.state_cache_hits,
+                "misses": browser_context.state_cache_misses,
+            }
+            # State capture stages skipped per stage, e.g. the screenshots of --no_vision runs
+            result["state_stages_skipped"] = dict(browser_context.state_stages_skipped)
             
             # Determine success based on agent response
             result["success"] = self.evaluate_success(task_data, result["final_result"], result["steps"])
@@ -185,19 +265,40 @@ class EvaluationRunner:
         result["time_taken"] = end_time - start_time
         
         return result
+
+    def summarize_steps(self, history):
+        """JSON-serialisable per-step summary of an agent history"""
+        steps = []
+        for item in history.history:
+            actions = [a.model_dump(exclude_none=True) for a in item.model_output.action] if item.model_output else []
+            steps.append({
+                "step": item.metadata.step_number if item.metadata else len(steps) + 1,
+                "url": item.state.url,
+                "actions": actions,
+                "errors": [r.error for r in item.result if r.error],
+                "duration": item.metadata.duration_seconds if item.metadata else 0,
+                "timings": item.metadata.timings if item.metadata else {},
+                "metrics": item.metadata.metrics if item.metadata else {},
+                "token_usage": {
+                    "prompt": item.metadata.prompt_tokens,
+                    "completion": item.metadata.completion_tokens,
+                    "cached": item.metadata.cached_tokens,
+                    "llm_calls": item.metadata.llm_calls,
+                } if item.metadata else {},
+            })
+        return steps
     
-    def get_start_url(self, task_data):
-        """Extract starting URL from task data based on benchmark format"""
-        if self.benchmark == "mind2web":
-            return task_data.get("starting_url", "https://www.google.com") 
-        elif self.benchmark == "webarena":
-            return task_data.get("url", "https://www.google.com") 
-        elif self.benchmark == "webvoyager":
-            return task_data.get("website_url", "https://www.google.com") 
-        elif self.benchmark == "webcanvas":
-            return task_data.get("url", "https://www.google.com") 
-        return "https://www.google.com"
-    
+    def summarize_token_usage(self, history):
+        """Token counts reported by the LLM provider over the whole task"""
+        prompt = history.total_prompt_tokens()
+        completion = history.total_completion_tokens()
+        return {
+            "prompt": prompt,
+            "completion": completion,
+            "cached": history.total_cached_tokens(),
+            "total": prompt + completion,
+        }
+
     def evaluate_success(self, task_data, agent_response, steps):
         """Evaluate if the task was successful"""
         # This is a placeholder - actual success criteria depends on benchmark
@@ -205,18 +306,96 @@ class EvaluationRunner:
         import random
         return random.random() > 0.3  # 70% success rate
     
-    def save_results(self):
-        """Save current results to disk"""
-        output_file = os.path.join(self.output_dir, f"{self.benchmark}_results.json")
+    def run_fingerprint(self):
+        """Identify the run configuration, so results of a different config are never reused"""
+        config = {
+            "benchmark": self.benchmark,
+            "model": self.model,
+            "max_steps": self.max_steps,
+            # Changes the screenshots the model sees
+            "screenshot_preset": self.screenshot_preset,
+            "use_vision": self.use_vision,
+            # Changes how long pages get to load before the model sees them
+            "adaptive_settle": self.adaptive_settle,
+            "dataset_sha256": self.dataset_version(),
+        }
+        fingerprint_id = hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+        return {"id": fingerprint_id, "config": config}
+
+    def dataset_version(self):
+        """Content hash of the benchmark dataset file"""
+        data_path = self.dataset.path
+        if not os.path.exists(data_path):
+            return None
+        digest = hashlib.sha256()
+        with open(data_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def default_settle_stats_file(self):
+        """Settle history of this shard; a new shard starts from the history merged by coordinator.py"""
+        stats_file = settle_stats_path(self.output_dir, self.run_name)
+        merged_file = settle_stats_path(self.output_dir, self.benchmark)
+        if not os.path.exists(stats_file) and os.path.exists(merged_file):
+            shutil.copyfile(merged_file, stats_file)
+        return stats_file
+
+    def run_manifest_path(self):
+        return run_manifest_path(self.output_dir, self.run_name)
+
+    def check_resumable(self, fingerprint):
+        """Refuse to resume on top of results produced by a different run configuration"""
+        manifest_file = self.run_manifest_path()
+        if not os.path.exists(manifest_file):
+            return
+        with open(manifest_file, 'r') as f:
+            previous = json.load(f)
+        if previous.get("id") != fingerprint["id"]:
+            changed = {
+                key: (previous.get("config", {}).get(key), value)
+                for key, value in fingerprint["config"].items()
+                if previous.get("config", {}).get(key) != value
+            }
+            raise ValueError(
+                f"Cannot resume {self.run_name}: run config changed since the existing results were written "
+                f"(old -> new: {changed}). Use a different --output_dir or run without --resume."
+            )
+
+    def save_run_manifest(self, fingerprint):
+        with open(self.run_manifest_path(), 'w') as f:
+            json.dump(fingerprint, f, indent=2)
+
+    def save_results(self, fingerprint):
+        """Materialize JSON/CSV (and optionally Parquet) results of this run from the JSONL stream"""
+        if self.shard:
+            # Shard streams are merged into the canonical result set by coordinator.py
+            return
+        materialize_results(self.output_dir, self.benchmark, self.output_formats, fingerprint["id"])
+
+    def save_throughput(self):
+        """Save the scheduler throughput summary next to the results"""
+        output_file = os.path.join(self.output_dir, f"{self.run_name}_throughput.json")
+        stats = self.scheduler.stats.to_dict()
+        if self.settle_policy:
+            stats["settle"] = self.settle_policy.stats()
         with open(output_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
-        
-        # Also save as CSV for easier analysis
-        df = pd.DataFrame(self.results)
-        csv_file = os.path.join(self.output_dir, f"{self.benchmark}_results.csv")
-        df.to_csv(csv_file, index=False)
-        
-        logger.info(f"Saved results to {output_file} and {csv_file}")
+            json.dump(stats, f, indent=2)
+
+        logger.info(f"Throughput: {self.scheduler.stats.summary()}")
+        if self.settle_policy:
+            logger.info(f"Adaptive page settle saved {self.settle_policy.seconds_saved:.1f}s "
+                        f"({self.settle_policy.adapted_waits} of {self.settle_policy.waits} waits adapted)")
+
+def parse_shard(value):
+    """Parse `--shard i/N` into (i, N), with 0 <= i < N"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like i/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, N), got {value!r}")
+    return index, count
 
 def main():
     parser = argparse.ArgumentParser(description="Run Browser Use evaluations on web agent benchmarks")
@@ -229,6 +408,48 @@ def main():
                         help="Model to use for Browser Use agent")
     parser.add_argument("--max_samples", type=int, default=None,
                         help="Maximum number of samples to evaluate")
+    parser.add_argument("--max_steps", type=int, default=50,
+                        help="Maximum number of agent steps per task")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of tasks to run in parallel, each in its own browser context")
+    parser.add_argument("--task_timeout", type=float, default=600,
+                        help="Per-task timeout in seconds (0 disables the timeout)")
+    parser.add_argument("--output_formats", nargs="+", choices=["json", "csv", "parquet"],
+                        default=["json", "csv"],
+                        help="Result files to materialize from the JSONL stream at the end of the run")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip tasks already completed in the existing results of the same run config")
+    parser.add_argument("--task_ids", nargs="+", default=None,
+                        help="Only evaluate these task ids")
+    parser.add_argument("--websites", nargs="+", default=None,
+                        help="Only evaluate tasks on these websites or domains")
+    parser.add_argument("--sample_fraction", type=float, default=None,
+                        help="Evaluate a seeded random subset of this fraction of the tasks")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for --sample_fraction")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="Only run shard i of N (0-based, e.g. 0/4): tasks whose dataset index is i mod N")
+    parser.add_argument("--browser_pool_size", type=int, default=1,
+                        help="Number of warm browsers the task contexts are spread over")
+    parser.add_argument("--browser_max_tasks", type=int, default=50,
+                        help="Relaunch a browser after it ran this many tasks")
+    parser.add_argument("--browser_max_rss_mb", type=float, default=0,
+                        help="Relaunch a browser once it uses more memory than this, in MB (0 disables the check)")
+    parser.add_argument("--fixed_settle", action="store_true",
+                        help="Always use the fixed page load waits instead of learning them per domain")
+    parser.add_argument("--settle_stats", type=str, default=None,
+                        help="File with the per-domain page settle history "
+                             "(default: <output_dir>/<benchmark or shard>_settle_stats.json)")
+    parser.add_argument("--screenshot_preset", type=str, default="lossless", choices=list(SCREENSHOT_PRESETS),
+                        help="Screenshot encoding: full size PNG (lossless), JPEG (balanced) "
+                             "or downscaled grayscale WebP (compact)")
+    parser.add_argument("--columnar_dom", action="store_true",
+                        help="Transfer DOM snapshots in the compact columnar format (see benchmarks/dom_wire_format.py)")
+    parser.add_argument("--gc_threshold_mb", type=float, default=0,
+                        help="Run a full garbage collection after a step once this process uses more memory "
+                             "than this, in MB (0 never forces one)")
+    parser.add_argument("--no_vision", action="store_true",
+                        help="Do not send screenshots to the model, which also skips taking them")
     
     args = parser.parse_args()
     
@@ -236,7 +457,26 @@ def main():
         benchmark=args.benchmark,
         output_dir=args.output_dir,
         model=args.model,
-        max_samples=args.max_samples
+        max_samples=args.max_samples,
+        max_steps=args.max_steps,
+        concurrency=args.concurrency,
+        task_timeout=args.task_timeout or None,
+        output_formats=args.output_formats,
+        resume=args.resume,
+        shard=args.shard,
+        task_ids=args.task_ids,
+        websites=args.websites,
+        sample_fraction=args.sample_fraction,
+        seed=args.seed,
+        browser_pool_size=args.browser_pool_size,
+        browser_max_tasks=args.browser_max_tasks,
+        browser_max_rss_mb=args.browser_max_rss_mb or None,
+        adaptive_settle=not args.fixed_settle,
+        settle_stats_file=args.settle_stats,
+        screenshot_preset=args.screenshot_preset,
+        columnar_dom=args.columnar_dom,
+        gc_threshold_mb=args.gc_threshold_mb or None,
+        use_vision=not args.no_vision,
     )
     
     runner.run_evaluation()
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+from tqdm import tqdm
+
+from browser_use.browser.browser import Browser
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.pool import BrowserPool, BrowserPoolStats
+
+logger = logging.getLogger("browser_use_eval.scheduler")
+
+T = TypeVar("T")
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in [0, 100]) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+@dataclass
+class TaskOutcome(Generic[T]):
+    """Outcome of one scheduled task, in dataset order"""
+
+    index: int
+    item: T
+    result: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    latency: float = 0.0
+
+
+@dataclass
+class SchedulerStats:
+    """Throughput and latency numbers for one scheduler run"""
+
+    concurrency: int
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    latencies: list = field(default_factory=list)
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    pool: Optional[BrowserPoolStats] = None
+
+    @property
+    def wall_time(self):
+        return max(self.finished_at - self.started_at, 0.0)
+
+    @property
+    def tasks_per_minute(self):
+        return self.completed / self.wall_time * 60 if self.wall_time > 0 else 0.0
+
+    def summary(self):
+        summary = (
+            f"{self.completed} tasks in {self.wall_time:.1f}s with concurrency {self.concurrency} "
+            f"({self.tasks_per_minute:.2f} tasks/min) - "
+            f"latency p50 {percentile(self.latencies, 50):.1f}s, p95 {percentile(self.latencies, 95):.1f}s - "
+            f"{self.failed} failed, {self.timed_out} timed out"
+        )
+        if self.pool is not None:
+            summary += f" - {self.pool.summary()}"
+        return summary
+
+    def to_dict(self):
+        stats = {
+            "concurrency": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "wall_time": self.wall_time,
+            "tasks_per_minute": self.tasks_per_minute,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p95": percentile(self.latencies, 95),
+        }
+        if self.pool is not None:
+            stats["browser_pool"] = self.pool.to_dict()
+        return stats
+
+
+class TaskScheduler:
+    """
+    Runs evaluation tasks concurrently on one shared Browser, or on a BrowserPool of warm browsers.
+
+    Every task gets its own fresh BrowserContext (isolated cookies, storage and tabs),
+    and at most `concurrency` contexts are alive at any time. Outcomes are returned in
+    the order the tasks were submitted, regardless of completion order.
+    """
+
+    def __init__(
+        self,
+        browser: Optional[Browser] = None,
+        concurrency: int = 1,
+        task_timeout: Optional[float] = None,
+        context_config: Optional[BrowserContextConfig] = None,
+        pool: Optional[BrowserPool] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        if (browser is None) == (pool is None):
+            raise ValueError("Pass either a browser or a browser pool")
+
+        self.browser = browser
+        self.pool = pool
+        self.concurrency = concurrency
+        self.task_timeout = task_timeout
+        self.context_config = context_config or BrowserContextConfig()
+        self.stats = SchedulerStats(concurrency=concurrency, pool=pool.stats if pool else None)
+
+    async def run(
+        self,
+        tasks: Iterable[T],
+        run_task: Callable[[T, BrowserContext], Awaitable[Any]],
+        on_complete: Optional[Callable[[TaskOutcome[T]], None]] = None,
+        total: Optional[int] = None,
+        collect_outcomes: bool = True,
+    ) -> list[TaskOutcome[T]]:
+        """
+        Run `run_task(item, context)` for every item and return the outcomes in submission order.
+
+        `tasks` may be a lazy iterator, items are only pulled when a worker is free. With
+        `collect_outcomes=False` outcomes are only passed to `on_complete` and not kept, so
+        memory stays flat however many tasks are run.
+        """
+        # Launch the browser(s) once up front, otherwise every worker would race to start its own
+        if self.pool is not None:
+            await self.pool.start()
+        else:
+            await self.browser.get_playwright_browser()
+
+        queue = enumerate(tasks)
+        outcomes: dict[int, TaskOutcome[T]] = {}
+        progress = tqdm(total=total if total is not None else _len_or_none(tasks))
+
+        async def worker():
+            # The queue is a plain iterator: workers only advance it between awaits, so no lock is needed
+            for index, item in queue:
+                outcome = await self._run_one(index, item, run_task)
+                if collect_outcomes:
+                    outcomes[index] = outcome
+                progress.update(1)
+                if on_complete:
+                    on_complete(outcome)
+
+        self.stats.started_at = time.time()
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            self.stats.finished_at = time.time()
+            progress.close()
+
+        logger.info(self.stats.summary())
+        return [outcomes[index] for index in sorted(outcomes)]
+
+    async def _run_one(self, index, item, run_task):
+        outcome = TaskOutcome(index=index, item=item)
+        start_time = time.time()
+        try:
+            async with self._context() as context:
+                outcome.result = await asyncio.wait_for(run_task(item, context), timeout=self.task_timeout)
+        except asyncio.TimeoutError as e:
+            logger.warning(f"Task #{index} timed out after {self.task_timeout}s")
+            outcome.error = e
+            outcome.timed_out = True
+        except Exception as e:
+            logger.error(f"Task #{index} failed: {str(e)}")
+            outcome.error = e
+
+        outcome.latency = time.time() - start_time
+        self.stats.latencies.append(outcome.latency)
+        self.stats.completed += 1
+        if outcome.timed_out:
+            self.stats.timed_out += 1
+        elif outcome.error is not None:
+            self.stats.failed += 1
+        return outcome
+
+    @asynccontextmanager
+    async def _context(self):
+        """A fresh context for one task, from the pool when there is one"""
+        if self.pool is not None:
+            async with self.pool.context(self.context_config) as context:
+                yield context
+            return
+
+        context = await self.browser.new_context(self.context_config)
+        try:
+            yield context
+        finally:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser context: {e}")
+
+
+def _len_or_none(items):
+    try:
+        return len(items)
+    except TypeError:
+        return None
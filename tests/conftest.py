@@ -5,6 +5,7 @@ Test configuration for browser-use.
 import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 
 import pytest
 from langchain_openai import ChatOpenAI
@@ -57,3 +58,50 @@ async def browser_context(browser):
 	context = BrowserContext(browser=browser)
 	yield context
 	await context.close()
+
+
+@pytest.fixture
+def run_evaluations(monkeypatch, tmp_path):
+	"""
+	The run_evaluations.py script as a module. It needs an API key at import time and
+	resolves dataset paths against the working directory, which is moved to tmp_path.
+	"""
+	monkeypatch.setenv('OPENAI_API_KEY', os.getenv('OPENAI_API_KEY') or 'test')
+	monkeypatch.chdir(tmp_path)
+	import run_evaluations
+
+	return run_evaluations
+
+
+class FakeBrowserPool:
+	"""Stands in for BrowserPool: hands out placeholder contexts and counts how many are open"""
+
+	def __init__(self):
+		from browser_use.browser.pool import BrowserPoolStats
+
+		self.stats = BrowserPoolStats()
+		self.open_contexts = 0
+		self.max_open_contexts = 0
+		self.served = 0
+		self.closed = False
+
+	async def start(self):
+		pass
+
+	@asynccontextmanager
+	async def context(self, config=None):
+		self.open_contexts += 1
+		self.max_open_contexts = max(self.max_open_contexts, self.open_contexts)
+		try:
+			yield object()
+		finally:
+			self.open_contexts -= 1
+			self.served += 1
+
+	async def close(self):
+		self.closed = True
+
+
+@pytest.fixture
+def fake_browser_pool():
+	return FakeBrowserPool()
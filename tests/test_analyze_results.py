@@ -0,0 +1,129 @@
+import pytest
+
+import analyze_results
+from analyze_results import analyze, bootstrap_ci, generate_report, load_results, summarize
+from result_sink import JsonlResultSink, results_jsonl_path
+
+# run with:
+# python -m pytest tests/test_analyze_results.py
+
+
+def record(index, domain, model, success, time_taken, prompt, completion, steps=1, error=None):
+	return {
+		'task_index': index,
+		'task_id': f'task-{index}',
+		'domain': domain,
+		'model': model,
+		'success': success,
+		'error': error,
+		'time_taken': time_taken,
+		'token_usage': {'prompt': prompt, 'completion': completion, 'cached': 0, 'total': prompt + completion},
+		'steps': [{'duration': time_taken / steps, 'timings': {'llm': 1.0}, 'metrics': {}} for _ in range(steps)],
+	}
+
+
+RECORDS = {
+	'mind2web': [
+		record(0, 'a.com', 'gpt-4o', True, 10.0, 1000, 100, steps=2),
+		record(1, 'a.com', 'gpt-4o', False, 20.0, 2000, 200, steps=4, error='Timed out after 600s'),
+		record(2, 'b.com', 'gpt-4o-mini', True, 30.0, 3000, 300, steps=3),
+		record(3, 'b.com', 'unpriced', True, 40.0, 4000, 400, steps=1),
+	],
+	'webvoyager': [
+		record(0, 'c.org', 'gpt-4o', False, 5.0, 500, 50),
+		record(1, 'c.org', 'gpt-4o', True, 15.0, 1500, 150),
+	],
+}
+
+
+@pytest.fixture
+def df(tmp_path):
+	for benchmark, records in RECORDS.items():
+		with JsonlResultSink(results_jsonl_path(str(tmp_path), benchmark)) as sink:
+			for item in records:
+				sink.append(item)
+	return load_results(str(tmp_path))
+
+
+def test_task_table(df):
+	assert list(df['benchmark'].cat.categories) == ['mind2web', 'webvoyager']
+	assert list(df['n_steps']) == [2, 4, 3, 1, 1, 1]
+	assert list(df['failed']) == [False, True, False, False, False, False]
+	# gpt-4o: $2.50 / $10.00 per 1M prompt / completion tokens, no price for unknown models
+	assert df['cost_usd'].iloc[0] == pytest.approx((1000 * 2.50 + 100 * 10.00) / 1e6)
+	assert df['cost_usd'].iloc[2] == pytest.approx((3000 * 0.15 + 300 * 0.60) / 1e6)
+	assert df['cost_usd'].isna().iloc[3]
+
+
+def test_summary_per_benchmark(df):
+	summary = summarize(df)
+
+	mind2web = summary.loc['mind2web']
+	assert mind2web['tasks'] == 4
+	assert mind2web['success_rate'] == pytest.approx(75.0)
+	assert mind2web['failed'] == 1
+	assert mind2web['time_taken_mean'] == pytest.approx(25.0)
+	assert mind2web['time_taken_min'] == 10.0
+	assert mind2web['time_taken_max'] == 40.0
+	# Linear interpolation over 10, 20, 30, 40
+	assert mind2web['time_taken_p50'] == pytest.approx(25.0)
+	assert mind2web['time_taken_p90'] == pytest.approx(37.0)
+	assert mind2web['n_steps_mean'] == pytest.approx(2.5)
+	assert mind2web['total_tokens_sum'] == 11000
+	# 1000 completion tokens over 10 steps of 1s waiting on the LLM
+	assert mind2web['output_tokens_per_sec'] == pytest.approx(100.0)
+	assert mind2web['tokens_per_sec'] == pytest.approx(11000 / 100)
+
+	webvoyager = summary.loc['webvoyager']
+	assert webvoyager['tasks'] == 2
+	assert webvoyager['success_rate'] == pytest.approx(50.0)
+	assert webvoyager['total_tokens_p50'] == pytest.approx(1100.0)
+
+
+def test_summary_per_domain_and_model(df):
+	per_domain = summarize(df, by=['benchmark', 'domain'])
+	assert list(per_domain.index) == [('mind2web', 'a.com'), ('mind2web', 'b.com'), ('webvoyager', 'c.org')]
+	assert per_domain.loc[('mind2web', 'a.com'), 'success_rate'] == pytest.approx(50.0)
+	assert per_domain.loc[('mind2web', 'b.com'), 'time_taken_mean'] == pytest.approx(35.0)
+	assert per_domain.loc[('webvoyager', 'c.org'), 'tasks'] == 2
+
+	per_model = summarize(df, by='model')
+	assert per_model.loc['gpt-4o', 'tasks'] == 4
+	assert per_model.loc['gpt-4o', 'success_rate'] == pytest.approx(50.0)
+	assert per_model.loc['gpt-4o', 'cost_usd_sum'] == pytest.approx((5000 * 2.50 + 500 * 10.00) / 1e6)
+	assert per_model.loc['gpt-4o-mini', 'total_tokens_sum'] == 3300
+
+
+def test_bootstrap_ci_is_seeded_and_contains_the_mean(df):
+	first = bootstrap_ci(df, 'time_taken', n_resamples=500, seed=3)
+	again = bootstrap_ci(df, 'time_taken', n_resamples=500, seed=3)
+
+	assert first.equals(again)
+	assert not first.equals(bootstrap_ci(df, 'time_taken', n_resamples=500, seed=4))
+	means = df.groupby('benchmark', observed=True)['time_taken'].mean()
+	for benchmark, mean in means.items():
+		lower, upper = first.loc[benchmark, ['lower', 'upper']]
+		assert 5.0 <= lower <= mean <= upper <= 40.0
+
+
+def test_bootstrap_batches_give_the_same_intervals(df, monkeypatch):
+	whole = bootstrap_ci(df, 'time_taken', n_resamples=300, seed=1)
+	# One resample per batch draws the same random numbers in the same order
+	monkeypatch.setattr(analyze_results, 'BOOTSTRAP_BATCH_VALUES', 1)
+	assert bootstrap_ci(df, 'time_taken', n_resamples=300, seed=1).round(9).equals(whole.round(9))
+
+
+def test_constant_column_has_a_zero_width_interval(df):
+	ci = bootstrap_ci(df.assign(constant=7.0), 'constant', n_resamples=50)
+
+	assert (ci['lower'] == 7.0).all()
+	assert (ci['upper'] == 7.0).all()
+
+
+def test_report(df, tmp_path):
+	analysis = analyze(df, n_resamples=200)
+	generate_report(analysis, str(tmp_path))
+
+	report = (tmp_path / 'evaluation_report.md').read_text()
+	assert '| mind2web | 4 | 75.00% |' in report
+	assert '| mind2web | b.com | 2 | 100.00% |' in report
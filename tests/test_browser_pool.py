@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser.browser import BrowserConfig
+from browser_use.browser.pool import BrowserPool, BrowserPoolConfig
+
+# run with:
+# python -m pytest tests/test_browser_pool.py
+
+
+class DummyCDPSession:
+	def __init__(self, browser):
+		self.browser = browser
+
+	async def send(self, method):
+		if not self.browser.healthy:
+			raise RuntimeError('Target closed')
+		return {'product': 'Chrome/dummy'}
+
+	async def detach(self):
+		pass
+
+
+class DummyBrowser:
+	def __init__(self):
+		self.healthy = True
+		self.closed = False
+
+	def is_connected(self):
+		return not self.closed
+
+	async def new_browser_cdp_session(self):
+		return DummyCDPSession(self)
+
+	async def close(self):
+		self.closed = True
+
+
+class DummyChromium:
+	def __init__(self):
+		self.launched = []
+
+	async def launch(self, headless, args, proxy=None):
+		browser = DummyBrowser()
+		self.launched.append(browser)
+		return browser
+
+
+class DummyPlaywright:
+	def __init__(self):
+		self.chromium = DummyChromium()
+		self.stopped = False
+
+	async def stop(self):
+		self.stopped = True
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+	playwright = DummyPlaywright()
+
+	class DummyAsyncPlaywrightContext:
+		async def start(self):
+			return playwright
+
+	monkeypatch.setattr('browser_use.browser.pool.async_playwright', lambda: DummyAsyncPlaywrightContext())
+	return playwright
+
+
+async def run_tasks(pool, count):
+	for _ in range(count):
+		async with pool.context() as context:
+			assert context.browser.playwright_browser is not None
+	# Let background recycles finish
+	await asyncio.sleep(0)
+	await asyncio.gather(*pool._recycle_tasks)
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_warm_browsers(playwright):
+	pool = BrowserPool(BrowserConfig(headless=True), BrowserPoolConfig(size=2))
+	await pool.start()
+	await run_tasks(pool, 10)
+
+	assert len(playwright.chromium.launched) == 2
+	assert pool.stats.hits == 10
+	assert pool.stats.misses == 0
+	assert len(pool.stats.launch_times) == 2
+
+	await pool.close()
+	assert playwright.stopped
+	assert all(browser.closed for browser in playwright.chromium.launched)
+
+
+@pytest.mark.asyncio
+async def test_pool_recycles_after_max_tasks(playwright):
+	pool = BrowserPool(BrowserConfig(headless=True), BrowserPoolConfig(size=1, max_tasks_per_browser=3))
+	await pool.start()
+	await run_tasks(pool, 7)
+
+	# Launched once up front, relaunched after the 3rd and the 6th task
+	assert len(playwright.chromium.launched) == 3
+	assert playwright.chromium.launched[0].closed
+	assert pool.stats.recycles == {'max_tasks': 2}
+	assert pool.stats.hits == 7
+
+	await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_replaces_unhealthy_browser(playwright):
+	pool = BrowserPool(BrowserConfig(headless=True), BrowserPoolConfig(size=1))
+	await pool.start()
+	playwright.chromium.launched[0].healthy = False
+
+	await run_tasks(pool, 2)
+
+	assert len(playwright.chromium.launched) == 2
+	assert pool.stats.health_check_failures == 1
+	assert pool.stats.misses == 1
+	assert pool.stats.hits == 1
+
+	await pool.close()
@@ -0,0 +1,230 @@
+import json
+import os
+import time
+
+import pytest
+
+import coordinator
+from coordinator import WorkQueue, merge_shards, run_job, shard_job
+from result_sink import (
+	JsonlResultSink,
+	read_jsonl,
+	results_jsonl_path,
+	run_manifest_path,
+	settle_stats_path,
+	shard_run_name,
+)
+
+# run with:
+# python -m pytest tests/test_coordinator.py
+
+
+def test_shard_job():
+	job = shard_job('mind2web', (1, 4), 'out', ['--model', 'gpt-4o-mini'])
+
+	assert job['name'] == 'mind2web.shard-1-of-4'
+	assert job['shard'] == [1, 4]
+	assert job['args'] == ['--benchmark', 'mind2web', '--shard', '1/4', '--output_dir', 'out', '--model', 'gpt-4o-mini']
+
+
+@pytest.fixture
+def queue(tmp_path):
+	queue = WorkQueue(str(tmp_path / 'queue'))
+	for i in range(3):
+		queue.put(shard_job('webvoyager', (i, 3), 'out'))
+	return queue
+
+
+def set_age(path, seconds):
+	past = time.time() - seconds
+	os.utime(path, (past, past))
+
+
+def test_claims_are_exclusive_and_in_order(queue):
+	claims = [queue.claim(f'worker-{i}') for i in range(4)]
+
+	assert [job['name'] for _, job in claims[:3]] == [f'webvoyager.shard-{i}-of-3' for i in range(3)]
+	assert len({path for path, _ in claims[:3]}) == 3
+	assert claims[3] is None
+	assert queue.counts() == {'pending': 0, 'claimed': 3, 'done': 0, 'failed': 0}
+
+
+def test_finished_jobs_move_to_done_or_failed(queue):
+	first, _ = queue.claim('worker-0')
+	second, _ = queue.claim('worker-1')
+	queue.finish(first, ok=True)
+	queue.finish(second, ok=False)
+
+	assert os.listdir(os.path.join(queue.root, 'done')) == ['webvoyager.shard-0-of-3.json']
+	assert os.listdir(os.path.join(queue.root, 'failed')) == ['webvoyager.shard-1-of-3.json']
+
+
+def test_claim_and_heartbeat_refresh_the_claim(queue):
+	pending = os.path.join(queue.root, 'pending', 'webvoyager.shard-0-of-3.json')
+	# Enqueued long ago: the claim must still look fresh
+	set_age(pending, 3600)
+	claimed_path, _ = queue.claim('worker-0')
+	assert time.time() - os.path.getmtime(claimed_path) < 60
+
+	set_age(claimed_path, 3600)
+	queue.heartbeat(claimed_path)
+	assert time.time() - os.path.getmtime(claimed_path) < 60
+
+
+def test_requeue_only_moves_failed_and_stale_claims(queue):
+	live, _ = queue.claim('worker-0')
+	dead, _ = queue.claim('worker-1')
+	failed, _ = queue.claim('worker-2')
+	queue.finish(failed, ok=False)
+	set_age(dead, 600)
+
+	# Without stale_after, claimed jobs may still be running
+	assert queue.requeue() == 1
+	assert queue.counts() == {'pending': 1, 'claimed': 2, 'done': 0, 'failed': 0}
+
+	assert queue.requeue(stale_after=300) == 1
+	assert os.path.exists(live)
+	assert sorted(os.listdir(os.path.join(queue.root, 'pending'))) == [
+		'webvoyager.shard-1-of-3.json',
+		'webvoyager.shard-2-of-3.json',
+	]
+
+	assert queue.requeue(all_claimed=True) == 1
+	assert queue.counts() == {'pending': 3, 'claimed': 0, 'done': 0, 'failed': 0}
+
+
+def test_run_job_sends_heartbeats(tmp_path, monkeypatch):
+	script = tmp_path / 'runner.py'
+	script.write_text('import sys, time\ntime.sleep(0.5)\nsys.exit(3)\n')
+	monkeypatch.setattr(coordinator, 'RUNNER_SCRIPT', str(script))
+	monkeypatch.setattr(coordinator, 'HEARTBEAT_INTERVAL', 0.1)
+	beats = []
+
+	returncode = run_job(shard_job('webarena', (0, 2), 'out'), str(tmp_path / 'logs'), heartbeat=lambda: beats.append(1))
+
+	assert returncode == 3
+	assert 2 <= len(beats) <= 6
+	assert os.path.exists(tmp_path / 'logs' / 'webarena.shard-0-of-2.log')
+
+
+def write_shard(output_dir, shard, fingerprint, task_indexes, stale=()):
+	"""A shard's result stream and run manifest, as run_evaluations.py writes them"""
+	run_name = shard_run_name('mind2web', shard)
+	with JsonlResultSink(results_jsonl_path(output_dir, run_name)) as sink:
+		for index in stale:
+			sink.append({'task_index': index, 'task_id': f'task-{index}', 'success': False, 'run_fingerprint': 'old'})
+		for index in task_indexes:
+			sink.append({'task_index': index, 'task_id': f'task-{index}', 'success': True, 'run_fingerprint': fingerprint})
+	if fingerprint:
+		with open(run_manifest_path(output_dir, run_name), 'w') as f:
+			json.dump({'id': fingerprint, 'config': {'model': 'gpt-4o'}}, f)
+
+
+def test_merge_keeps_the_records_of_the_shards_fingerprint(tmp_path):
+	output_dir = str(tmp_path)
+	write_shard(output_dir, (0, 2), 'abc', [0, 2, 4], stale=[6])
+	write_shard(output_dir, (1, 2), 'abc', [1, 3, 5])
+
+	written = merge_shards(output_dir, 'mind2web', formats=('json',))
+
+	merged = list(read_jsonl(results_jsonl_path(output_dir, 'mind2web')))
+	assert [r['task_index'] for r in merged] == [0, 1, 2, 3, 4, 5]
+	assert all(r['success'] for r in merged)
+	with open(run_manifest_path(output_dir, 'mind2web')) as f:
+		assert json.load(f)['id'] == 'abc'
+	with open(written[0]) as f:
+		assert json.load(f) == merged
+
+
+def test_merge_skips_shards_without_a_manifest(tmp_path):
+	output_dir = str(tmp_path)
+	write_shard(output_dir, (0, 2), 'abc', [0, 2])
+	write_shard(output_dir, (1, 2), None, [1, 3])
+
+	merge_shards(output_dir, 'mind2web', formats=('json',))
+
+	assert [r['task_index'] for r in read_jsonl(results_jsonl_path(output_dir, 'mind2web'))] == [0, 2]
+
+
+def test_merge_rejects_shards_of_different_configs(tmp_path):
+	output_dir = str(tmp_path)
+	write_shard(output_dir, (0, 2), 'abc', [0])
+	write_shard(output_dir, (1, 2), 'def', [1])
+
+	with pytest.raises(ValueError, match='different configurations'):
+		merge_shards(output_dir, 'mind2web')
+	assert not os.path.exists(results_jsonl_path(output_dir, 'mind2web'))
+	assert not os.path.exists(run_manifest_path(output_dir, 'mind2web'))
+
+
+def test_merge_needs_a_single_split(tmp_path):
+	output_dir = str(tmp_path)
+	write_shard(output_dir, (0, 2), 'abc', [0])
+	write_shard(output_dir, (1, 2), 'abc', [1])
+	write_shard(output_dir, (0, 3), 'new', [0, 3])
+
+	with pytest.raises(ValueError, match='several shard splits'):
+		merge_shards(output_dir, 'mind2web')
+
+	merge_shards(output_dir, 'mind2web', shards=2, formats=('json',))
+	assert [r['task_index'] for r in read_jsonl(results_jsonl_path(output_dir, 'mind2web'))] == [0, 1]
+
+
+def test_merge_combines_the_settle_histories_of_the_shards(tmp_path):
+	output_dir = str(tmp_path)
+	histories = [
+		{'a.com': {'network': [1.0, 2.0, 3.0]}, 'b.com': {'dom': [0.5]}},
+		{'a.com': {'network': [4.0, 5.0], 'dom': [0.2]}},
+	]
+	for i, domains in enumerate(histories):
+		write_shard(output_dir, (i, 2), 'abc', [i])
+		with open(settle_stats_path(output_dir, shard_run_name('mind2web', (i, 2))), 'w') as f:
+			json.dump({'percentile': 90, 'domains': domains}, f)
+
+	merge_shards(output_dir, 'mind2web', formats=())
+
+	with open(settle_stats_path(output_dir, 'mind2web')) as f:
+		merged = json.load(f)
+	assert merged['percentile'] == 90
+	# No more samples per signal than a shard keeps
+	assert merged['domains'] == {
+		'a.com': {'network': [3.0, 4.0, 5.0], 'dom': [0.2]},
+		'b.com': {'dom': [0.5]},
+	}
+
+
+def test_shards_keep_their_tasks_whatever_the_filters(run_evaluations, tmp_path):
+	tasks = [{'id': f'task-{i}', 'confirmed_task': 'x', 'website': 'ebay' if i % 3 else 'amazon'} for i in range(12)]
+	path = tmp_path / 'datasets' / 'mind2web' / 'test_data.json'
+	path.parent.mkdir(parents=True)
+	path.write_text(json.dumps(tasks))
+
+	def shard_indexes(shard, **filters):
+		runner = run_evaluations.EvaluationRunner('mind2web', 'results', shard=shard, adaptive_settle=False, **filters)
+		return [item[0] for item in runner.iter_tasks()]
+
+	all_shards = [shard_indexes((i, 4)) for i in range(4)]
+	assert all_shards == [[0, 4, 8], [1, 5, 9], [2, 6, 10], [3, 7, 11]]
+	# A filter drops tasks from a shard but never moves them to another one
+	assert shard_indexes((1, 4), websites=['ebay']) == [1, 5]
+	assert shard_indexes((0, 4), task_ids=['task-4', 'task-5']) == [4]
+
+
+def test_each_shard_keeps_its_own_settle_history(run_evaluations, tmp_path):
+	(tmp_path / 'datasets' / 'mind2web').mkdir(parents=True)
+	(tmp_path / 'datasets' / 'mind2web' / 'test_data.json').write_text('[]')
+	merged = {'percentile': 90, 'domains': {'a.com': {'network': [1.0]}}}
+	(tmp_path / 'results').mkdir()
+	with open(settle_stats_path('results', 'mind2web'), 'w') as f:
+		json.dump(merged, f)
+
+	paths = [run_evaluations.EvaluationRunner('mind2web', 'results', shard=(i, 2)).settle_policy.path for i in range(2)]
+
+	assert paths == [settle_stats_path('results', shard_run_name('mind2web', (i, 2))) for i in range(2)]
+	# A new shard starts from what the merged shards learned
+	for path in paths:
+		with open(path) as f:
+			assert json.load(f) == merged
+	fixed = run_evaluations.EvaluationRunner('mind2web', 'results', adaptive_settle=False)
+	assert fixed.settle_policy is None
+	assert fixed.run_fingerprint()['config']['adaptive_settle'] is False
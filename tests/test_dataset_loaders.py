@@ -0,0 +1,144 @@
+import io
+import json
+
+import pytest
+
+import dataset_loaders
+from dataset_loaders import TaskStream, _JsonReader, iter_raw_tasks
+
+# run with:
+# python -m pytest tests/test_dataset_loaders.py
+
+
+RAW_TASKS = [
+	{'id': f'task-{i}', 'confirmed_task': f'Do thing {i}', 'website': site, 'url': f'https://www.{site}.com/start'}
+	for i, site in enumerate(['amazon', 'ebay', 'amazon', 'target', 'ebay', 'amazon'])
+]
+
+
+def write_json(tmp_path, data, name='test_data.json'):
+	path = tmp_path / name
+	path.write_text(json.dumps(data))
+	return str(path)
+
+
+def write_jsonl(tmp_path, items, name='tasks.jsonl'):
+	path = tmp_path / name
+	path.write_text('\n'.join(json.dumps(item) for item in items) + '\n')
+	return str(path)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+	"""Read a few bytes at a time, so values and numbers are cut at chunk boundaries"""
+	monkeypatch.setattr(dataset_loaders, 'READ_CHUNK_SIZE', 7)
+
+
+def test_array_object_and_jsonl_give_the_same_tasks(tmp_path):
+	array = write_json(tmp_path, RAW_TASKS)
+	wrapped = write_json(tmp_path, {'version': 2, 'meta': {'a': [1, 2]}, 'tasks': RAW_TASKS}, 'wrapped.json')
+	jsonl = write_jsonl(tmp_path, RAW_TASKS)
+
+	assert list(iter_raw_tasks(array)) == RAW_TASKS
+	assert list(iter_raw_tasks(wrapped)) == RAW_TASKS
+	assert list(iter_raw_tasks(jsonl)) == RAW_TASKS
+
+
+def test_jsonl_skips_unreadable_lines(tmp_path):
+	path = tmp_path / 'tasks.jsonl'
+	path.write_text('{"id": "a"}\n\n{"id": \n{"id": "b"}\n')
+
+	assert list(iter_raw_tasks(str(path))) == [{'id': 'a'}, {'id': 'b'}]
+
+
+def test_values_split_across_chunk_boundaries(tmp_path, small_chunks):
+	items = [{'id': 'long', 'raw_html': '<div>' + 'x' * 1000 + '</div>'}, 12345678901234, -1.5e10, 'a "quoted" string', [], {}]
+	path = write_json(tmp_path, items)
+
+	assert list(iter_raw_tasks(path)) == items
+	assert list(iter_raw_tasks(write_json(tmp_path, {'tasks': items}, 'wrapped.json'))) == items
+	assert list(iter_raw_tasks(write_json(tmp_path, [], 'empty.json'))) == []
+
+
+def test_large_value_is_read_in_growing_chunks(small_chunks):
+	text = json.dumps([{'raw_html': 'x' * 100000}, 1])
+	reads = []
+
+	class File(io.StringIO):
+		def read(self, size=-1):
+			reads.append(size)
+			return super().read(size)
+
+	assert list(_JsonReader(File(text)).array_items()) == [{'raw_html': 'x' * 100000}, 1]
+	# Doubling from 7 bytes reaches 100 KB in about 14 reads, not 100000 / 7
+	assert len(reads) < 25
+
+
+def test_truncated_file_is_an_error(tmp_path, caplog):
+	path = tmp_path / 'test_data.json'
+	path.write_text(json.dumps(RAW_TASKS)[:-20])
+
+	with pytest.raises(ValueError):
+		list(iter_raw_tasks(str(path)))
+	# TaskStream logs it and ends the stream
+	assert len(list(TaskStream('mind2web', path=str(path)))) < len(RAW_TASKS)
+
+
+def test_tasks_are_normalised_with_their_dataset_index(tmp_path):
+	tasks = list(TaskStream('mind2web', path=write_json(tmp_path, RAW_TASKS)))
+
+	assert [task['index'] for task in tasks] == list(range(len(RAW_TASKS)))
+	assert tasks[1]['task_id'] == 'task-1'
+	assert tasks[1]['instruction'] == 'Do thing 1'
+	assert tasks[1]['domain'] == 'www.ebay.com'
+	assert tasks[1]['raw'] == RAW_TASKS[1]
+
+
+def test_filters(tmp_path):
+	path = write_json(tmp_path, RAW_TASKS)
+
+	def task_ids(**filters):
+		return [task['task_id'] for task in TaskStream('mind2web', path=path, **filters)]
+
+	assert task_ids(task_ids=['task-4', 'task-0', 'missing']) == ['task-0', 'task-4']
+	assert task_ids(websites=['EBAY']) == ['task-1', 'task-4']
+	assert task_ids(websites=['target.com']) == ['task-3']
+	assert task_ids(websites=['amazon'], max_samples=2) == ['task-0', 'task-2']
+	assert task_ids(max_samples=1) == ['task-0']
+	# The index is the position in the dataset, not in the filtered stream
+	assert [task['index'] for task in TaskStream('mind2web', path=path, websites=['ebay'])] == [1, 4]
+
+
+def test_sample_is_reproducible_for_a_seed(tmp_path):
+	items = [{'id': f'task-{i}', 'confirmed_task': 'x'} for i in range(400)]
+	path = write_json(tmp_path, items)
+	reversed_path = write_json(tmp_path, items[::-1], 'reversed.json')
+
+	def sample(path, seed):
+		return {task['task_id'] for task in TaskStream('mind2web', path=path, sample_fraction=0.25, seed=seed)}
+
+	first = sample(path, seed=1)
+	assert first == sample(path, seed=1)
+	# Picked per task id, whatever the order of the file
+	assert first == sample(reversed_path, seed=1)
+	assert first != sample(path, seed=2)
+	assert 60 < len(first) < 140
+
+
+def test_normalised_file_is_read_as_is(tmp_path):
+	normalized = [dataset_loaders.normalize_task('webvoyager', i, {'id': f'v{i}', 'ques': 'q', 'web': 'https://a.org'})
+		for i in range(3)]
+	path = write_jsonl(tmp_path, normalized, dataset_loaders.NORMALIZED_TASKS_FILE)
+
+	assert list(TaskStream('webvoyager', path=path)) == normalized
+
+
+def test_stream_is_re_iterable_and_checks_its_arguments(tmp_path):
+	stream = TaskStream('mind2web', path=write_json(tmp_path, RAW_TASKS))
+	assert list(stream) == list(stream)
+	assert list(TaskStream('mind2web', path=str(tmp_path / 'missing.json'))) == []
+
+	with pytest.raises(ValueError):
+		TaskStream('unknown')
+	with pytest.raises(ValueError):
+		TaskStream('mind2web', sample_fraction=0)
@@ -0,0 +1,110 @@
+import gc
+import weakref
+
+import pytest
+
+from browser_use import memory
+from browser_use.dom.service import DomService
+from browser_use.memory import MemoryPressureHook
+
+# run with:
+# python -m pytest tests/test_dom_memory.py
+
+
+def node_map(items):
+	"""A body with `items` links, each with a text child, in the bottom up order of buildDomTree.js"""
+	nodes = {}
+	body_children = []
+	for i in range(items):
+		nodes[str(2 * i)] = {'type': 'TEXT_NODE', 'text': f'Item {i}', 'isVisible': True}
+		nodes[str(2 * i + 1)] = {
+			'tagName': 'a',
+			'xpath': f'html/body/a[{i + 1}]',
+			'attributes': {'href': f'/item/{i}'},
+			'children': [str(2 * i)],
+			'isVisible': True,
+			'isInteractive': True,
+			'highlightIndex': i,
+		}
+		body_children.append(str(2 * i + 1))
+	nodes[str(2 * items)] = {
+		'tagName': 'body',
+		'xpath': 'html/body',
+		'attributes': {},
+		'children': body_children,
+		'isVisible': True,
+	}
+	return {'rootId': str(2 * items), 'map': nodes}
+
+
+@pytest.fixture
+def gc_disabled():
+	gc.disable()
+	yield
+	gc.enable()
+
+
+@pytest.mark.asyncio
+async def test_dom_tree_is_freed_without_garbage_collection(gc_disabled):
+	root, selector_map = await DomService(page=None)._construct_dom_tree(node_map(3))
+
+	link = selector_map[1]
+	text = link.children[0]
+	assert link.parent is root
+	assert text.parent is link
+	assert text.has_parent_with_highlight_index()
+
+	text_ref = weakref.ref(text)
+	root_ref = weakref.ref(root)
+	del root, selector_map, link, text
+	assert root_ref() is None
+	assert text_ref() is None
+
+
+@pytest.mark.asyncio
+async def test_parent_is_none_once_the_tree_is_dropped(gc_disabled):
+	root, selector_map = await DomService(page=None)._construct_dom_tree(node_map(1))
+	link = selector_map[0]
+	del root, selector_map
+
+	assert link.parent is None
+	assert link.children[0].parent is link
+
+
+def test_memory_pressure_hook_collects_above_threshold(monkeypatch):
+	rss = {'bytes': 100 * 2**20}
+	monkeypatch.setattr(memory, 'process_rss_bytes', lambda pid: rss['bytes'])
+	hook = MemoryPressureHook(threshold_mb=200, min_interval=0)
+
+	assert hook() is False
+	assert hook.collections == 0
+
+	rss['bytes'] = 300 * 2**20
+	assert hook() is True
+	assert hook() is True
+	assert hook.collections == 2
+
+
+def test_memory_pressure_hook_waits_between_collections(monkeypatch):
+	monkeypatch.setattr(memory, 'process_rss_bytes', lambda pid: 300 * 2**20)
+	hook = MemoryPressureHook(threshold_mb=200, min_interval=60)
+
+	assert hook() is True
+	assert hook() is False
+	assert hook.collections == 1
+
+
+@pytest.mark.asyncio
+async def test_dom_nodes_are_slotted():
+	root, selector_map = await DomService(page=None)._construct_dom_tree(node_map(2))
+	link = selector_map[0]
+
+	for node in (root, link, link.children[0]):
+		assert not hasattr(node, '__dict__')
+	with pytest.raises(AttributeError):
+		link.extra = 1
+
+	assert link.parent is root
+	assert link.hash is link.hash
+	assert link.hash.attributes_hash != selector_map[1].hash.attributes_hash
+	assert link.clickable_elements_to_string() == '[0]<a Item 0/>'
@@ -0,0 +1,142 @@
+import pytest
+
+from browser_use.dom import service as dom_service_module
+from browser_use.dom.service import CALL_BUILD_DOM_TREE, DomService, build_dom_tree_js
+from browser_use.dom.views import DOMElementNode
+
+# run with:
+# python -m pytest tests/test_dom_script.py
+
+
+EVAL_PAGE = {'rootId': '1', 'map': {'1': {'tagName': 'body', 'xpath': '', 'attributes': {}, 'children': [], 'isVisible': True}}}
+
+
+class DummyPage:
+	"""A page whose documents keep what was registered in them until they navigate"""
+
+	url = 'https://example.com'
+
+	def __init__(self):
+		self.registered = False
+		self.scripts = []
+
+	def navigate(self):
+		self.registered = False
+
+	async def evaluate(self, script, args=None):
+		if script == '1+1':
+			return 2
+		self.scripts.append(script)
+		if script == CALL_BUILD_DOM_TREE:
+			return EVAL_PAGE if self.registered else None
+		self.registered = True
+		return EVAL_PAGE
+
+
+async def build(page):
+	dom_state = await DomService(page).get_clickable_elements()
+	assert dom_state.element_tree.tag_name == 'body'
+
+
+@pytest.mark.asyncio
+async def test_script_is_sent_once_per_document():
+	page = DummyPage()
+
+	await build(page)
+	assert len(page.scripts) == 2
+	assert build_dom_tree_js().strip()[:-1] in page.scripts[1]
+
+	await build(page)
+	await build(page)
+	assert page.scripts[2:] == [CALL_BUILD_DOM_TREE, CALL_BUILD_DOM_TREE]
+
+	page.navigate()
+	await build(page)
+	assert len(page.scripts) == 6
+	assert page.scripts[5] == page.scripts[1]
+
+
+def test_script_is_read_once(monkeypatch):
+	reads = []
+	build_dom_tree_js.cache_clear()
+	monkeypatch.setattr(dom_service_module.resources, 'read_text', lambda package, name: reads.append(name) or '() => 1')
+	try:
+		DomService(DummyPage())
+		DomService(DummyPage())
+		assert reads == ['buildDomTree.js']
+	finally:
+		build_dom_tree_js.cache_clear()
+
+
+# The same snapshot in both formats, as buildDomTree.js returns it
+NODE_MAP = {
+	'rootId': '4',
+	'map': {
+		'0': {'type': 'TEXT_NODE', 'text': 'Hello', 'isVisible': True},
+		'1': {
+			'tagName': 'a',
+			'xpath': 'html/body/div/a',
+			'attributes': {'href': '/x'},
+			'children': ['0'],
+			'isVisible': True,
+			'isTopElement': True,
+			'isInteractive': True,
+			'isInViewport': True,
+			'highlightIndex': 0,
+		},
+		'2': {'type': 'TEXT_NODE', 'text': 'hidden', 'isVisible': False},
+		'3': {
+			'tagName': 'div',
+			'xpath': 'html/body/div',
+			'attributes': {},
+			'children': ['1', '2'],
+			'isVisible': True,
+			'shadowRoot': True,
+		},
+		'4': {'tagName': 'body', 'xpath': '/body', 'attributes': {}, 'children': ['3']},
+	},
+}
+COLUMNAR = {
+	'format': 'columnar',
+	'rootId': 4,
+	'strings': ['Hello', 'a', 'html', 'body', 'div', 'href', '/x', 'hidden', ''],
+	'name': [0, 1, 7, 4, 3],
+	'flags': [3, 30, 1, 34, 0],
+	'highlightIndex': [-1, 0, -1, -1, -1],
+	'xpathCount': [0, 4, 0, 3, 2],
+	'xpath': [2, 3, 4, 1, 2, 3, 4, 8, 3],
+	'attributeCount': [0, 1, 0, 0, 0],
+	'attributes': [5, 6],
+	'childCount': [0, 1, 0, 2, 1],
+	'children': [0, 1, 2, 3],
+}
+
+
+def dump(node):
+	if isinstance(node, DOMElementNode):
+		return (
+			node.tag_name,
+			node.xpath,
+			node.attributes,
+			node.is_visible,
+			node.is_interactive,
+			node.is_top_element,
+			node.is_in_viewport,
+			node.highlight_index,
+			node.shadow_root,
+			[dump(child) for child in node.children],
+			[child.parent is node for child in node.children],
+		)
+	return (node.text, node.is_visible)
+
+
+@pytest.mark.asyncio
+async def test_columnar_snapshot_decodes_to_the_same_tree():
+	dom_service = DomService(DummyPage())
+
+	root, selector_map = await dom_service._construct_dom_tree(NODE_MAP)
+	columnar_root, columnar_selector_map = await dom_service._construct_dom_tree_columnar(COLUMNAR)
+
+	assert dump(columnar_root) == dump(root)
+	assert list(columnar_selector_map) == list(selector_map) == [0]
+	assert columnar_selector_map[0].xpath == 'html/body/div/a'
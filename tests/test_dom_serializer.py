@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from browser_use.dom.service import DomService
+from browser_use.dom.views import DOMBaseNode, DOMElementNode, DOMTextNode
+
+# run with:
+# python -m pytest tests/test_dom_serializer.py
+
+
+def per_node_clickable_elements_to_string(root: DOMElementNode, include_attributes: list[str] | None = None) -> str:
+	"""The serializer as it was: a subtree walk per highlighted element and a parent walk per text node"""
+	formatted_text = []
+
+	def process_node(node: DOMBaseNode) -> None:
+		if isinstance(node, DOMElementNode):
+			if node.highlight_index is not None:
+				attributes_str = ''
+				text = node.get_all_text_till_next_clickable_element()
+				if include_attributes:
+					attributes = list(
+						set(
+							[
+								str(value)
+								for key, value in node.attributes.items()
+								if key in include_attributes and value != node.tag_name
+							]
+						)
+					)
+					if text in attributes:
+						attributes.remove(text)
+					attributes_str = ';'.join(attributes)
+				line = f'[{node.highlight_index}]<{node.tag_name} '
+				if attributes_str:
+					line += f'{attributes_str}'
+				if text:
+					if attributes_str:
+						line += f'>{text}'
+					else:
+						line += f'{text}'
+				line += '/>'
+				formatted_text.append(line)
+
+			for child in node.children:
+				process_node(child)
+
+		elif isinstance(node, DOMTextNode):
+			if not node.has_parent_with_highlight_index() and node.is_visible:
+				formatted_text.append(f'{node.text}')
+
+	process_node(root)
+	return '\n'.join(formatted_text)
+
+
+def random_node_map(seed, elements=300):
+	"""A random page: nested highlighted elements, invisible and blank text, attributes equal to the text"""
+	rng = random.Random(seed)
+	nodes = {}
+	pending = []
+	highlight_index = 0
+	for i in range(elements):
+		children = []
+		for _ in range(rng.randint(0, 3)):
+			if pending and rng.random() < 0.6:
+				children.append(pending.pop(rng.randrange(len(pending))))
+			else:
+				text_id = f't{len(nodes)}'
+				text = rng.choice(['Buy', 'Next page', '  ', f'Item {i}', 'Search'])
+				nodes[text_id] = {'type': 'TEXT_NODE', 'text': text, 'isVisible': rng.random() < 0.8}
+				children.append(text_id)
+		node = {
+			'tagName': rng.choice(['div', 'a', 'button', 'span', 'input']),
+			'xpath': f'html/body/div[{i}]',
+			'attributes': rng.choice([{}, {'title': 'Buy'}, {'aria-label': f'Item {i}', 'role': 'button', 'name': 'q'}]),
+			'children': children,
+			'isVisible': rng.random() < 0.9,
+		}
+		if rng.random() < 0.4:
+			node['highlightIndex'] = highlight_index
+			highlight_index += 1
+		nodes[f'e{i}'] = node
+		pending.append(f'e{i}')
+	nodes['root'] = {'tagName': 'body', 'xpath': 'html/body', 'attributes': {}, 'children': pending, 'isVisible': True}
+	return {'rootId': 'root', 'map': nodes}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('seed', range(20))
+async def test_output_is_identical_to_the_per_node_serializer(seed):
+	root, selector_map = await DomService(page=None)._construct_dom_tree(random_node_map(seed))
+	include_attributes = ['title', 'aria-label', 'role', 'name']
+
+	assert root.clickable_elements_to_string() == per_node_clickable_elements_to_string(root)
+	assert root.clickable_elements_to_string(include_attributes) == per_node_clickable_elements_to_string(
+		root, include_attributes
+	)
+
+	# From an element inside the tree, where text below a highlighted ancestor is not listed
+	for element in list(selector_map.values())[:10]:
+		for child in element.children:
+			if isinstance(child, DOMElementNode):
+				assert child.clickable_elements_to_string() == per_node_clickable_elements_to_string(child)
+
+
+@pytest.mark.asyncio
+async def test_deep_tree_does_not_recurse():
+	depth = 5000
+	nodes = {'0': {'type': 'TEXT_NODE', 'text': 'Bottom', 'isVisible': True}}
+	for i in range(1, depth):
+		nodes[str(i)] = {'tagName': 'div', 'xpath': '', 'attributes': {}, 'children': [str(i - 1)], 'isVisible': True}
+	nodes['1']['highlightIndex'] = 0
+
+	root, _ = await DomService(page=None)._construct_dom_tree({'rootId': str(depth - 1), 'map': nodes})
+
+	assert root.clickable_elements_to_string() == '[0]<div Bottom/>'
@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import pytest
+
+from browser_use.browser.network import NetworkIdleWatcher, is_relevant_request
+
+# run with:
+# python -m pytest tests/test_network_idle.py
+
+
+class DummyRequest:
+	def __init__(self, url, resource_type='script', headers=None):
+		self.url = url
+		self.resource_type = resource_type
+		self.headers = headers or {}
+
+
+class DummyResponse:
+	def __init__(self, request, content_type='application/javascript'):
+		self.request = request
+		self.headers = {'content-type': content_type}
+
+
+def test_request_filter():
+	assert is_relevant_request(DummyRequest('https://example.com/app.js'))
+	assert not is_relevant_request(DummyRequest('https://www.google-analytics.com/collect'))
+	assert not is_relevant_request(DummyRequest('https://example.com/api', resource_type='xhr'))
+	assert not is_relevant_request(DummyRequest('data:image/png;base64,AAAA', resource_type='image'))
+	assert not is_relevant_request(DummyRequest('https://example.com/next.js', headers={'purpose': 'prefetch'}))
+
+
+@pytest.mark.asyncio
+async def test_wait_returns_when_quiet_period_ends():
+	watcher = NetworkIdleWatcher()
+	request = DummyRequest('https://example.com/app.js')
+	watcher.on_request(request)
+
+	async def finish_request():
+		await asyncio.sleep(0.1)
+		watcher.on_response(DummyResponse(request))
+
+	asyncio.create_task(finish_request())
+	start_time = time.monotonic()
+	waited = await watcher.wait_for_idle(idle_time=0.2, timeout=5)
+
+	# Request done after 0.1s, then 0.2s of quiet: no polling granularity on top
+	assert 0.3 <= waited < 0.4
+	assert time.monotonic() - start_time < 0.4
+	assert not watcher.pending_requests
+
+
+@pytest.mark.asyncio
+async def test_wait_gives_up_at_timeout():
+	watcher = NetworkIdleWatcher()
+	watcher.on_request(DummyRequest('https://example.com/slow.js'))
+
+	waited = await watcher.wait_for_idle(idle_time=0.1, timeout=0.2)
+
+	assert 0.2 <= waited < 0.3
+	assert len(watcher.pending_requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_page_already_idle_returns_immediately():
+	watcher = NetworkIdleWatcher()
+	request = DummyRequest('https://example.com/app.js')
+	watcher.on_request(request)
+	watcher.on_request_failed(request)
+
+	# The tracker keeps running between steps, so the quiet period can be over before anyone waits
+	await asyncio.sleep(0.2)
+	assert watcher.idle_for() >= 0.2
+
+	waited = await watcher.wait_for_idle(idle_time=0.1, timeout=5)
+	assert waited < 0.01
@@ -0,0 +1,135 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+# run with:
+# python -m pytest tests/test_prepare_datasets.py
+
+
+MIND2WEB_TASKS = [
+	{
+		'annotation_id': f'm{i}',
+		'confirmed_task': f'Task {i}',
+		'website': 'united',
+		'actions': [{'action_uid': 'a', 'raw_html': '<html>' + 'x' * 100 + '</html>', 'cleaned_html': '<html/>'}],
+	}
+	for i in range(3)
+]
+
+
+@pytest.fixture
+def prepare_datasets(monkeypatch, tmp_path):
+	"""The prepare_datasets.py script as a module, writing datasets/ (and its log) under tmp_path"""
+	monkeypatch.chdir(tmp_path)
+	import prepare_datasets
+
+	return prepare_datasets
+
+
+@pytest.fixture
+def mirror(tmp_path):
+	"""A mirror directory with the Mind2Web archive and a plain (non git) WebVoyager checkout"""
+	mirror_dir = tmp_path / 'mirror'
+	mirror_dir.mkdir()
+	with zipfile.ZipFile(mirror_dir / 'data.zip', 'w') as archive:
+		archive.writestr('data/test_task/part_0.json', json.dumps(MIND2WEB_TASKS[:2]))
+		archive.writestr('data/test_website/part_0.json', json.dumps(MIND2WEB_TASKS[2:]))
+	voyager = mirror_dir / 'WebVoyager' / 'data'
+	voyager.mkdir(parents=True)
+	(voyager / 'WebVoyager_data.jsonl').write_text(
+		'\n'.join(json.dumps({'id': f'v{i}', 'ques': 'q', 'web': 'https://www.bbc.com/'}) for i in range(2))
+	)
+	return str(mirror_dir)
+
+
+@pytest.fixture
+def cache(prepare_datasets, tmp_path):
+	return prepare_datasets.ArtifactCache(str(tmp_path / 'cache'))
+
+
+def read_tasks(prepare_datasets, name):
+	with open(prepare_datasets.normalized_tasks_path(name)) as f:
+		return [json.loads(line) for line in f]
+
+
+def test_convert_writes_compact_normalised_tasks(prepare_datasets, cache, mirror):
+	manifest = prepare_datasets.prepare_dataset('mind2web', cache, mirror_dir=mirror, offline=True)
+
+	tasks = read_tasks(prepare_datasets, 'mind2web')
+	assert [task['task_id'] for task in tasks] == ['m0', 'm1', 'm2']
+	assert [task['index'] for task in tasks] == [0, 1, 2]
+	assert tasks[0]['raw']['actions'] == [{'action_uid': 'a'}]
+	assert manifest['count'] == 3
+	assert manifest['converter_version'] == prepare_datasets.CONVERTER_VERSION
+	assert manifest['sha256'] == prepare_datasets.sha256_file(prepare_datasets.normalized_tasks_path('mind2web'))
+	with open(prepare_datasets.manifest_path('mind2web')) as f:
+		assert json.load(f) == manifest
+
+
+def test_cache_hit_skips_the_refetch_and_the_conversion(prepare_datasets, cache, mirror, monkeypatch):
+	first = prepare_datasets.prepare_dataset('mind2web', cache, mirror_dir=mirror, offline=True)
+
+	def no_fetch(*args, **kwargs):
+		raise AssertionError('fetched again')
+
+	def no_read(*args, **kwargs):
+		raise AssertionError('converted again')
+
+	monkeypatch.setattr(prepare_datasets, 'fetch_url_source', no_fetch)
+	monkeypatch.setattr(prepare_datasets, 'iter_raw_tasks', no_read)
+	# No mirror needed any more, everything comes from the cache
+	assert prepare_datasets.prepare_dataset('mind2web', cache, offline=True) == first
+
+
+def test_tree_source_is_cached_by_its_checksum(prepare_datasets, cache, mirror):
+	ref = prepare_datasets.fetch_dataset('webvoyager', cache, mirror_dir=mirror, offline=True)
+
+	assert ref['kind'] == 'tree'
+	assert ref['digest'] == prepare_datasets.sha256_tree(os.path.join(mirror, 'WebVoyager'))
+	assert cache.is_valid(cache.read_ref('webvoyager'))
+
+	# A modified tree no longer matches its ref, so it would be fetched again
+	with open(os.path.join(cache.tree_path(ref['digest']), 'data', 'WebVoyager_data.jsonl'), 'a') as f:
+		f.write('\n{"id": "extra"}')
+	assert not cache.is_valid(ref)
+
+
+def test_new_converter_version_rebuilds_the_tasks(prepare_datasets, cache, mirror, monkeypatch):
+	prepare_datasets.prepare_dataset('mind2web', cache, mirror_dir=mirror, offline=True)
+
+	monkeypatch.setattr(prepare_datasets, 'CONVERTER_VERSION', prepare_datasets.CONVERTER_VERSION + 1)
+	manifest = prepare_datasets.prepare_dataset('mind2web', cache, offline=True)
+
+	assert manifest['converter_version'] == prepare_datasets.CONVERTER_VERSION
+	assert manifest['count'] == 3
+
+
+def test_modified_task_file_is_rebuilt(prepare_datasets, cache, mirror):
+	first = prepare_datasets.prepare_dataset('mind2web', cache, mirror_dir=mirror, offline=True)
+	with open(prepare_datasets.normalized_tasks_path('mind2web'), 'a') as f:
+		f.write('{"task_id": "hand edited"}\n')
+
+	manifest = prepare_datasets.prepare_dataset('mind2web', cache, offline=True)
+
+	assert manifest['sha256'] == first['sha256']
+	assert len(read_tasks(prepare_datasets, 'mind2web')) == 3
+
+
+def test_offline_without_a_cached_blob_fails_cleanly(prepare_datasets, cache, tmp_path):
+	with pytest.raises(FileNotFoundError, match='offline'):
+		prepare_datasets.prepare_dataset('mind2web', cache, mirror_dir=str(tmp_path / 'empty'), offline=True)
+
+	assert cache.read_ref('mind2web') is None
+	assert os.listdir(os.path.join(cache.root, 'blobs')) == []
+	assert not os.path.exists(prepare_datasets.manifest_path('mind2web'))
+
+
+def test_checksum_mismatch_is_refused(prepare_datasets, cache, mirror, monkeypatch):
+	source = {**prepare_datasets.SOURCES['mind2web'], 'sha256': '0' * 64}
+	monkeypatch.setitem(prepare_datasets.SOURCES, 'mind2web', source)
+
+	with pytest.raises(ValueError, match='checksum mismatch'):
+		prepare_datasets.fetch_dataset('mind2web', cache, mirror_dir=mirror, offline=True)
+	assert os.listdir(os.path.join(cache.root, 'blobs')) == []
@@ -0,0 +1,113 @@
+import json
+
+import pandas as pd
+
+from result_sink import (
+	JsonlResultSink,
+	completed_task_ids,
+	load_result_stream,
+	materialize_results,
+	read_jsonl,
+	results_jsonl_path,
+)
+
+# run with:
+# python -m pytest tests/test_result_sink.py
+
+
+def record(index, fingerprint='run', **fields):
+	return {'task_index': index, 'task_id': f'task-{index}', 'success': True, 'run_fingerprint': fingerprint, **fields}
+
+
+def test_records_are_on_disk_after_append(tmp_path):
+	path = results_jsonl_path(str(tmp_path / 'results'), 'mind2web')
+	with JsonlResultSink(path) as sink:
+		sink.append(record(0, steps=[{'url': 'https://example.com'}]))
+		# Readable by another process before the sink is closed
+		assert list(read_jsonl(path)) == [record(0, steps=[{'url': 'https://example.com'}])]
+		sink.append(record(1))
+		assert sink.count == 2
+
+	with JsonlResultSink(path) as sink:
+		sink.append(record(2))
+	# Truncated unless appending
+	assert [r['task_index'] for r in read_jsonl(path)] == [2]
+
+
+def test_append_after_a_torn_tail_starts_a_new_line(tmp_path):
+	path = str(tmp_path / 'mind2web_results.jsonl')
+	with open(path, 'w') as f:
+		f.write(json.dumps(record(0)) + '\n' + '{"task_index": 1, "task_id": "ta')
+
+	with JsonlResultSink(path, truncate=False) as sink:
+		sink.append(record(1))
+
+	with open(path) as f:
+		lines = f.read().splitlines()
+	assert len(lines) == 3
+	assert [r['task_index'] for r in read_jsonl(path)] == [0, 1]
+
+
+def test_append_to_a_complete_stream_adds_no_blank_line(tmp_path):
+	path = str(tmp_path / 'mind2web_results.jsonl')
+	with JsonlResultSink(path) as sink:
+		sink.append(record(0))
+	with JsonlResultSink(path, truncate=False) as sink:
+		sink.append(record(1))
+
+	with open(path) as f:
+		assert f.read().count('\n') == 2
+
+
+def test_unreadable_lines_anywhere_are_skipped(tmp_path):
+	path = str(tmp_path / 'mind2web_results.jsonl')
+	with open(path, 'w') as f:
+		f.write(json.dumps(record(0)) + '\n{broken\n\n' + json.dumps(record(1)) + '\n')
+
+	assert [r['task_index'] for r in read_jsonl(path)] == [0, 1]
+
+
+def test_errored_tasks_are_not_completed(tmp_path):
+	path = str(tmp_path / 'mind2web_results.jsonl')
+	with JsonlResultSink(path) as sink:
+		sink.append(record(0))
+		sink.append(record(1, error='Timed out after 600s', success=False))
+		sink.append(record(2, error='page crashed', success=False))
+		# Retried later and succeeded: the latest record wins
+		sink.append(record(2))
+		sink.append(record(3, fingerprint='other'))
+
+	assert completed_task_ids(path, 'run') == {'task-0', 'task-2'}
+	assert completed_task_ids(path, 'other') == {'task-3'}
+
+
+def test_latest_record_per_task_in_dataset_order(tmp_path):
+	path = str(tmp_path / 'mind2web_results.jsonl')
+	with JsonlResultSink(path) as sink:
+		for index in (3, 1, 0):
+			sink.append(record(index))
+		sink.append(record(1, final_result='second try'))
+		sink.append(record(2, fingerprint='other'))
+
+	results = load_result_stream(path)
+	assert [r['task_index'] for r in results] == [0, 1, 2, 3]
+	assert results[1]['final_result'] == 'second try'
+	assert [r['task_index'] for r in load_result_stream(path, 'run')] == [0, 1, 3]
+
+
+def test_materialized_files_match_the_stream(tmp_path):
+	output_dir = str(tmp_path)
+	with JsonlResultSink(results_jsonl_path(output_dir, 'webvoyager')) as sink:
+		for index in (1, 0, 2):
+			sink.append(record(index, token_usage={'prompt': 10 * index, 'completion': index}))
+		sink.append(record(3, fingerprint='other'))
+
+	written = materialize_results(output_dir, 'webvoyager', formats=('json', 'csv'), fingerprint='run')
+
+	expected = load_result_stream(results_jsonl_path(output_dir, 'webvoyager'), 'run')
+	assert written == [str(tmp_path / 'webvoyager_results.json'), str(tmp_path / 'webvoyager_results.csv')]
+	with open(written[0]) as f:
+		assert json.load(f) == expected
+	table = pd.read_csv(written[1])
+	assert list(table['task_id']) == ['task-0', 'task-1', 'task-2']
+	assert list(table['success']) == [True, True, True]
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+import analyze_results
+from result_sink import JsonlResultSink, completed_task_ids, read_jsonl, results_jsonl_path
+from task_scheduler import TaskScheduler
+
+# run with:
+# python -m pytest tests/test_resume.py
+
+
+TASKS = [{'id': f'task-{i}', 'confirmed_task': f'Do thing {i}', 'url': 'https://www.example.com'} for i in range(4)]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+	path = tmp_path / 'datasets' / 'mind2web' / 'test_data.json'
+	path.parent.mkdir(parents=True)
+	path.write_text(json.dumps(TASKS))
+	return path
+
+
+def make_runner(run_evaluations, pool, failing=(), **kwargs):
+	"""An EvaluationRunner whose tasks run on a fake pool and only record which tasks ran"""
+	runner = run_evaluations.EvaluationRunner('mind2web', 'results', resume=True, **{'adaptive_settle': False, **kwargs})
+	runner.browser_pool = pool
+	runner.scheduler = TaskScheduler(pool=pool, concurrency=2)
+	runner.ran = []
+
+	async def run_single_task(task_id, instruction, task_data, browser_context):
+		runner.ran.append(task_id)
+		if task_id in failing:
+			raise RuntimeError('page crashed')
+		return {'task_id': task_id, 'benchmark': 'mind2web', 'model': runner.model, 'steps': [], 'success': True}
+
+	runner.run_single_task = run_single_task
+	return runner
+
+
+def stream_file():
+	return results_jsonl_path('results', 'mind2web')
+
+
+async def test_resume_skips_completed_and_retries_errored_tasks(run_evaluations, fake_browser_pool, dataset):
+	first = make_runner(run_evaluations, fake_browser_pool, failing={'task-2'})
+	await first.run_evaluation_async()
+	assert sorted(first.ran) == ['task-0', 'task-1', 'task-2', 'task-3']
+	fingerprint = first.run_fingerprint()['id']
+	assert completed_task_ids(stream_file(), fingerprint) == {'task-0', 'task-1', 'task-3'}
+
+	resumed = make_runner(run_evaluations, fake_browser_pool)
+	results = await resumed.run_evaluation_async()
+
+	assert resumed.ran == ['task-2']
+	assert [r['task_id'] for r in results] == ['task-0', 'task-1', 'task-2', 'task-3']
+	assert not any(r.get('error') for r in results)
+	with open('results/mind2web_results.json') as f:
+		assert json.load(f) == results
+
+
+async def test_resume_after_a_torn_last_line(run_evaluations, fake_browser_pool, dataset):
+	await make_runner(run_evaluations, fake_browser_pool, task_ids=['task-0', 'task-1']).run_evaluation_async()
+	# Killed while writing the record of task-2
+	with open(stream_file(), 'a') as f:
+		f.write('{"task_id": "task-2", "succ')
+
+	resumed = make_runner(run_evaluations, fake_browser_pool, task_ids=['task-0', 'task-1', 'task-2'])
+	results = await resumed.run_evaluation_async()
+
+	assert resumed.ran == ['task-2']
+	assert [r['task_id'] for r in results] == ['task-0', 'task-1', 'task-2']
+	# The new record starts on its own line, only the torn one is unreadable
+	with open(stream_file()) as f:
+		lines = f.read().splitlines()
+	assert lines[2] == '{"task_id": "task-2", "succ'
+	assert json.loads(lines[3])['task_id'] == 'task-2'
+
+
+async def test_records_of_another_run_config_are_ignored(run_evaluations, fake_browser_pool, dataset):
+	runner = make_runner(run_evaluations, fake_browser_pool, task_ids=['task-0'])
+	await runner.run_evaluation_async()
+	# An earlier run with another model appended to the same stream
+	with JsonlResultSink(stream_file(), truncate=False) as sink:
+		for task_id in ('task-0', 'task-1'):
+			sink.append({'task_id': task_id, 'run_fingerprint': 'other', 'model': 'gpt-4o-mini', 'success': False})
+
+	resumed = make_runner(run_evaluations, fake_browser_pool)
+	results = await resumed.run_evaluation_async()
+
+	assert sorted(resumed.ran) == ['task-1', 'task-2', 'task-3']
+	assert {r['run_fingerprint'] for r in results} == {runner.run_fingerprint()['id']}
+
+	# The analysis sees the same tasks as the materialized results
+	df = analyze_results.load_results('results')
+	assert list(df['task_id']) == [r['task_id'] for r in results]
+	assert df['success'].all()
+	assert len(list(read_jsonl(stream_file()))) == 6
+
+
+@pytest.mark.parametrize('changed', [{'max_steps': 10}, {'use_vision': False}, {'adaptive_settle': True}])
+async def test_resume_refuses_a_changed_run_config(run_evaluations, fake_browser_pool, dataset, changed):
+	await make_runner(run_evaluations, fake_browser_pool, task_ids=['task-0']).run_evaluation_async()
+
+	with pytest.raises(ValueError, match=next(iter(changed))):
+		await make_runner(run_evaluations, fake_browser_pool, **changed).run_evaluation_async()
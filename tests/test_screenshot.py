@@ -0,0 +1,130 @@
+import base64
+import io
+
+import pytest
+from langchain_core.messages import SystemMessage
+from PIL import Image
+
+from browser_use.agent.message_manager.service import MessageManager, MessageManagerSettings
+from browser_use.agent.prompts import AgentMessagePrompt
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.screenshot import ScreenshotConfig, encode_screenshot, estimate_image_tokens, image_size
+from browser_use.browser.views import BrowserState
+from browser_use.dom.views import DOMElementNode
+
+# run with:
+# python -m pytest tests/test_screenshot.py
+
+
+def make_png(width=1280, height=1100):
+	output = io.BytesIO()
+	Image.new('RGB', (width, height), (30, 120, 200)).save(output, format='PNG')
+	return output.getvalue()
+
+
+def decode(screenshot):
+	return Image.open(io.BytesIO(base64.b64decode(screenshot.data)))
+
+
+def test_png_is_passed_through():
+	png = make_png()
+
+	screenshot = encode_screenshot(png, ScreenshotConfig())
+
+	assert base64.b64decode(screenshot.data) == png
+	assert (screenshot.mime_type, screenshot.width, screenshot.height) == ('image/png', 1280, 1100)
+
+
+def test_jpeg_size_is_read_from_the_header():
+	output = io.BytesIO()
+	Image.new('RGB', (640, 480)).save(output, format='JPEG')
+
+	assert image_size(output.getvalue()) == (640, 480)
+	assert image_size(b'test') is None
+
+
+def test_downscaled_grayscale_webp():
+	config = ScreenshotConfig(format='webp', quality=60, max_width=640, grayscale=True)
+
+	screenshot = encode_screenshot(make_png(), config)
+	img = decode(screenshot)
+
+	assert screenshot.mime_type == 'image/webp'
+	assert img.format == 'WEBP'
+	assert (screenshot.width, screenshot.height) == img.size == (640, 550)
+
+
+def test_presets():
+	assert ScreenshotConfig.preset('lossless') == ScreenshotConfig()
+	assert ScreenshotConfig.preset('balanced').mime_type == 'image/jpeg'
+	assert not ScreenshotConfig.preset('balanced').needs_pillow
+	with pytest.raises(ValueError):
+		ScreenshotConfig.preset('tiny')
+	with pytest.raises(ValueError):
+		ScreenshotConfig(format='gif')
+
+
+def test_image_tokens():
+	assert estimate_image_tokens(1280, 1100) == 765
+	assert estimate_image_tokens(512, 400) == 255
+	# Scaled to 1024x2048, then to 768x1536: 2x3 tiles
+	assert estimate_image_tokens(2048, 4096) == 85 + 170 * 6
+
+
+class DummyPage:
+	def __init__(self):
+		self.options = None
+
+	async def bring_to_front(self):
+		pass
+
+	async def wait_for_load_state(self):
+		pass
+
+	async def screenshot(self, **options):
+		self.options = options
+		if options.get('type') == 'jpeg':
+			output = io.BytesIO()
+			Image.new('RGB', (1280, 1100)).save(output, format='JPEG', quality=options['quality'])
+			return output.getvalue()
+		return make_png()
+
+
+@pytest.mark.asyncio
+async def test_browser_encodes_jpeg():
+	page = DummyPage()
+	context = BrowserContext(browser=None, config=BrowserContextConfig(screenshot=ScreenshotConfig.preset('balanced')))
+
+	async def get_current_page():
+		return page
+
+	context.get_current_page = get_current_page
+
+	screenshot = await context.capture_screenshot()
+
+	assert page.options == {'full_page': False, 'animations': 'disabled', 'type': 'jpeg', 'quality': 80}
+	assert decode(screenshot).format == 'JPEG'
+	assert (screenshot.width, screenshot.height) == (1280, 1100)
+
+
+def test_state_message_uses_screenshot_format_and_size():
+	state = BrowserState(
+		element_tree=DOMElementNode(tag_name='body', xpath='', attributes={}, children=[], is_visible=True, parent=None),
+		selector_map={},
+		url='https://example.com',
+		title='Example',
+		tabs=[],
+		screenshot='c2NyZWVuc2hvdA==',
+		screenshot_mime_type='image/webp',
+		screenshot_size=(512, 400),
+	)
+
+	message = AgentMessagePrompt(state).get_user_message(use_vision=True)
+	assert message.content[1]['image_url']['url'].startswith('data:image/webp;base64,')
+
+	message_manager = MessageManager(task='test', system_message=SystemMessage(content='You are a browser agent'))
+	tokens = message_manager.state.history.current_tokens
+	message_manager.add_state_message(state)
+	text_tokens = message_manager._count_text_tokens(message_manager.state.history.messages[-1].message.content[0]['text'])
+	assert message_manager.state.history.current_tokens - tokens == text_tokens + 255
+	assert MessageManagerSettings().image_tokens == 800
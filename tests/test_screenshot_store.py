@@ -0,0 +1,119 @@
+import base64
+import io
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image, ImageDraw
+
+from browser_use.agent.gif import create_history_gif
+from browser_use.agent.screenshot_store import ScreenshotStore, perceptual_hash
+from browser_use.agent.service import Agent
+from browser_use.agent.views import ActionResult, AgentHistory, AgentHistoryList, AgentOutput
+from browser_use.browser.views import BrowserState, BrowserStateHistory
+
+# run with:
+# python -m pytest tests/test_screenshot_store.py
+
+
+def make_screenshot(color=(30, 120, 200), text=None):
+	img = Image.new('RGB', (320, 240), color)
+	draw = ImageDraw.Draw(img)
+	draw.rectangle((40, 40, 200, 120), fill=(250, 250, 250))
+	if text:
+		draw.text((50, 60), text, fill=(0, 0, 0))
+	output = io.BytesIO()
+	img.save(output, format='PNG')
+	return base64.b64encode(output.getvalue()).decode('utf-8')
+
+
+def history_item(store, screenshot):
+	state = BrowserStateHistory(
+		url='https://example.com',
+		title='Example',
+		tabs=[],
+		interacted_element=[None],
+		screenshot_ref=store.put(screenshot),
+	)
+	return AgentHistory(model_output=None, result=[ActionResult()], state=state)
+
+
+def test_identical_screenshots_are_stored_once(tmp_path):
+	store = ScreenshotStore(str(tmp_path))
+	screenshot = make_screenshot()
+
+	first = store.put(screenshot)
+	second = store.put(screenshot)
+
+	assert first == second
+	assert first.endswith('.png')
+	assert len(list(tmp_path.iterdir())) == 1
+	assert store.get(first) == screenshot
+	assert store.stats()['duplicates'] == 1
+
+
+def test_near_duplicates(tmp_path):
+	screenshot = make_screenshot()
+	typed = make_screenshot(text='a')
+	other = make_screenshot(color=(200, 30, 30))
+	assert (perceptual_hash(base64.b64decode(screenshot)) ^ perceptual_hash(base64.b64decode(typed))).bit_count() <= 4
+
+	# Kept by default, without computing perceptual hashes
+	store = ScreenshotStore(str(tmp_path / 'exact'))
+	refs = [store.put(s) for s in (screenshot, typed, other)]
+	assert len(set(refs)) == 3
+	assert store.hashes == {}
+
+	store = ScreenshotStore(str(tmp_path / 'near'), near_duplicate_distance=4)
+	refs = [store.put(s) for s in (screenshot, typed)]
+	assert refs[0] == refs[1]
+	assert store.stats()['near_duplicates'] == 1
+
+
+def test_history_keeps_references_and_loads_lazily(tmp_path):
+	store = ScreenshotStore(str(tmp_path / 'screenshots'))
+	screenshots = [make_screenshot(), make_screenshot(color=(200, 30, 30)), make_screenshot()]
+	history = AgentHistoryList(history=[])
+	history.use_screenshot_store(store)
+	history.history = [history_item(store, s) for s in screenshots]
+
+	path = tmp_path / 'history.json'
+	history.save_to_file(path)
+	data = json.loads(path.read_text())
+	assert data['screenshot_dir'] == store.directory
+	assert all(h['state']['screenshot'] is None for h in data['history'])
+	assert len(list(tmp_path.joinpath('screenshots').iterdir())) == 2
+
+	loaded = AgentHistoryList.load_from_file(path, AgentOutput)
+	assert loaded.screenshots() == screenshots
+
+	gif_path = tmp_path / 'history.gif'
+	create_history_gif(task='test', history=loaded, output_path=str(gif_path), show_task=False, show_goals=False)
+	assert Image.open(gif_path).n_frames == 3
+
+
+@pytest.mark.asyncio
+async def test_agent_stores_screenshots_off_the_event_loop(tmp_path):
+	store = ScreenshotStore(str(tmp_path / 'screenshots'))
+	threads = []
+	put = store.put
+	store.put = lambda *args: threads.append(threading.get_ident()) or put(*args)
+
+	history = AgentHistoryList(history=[])
+	history.use_screenshot_store(store)
+	agent = SimpleNamespace(state=SimpleNamespace(history=history))
+	state = BrowserState(
+		url='https://example.com',
+		title='Example',
+		tabs=[],
+		element_tree=None,
+		selector_map={},
+		screenshot=make_screenshot(),
+	)
+
+	await Agent._make_history_item(agent, None, state, [ActionResult()])
+
+	assert threads and threads[0] != threading.get_ident()
+	assert history.history[0].state.screenshot is None
+	assert history.screenshot(history.history[0]) == state.screenshot
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+from browser_use.browser.settle import SettleBudget, SettlePolicy
+
+# run with:
+# python -m pytest tests/test_settle_policy.py
+
+
+def test_fixed_budget_until_enough_history():
+	config = BrowserContextConfig()
+	policy = SettlePolicy(min_samples=5)
+	for _ in range(4):
+		policy.observe('example.com', 'network', 0.1)
+
+	assert policy.budget('example.com', config) == SettleBudget.fixed(config)
+	assert policy.budget('other.com', config) == SettleBudget.fixed(config)
+
+
+def test_budget_follows_history_within_fixed_bounds():
+	config = BrowserContextConfig(
+		minimum_wait_page_load_time=0.25,
+		wait_for_network_idle_page_load_time=0.5,
+		maximum_wait_page_load_time=5,
+		wait_between_actions=0.5,
+	)
+	policy = SettlePolicy(min_samples=5, headroom=1.5)
+	for _ in range(10):
+		policy.observe('static.com', 'network', 0.1)
+		policy.observe('spa.com', 'network', 8.0)
+
+	fast = policy.budget('static.com', config)
+	assert fast.minimum_wait == 0.1
+	assert fast.between_actions == 0.1
+	# Floor: minimum wait + network idle time
+	assert fast.maximum_wait == 0.75
+
+	slow = policy.budget('spa.com', config)
+	# Ceiling: the fixed values
+	assert slow.minimum_wait == 0.25
+	assert slow.between_actions == 0.5
+	assert slow.maximum_wait == 5
+
+	# The slowest signal wins
+	for _ in range(10):
+		policy.observe('static.com', 'dom', 2.0)
+	assert policy.budget('static.com', config).maximum_wait == 3.5
+
+
+def test_history_is_persisted(tmp_path):
+	path = str(tmp_path / 'settle_stats.json')
+	policy = SettlePolicy(path, history_size=3)
+	for seconds in (0.1, 0.2, 0.3, 0.4):
+		policy.observe('example.com', 'network', seconds)
+	policy.save()
+
+	other = SettlePolicy(path)
+	other.observe('other.com', 'network', 1.0)
+	other.save()
+
+	reloaded = SettlePolicy(path)
+	assert reloaded.history['example.com']['network'] == [0.2, 0.3, 0.4]
+	assert reloaded.history['other.com']['network'] == [1.0]
+
+
+class DummyPage:
+	url = 'https://example.com/cart'
+
+	def __init__(self, probe_result):
+		self.probe_result = probe_result
+
+	async def evaluate(self, script, args):
+		quiet_ms, timeout_ms = args
+		await asyncio.sleep(0.05)
+		return self.probe_result
+
+
+@pytest.mark.asyncio
+async def test_dom_quiet_wait_ends_with_the_mutations():
+	policy = SettlePolicy()
+	context = BrowserContext(browser=None, config=BrowserContextConfig(settle_policy=policy))
+	page = DummyPage({'quiet': True, 'waited': 50, 'settledAfter': 20, 'mutations': 3})
+
+	waited = await context._wait_for_dom_quiet(page, timeout=0.5)
+
+	assert waited < 0.5
+	assert policy.history['example.com']['dom'] == [0.02]
+
+
+@pytest.mark.asyncio
+async def test_dom_quiet_wait_without_probe_sleeps_the_timeout():
+	context = BrowserContext(browser=None, config=BrowserContextConfig())
+
+	waited = await context._wait_for_dom_quiet(DummyPage(None), timeout=0.2)
+
+	assert waited >= 0.2
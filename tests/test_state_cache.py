@@ -0,0 +1,196 @@
+import asyncio
+
+import pytest
+
+from browser_use.browser import context as context_module
+from browser_use.browser.context import BrowserContext, BrowserSession, gather_stages
+from browser_use.browser.screenshot import Screenshot
+from browser_use.browser.views import DOM_ONLY_CAPTURE, StateCaptureProfile, TabInfo
+from browser_use.dom.views import DOMState
+from browser_use.utils import StepTimings, step_timings
+
+# run with:
+# python -m pytest tests/test_state_cache.py
+
+
+@pytest.fixture
+def context():
+	context = BrowserContext(browser=None)
+	context.session = BrowserSession(context=None, cached_state=None)
+	context.fingerprint = ('page', 1, 1000.0, 'https://example.com', 10, 0, 0, 1280, 1100)
+	context.captures = 0
+
+	async def wait_for_page_and_frames_load():
+		pass
+
+	async def page_fingerprint():
+		return context.fingerprint
+
+	async def update_state(profile=None):
+		context.captures += 1
+		return object()
+
+	context._wait_for_page_and_frames_load = wait_for_page_and_frames_load
+	context._page_fingerprint = page_fingerprint
+	context._update_state = update_state
+	yield context
+	context.session = None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_page_reuses_cached_state(context):
+	first = await context.get_state()
+	second = await context.get_state()
+
+	assert second is first
+	assert context.captures == 1
+	assert context.state_cache_hit_rate == 0.5
+
+
+@pytest.mark.asyncio
+async def test_changed_page_is_captured_again(context):
+	first = await context.get_state()
+	# One more DOM mutation
+	context.fingerprint = context.fingerprint[:4] + (11,) + context.fingerprint[5:]
+	second = await context.get_state()
+
+	assert second is not first
+	assert context.captures == 2
+	assert context.state_cache_hits == 0
+
+
+@pytest.mark.asyncio
+async def test_smaller_profile_is_not_reused_for_a_larger_one(context):
+	await context.get_state(DOM_ONLY_CAPTURE)
+	await context.get_state()
+	await context.get_state(DOM_ONLY_CAPTURE)
+
+	assert context.captures == 2
+	assert context.state_cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_no_fingerprint_never_reuses(context):
+	context.fingerprint = None
+	await context.get_state()
+	await context.get_state()
+
+	assert context.captures == 2
+
+
+@pytest.fixture
+def capturing_context(monkeypatch):
+	class DummyPage:
+		url = 'https://example.com'
+
+		async def evaluate(self, script, *args):
+			await asyncio.sleep(0.05)
+			if script == context_module.PAGE_INFO:
+				return {'title': 'Example', 'pixels_above': 0, 'pixels_below': 200}
+			if script == context_module.PAGE_TITLE:
+				return {'title': 'Example', 'pixels_above': 0, 'pixels_below': 0}
+			return 1
+
+	class DummyDomService:
+		def __init__(self, page):
+			pass
+
+		async def get_clickable_elements(self, **kwargs):
+			await asyncio.sleep(0.1)
+			return DOMState(element_tree=None, selector_map={})
+
+		async def get_cross_origin_iframes(self):
+			await asyncio.sleep(0.1)
+			return []
+
+	page = DummyPage()
+	browser_context = BrowserContext(browser=None)
+	browser_context.session = BrowserSession(context=None, cached_state=None)
+
+	async def get_current_page():
+		return page
+
+	async def get_tabs_info():
+		await asyncio.sleep(0.1)
+		return [TabInfo(page_id=0, url=page.url, title='Example')]
+
+	async def capture_screenshot():
+		await asyncio.sleep(0.05)
+		return Screenshot('c2NyZWVuc2hvdA==', 'image/png', 1280, 1100)
+
+	monkeypatch.setattr(context_module, 'DomService', DummyDomService)
+	browser_context.get_current_page = get_current_page
+	browser_context.get_tabs_info = get_tabs_info
+	browser_context.capture_screenshot = capture_screenshot
+	yield browser_context
+	browser_context.session = None
+
+
+async def capture(browser_context, profile=None):
+	timings = StepTimings()
+	token = step_timings.set(timings)
+	try:
+		state = await browser_context._update_state(profile=profile)
+	finally:
+		step_timings.reset(token)
+	return state, timings
+
+
+@pytest.mark.asyncio
+async def test_state_capture_stages_run_concurrently(capturing_context):
+	state, timings = await capture(capturing_context)
+
+	assert state.title == 'Example'
+	assert state.pixels_below == 200
+	# page check 0.05 + (highlights 0.05, DOM 0.1, screenshot 0.05) with tabs, iframes and page info alongside
+	assert timings.metrics['state_capture'] < 0.35
+	assert timings.metrics['state_dom_tree'] >= 0.1
+	assert {'state_tabs', 'state_iframes', 'state_page_info', 'state_screenshot'} <= set(timings.metrics)
+
+
+@pytest.mark.asyncio
+async def test_profile_skips_unneeded_stages(capturing_context):
+	# Counted from the first capture, nothing has to be measured before
+	state, timings = await capture(capturing_context, StateCaptureProfile(screenshot=False))
+
+	assert state.screenshot is None
+	assert state.tabs
+	assert 'state_screenshot' not in timings.metrics
+	assert timings.metrics['state_stages_skipped'] == 1
+	assert capturing_context.state_stages_skipped == {'screenshot': 1}
+
+	state, timings = await capture(capturing_context, DOM_ONLY_CAPTURE)
+
+	assert state.tabs == []
+	assert state.title == 'Example'
+	assert {'state_tabs', 'state_iframes', 'state_page_info'}.isdisjoint(timings.metrics)
+	assert timings.metrics['state_stages_skipped'] == 4
+	assert capturing_context.state_stages_skipped == {'screenshot': 2, 'tabs': 1, 'iframes': 1, 'page_info': 1}
+
+	_, timings = await capture(capturing_context)
+	assert 'state_stages_skipped' not in timings.metrics
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_cancels_the_others():
+	cancelled = []
+
+	async def fails():
+		await asyncio.sleep(0.01)
+		raise RuntimeError('page crashed')
+
+	async def slow():
+		try:
+			await asyncio.sleep(10)
+		except asyncio.CancelledError:
+			cancelled.append(True)
+			raise
+
+	async def done():
+		return 1
+
+	with pytest.raises(RuntimeError, match='page crashed'):
+		await asyncio.wait_for(gather_stages(slow(), fails(), done()), 1)
+	assert cancelled == [True]
+
+	assert await gather_stages(done(), done()) == [1, 1]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from browser_use.utils import StepTimings, step_timings, time_step_section
+
+# run with:
+# python -m pytest tests/test_step_timings.py
+
+
+@time_step_section('page_load')
+async def load_page():
+	await asyncio.sleep(0.05)
+
+
+@time_step_section('action')
+async def act():
+	await asyncio.sleep(0.02)
+	await load_page()
+
+
+@time_step_section('llm')
+def call_llm():
+	return 'output'
+
+
+@pytest.mark.asyncio
+async def test_nested_sections_are_counted_once():
+	timings = StepTimings()
+	token = step_timings.set(timings)
+	try:
+		await act()
+	finally:
+		step_timings.reset(token)
+
+	assert timings.totals['page_load'] >= 0.05
+	# The page load inside the action is not counted for the action as well
+	assert 0.02 <= timings.totals['action'] < 0.05
+
+
+@pytest.mark.asyncio
+async def test_sync_sections_and_no_collection_outside_a_step():
+	timings = StepTimings()
+	token = step_timings.set(timings)
+	try:
+		assert call_llm() == 'output'
+	finally:
+		step_timings.reset(token)
+
+	assert set(timings.totals) == {'llm'}
+
+	# Outside of a step the decorated functions still run, nothing is recorded
+	await act()
+	assert step_timings.get() is None
+	assert set(timings.totals) == {'llm'}
+
+
+@time_step_section('dom_extraction')
+async def build_dom_tree():
+	await asyncio.sleep(0.1)
+
+
+@time_step_section('screenshot')
+async def take_screenshot():
+	await asyncio.sleep(0.1)
+
+
+@time_step_section('action')
+async def act_and_capture_state():
+	await asyncio.sleep(0.05)
+	await asyncio.gather(build_dom_tree(), take_screenshot())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sections_are_subtracted_from_their_parent_once():
+	timings = StepTimings()
+	token = step_timings.set(timings)
+	try:
+		await act_and_capture_state()
+	finally:
+		step_timings.reset(token)
+
+	assert timings.totals['dom_extraction'] >= 0.1
+	assert timings.totals['screenshot'] >= 0.1
+	# 0.05s of its own, not 0.15 - 0.2 clamped to nothing
+	assert 0.04 <= timings.totals['action'] < 0.08
+	assert 0.08 <= timings.metrics['section_overlap'] < 0.13
+	sections = sum(timings.totals.values()) - timings.metrics['section_overlap']
+	assert 0.15 <= sections < 0.19
+
+
+@pytest.mark.asyncio
+async def test_sequential_sections_do_not_overlap():
+	timings = StepTimings()
+	token = step_timings.set(timings)
+	try:
+		await act()
+		await build_dom_tree()
+		await take_screenshot()
+	finally:
+		step_timings.reset(token)
+
+	assert 'section_overlap' not in timings.metrics
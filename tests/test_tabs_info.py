@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from browser_use.browser.context import BrowserContext, BrowserSession
+
+# run with:
+# python -m pytest tests/test_tabs_info.py
+
+
+class DummyPage:
+	def __init__(self, url, title, delay=0.2):
+		self.url = url
+		self._title = title
+		self.delay = delay
+		self.title_calls = 0
+		self.listeners = {}
+
+	async def title(self):
+		self.title_calls += 1
+		await asyncio.sleep(self.delay)
+		return self._title
+
+	def on(self, event, handler):
+		self.listeners.setdefault(event, []).append(handler)
+
+	once = on
+
+	def remove_listener(self, event, handler):
+		self.listeners.get(event, []).remove(handler)
+
+	def emit(self, event, arg):
+		for handler in list(self.listeners.get(event, [])):
+			handler(arg)
+
+
+class DummyContext:
+	def __init__(self, pages):
+		self.pages = pages
+
+
+@pytest.fixture
+def pages():
+	return [DummyPage(f'https://example.com/{i}', f'Tab {i}') for i in range(5)]
+
+
+@pytest.fixture
+def browser_context(pages):
+	browser_context = BrowserContext(browser=None)
+	browser_context.session = BrowserSession(context=DummyContext(pages), cached_state=None)
+	yield browser_context
+	browser_context.session = None
+
+
+@pytest.mark.asyncio
+async def test_titles_are_fetched_concurrently_and_cached(browser_context, pages):
+	start_time = time.monotonic()
+	tabs = await browser_context.get_tabs_info()
+	assert time.monotonic() - start_time < 0.5
+	assert [tab.title for tab in tabs] == [f'Tab {i}' for i in range(5)]
+
+	start_time = time.monotonic()
+	await browser_context.get_tabs_info()
+	assert time.monotonic() - start_time < 0.05
+	assert all(page.title_calls == 1 for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_navigation_invalidates_only_that_tab(browser_context, pages):
+	await browser_context.get_tabs_info()
+
+	pages[2].url = 'https://example.com/checkout'
+	pages[2]._title = 'Checkout'
+	pages[2].emit('domcontentloaded', pages[2])
+
+	tabs = await browser_context.get_tabs_info()
+	assert tabs[2].title == 'Checkout'
+	assert [page.title_calls for page in pages] == [1, 1, 2, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_hanging_tab_is_ignored(browser_context, pages):
+	pages[1].delay = 5
+
+	tabs = await browser_context.get_tabs_info()
+
+	assert tabs[1].url == 'about:blank'
+	assert tabs[0].title == 'Tab 0'
+	assert pages[1] not in browser_context.session.tab_titles
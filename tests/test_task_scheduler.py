@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from task_scheduler import SchedulerStats, TaskScheduler, percentile
+
+# run with:
+# python -m pytest tests/test_task_scheduler.py
+
+
+def test_percentile():
+	assert percentile([], 50) == 0.0
+	assert percentile([7], 95) == 7
+	assert percentile([4, 1, 3, 2], 0) == 1
+	assert percentile([4, 1, 3, 2], 100) == 4
+	assert percentile([4, 1, 3, 2], 50) == 2.5
+	assert percentile(list(range(11)), 90) == 9
+	assert percentile([0, 10], 95) == 9.5
+
+
+def test_stats():
+	stats = SchedulerStats(concurrency=2, started_at=100.0, finished_at=130.0, latencies=[1, 2, 3, 4],
+		completed=4, failed=1, timed_out=1)
+
+	assert stats.wall_time == 30
+	assert stats.tasks_per_minute == pytest.approx(8)
+	assert stats.to_dict() == pytest.approx({
+		'concurrency': 2,
+		'completed': 4,
+		'failed': 1,
+		'timed_out': 1,
+		'wall_time': 30,
+		'tasks_per_minute': 8,
+		'latency_p50': 2.5,
+		'latency_p95': 3.85,
+	})
+	assert '4 tasks in 30.0s with concurrency 2' in stats.summary()
+	assert SchedulerStats(concurrency=1).tasks_per_minute == 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_respected(fake_browser_pool):
+	running = 0
+	max_running = 0
+
+	async def run_task(item, context):
+		nonlocal running, max_running
+		running += 1
+		max_running = max(max_running, running)
+		await asyncio.sleep(0.01 * (item % 3))
+		running -= 1
+		return item * 2
+
+	scheduler = TaskScheduler(pool=fake_browser_pool, concurrency=3)
+	outcomes = await scheduler.run(range(10), run_task)
+
+	assert max_running == 3
+	assert fake_browser_pool.max_open_contexts == 3
+	# In submission order, whatever the completion order
+	assert [outcome.result for outcome in outcomes] == [i * 2 for i in range(10)]
+	assert scheduler.stats.completed == 10
+
+
+@pytest.mark.asyncio
+async def test_tasks_are_pulled_lazily(fake_browser_pool):
+	pulled = []
+
+	def tasks():
+		for i in range(6):
+			pulled.append(i)
+			yield i
+
+	async def run_task(item, context):
+		# No more than one task per worker is taken from the iterator ahead of time
+		assert len(pulled) <= item + 2
+		await asyncio.sleep(0.01)
+
+	await TaskScheduler(pool=fake_browser_pool, concurrency=2).run(tasks(), run_task, collect_outcomes=False)
+
+	assert pulled == list(range(6))
+
+
+@pytest.mark.asyncio
+async def test_timeout_marks_the_outcome_and_releases_the_browser(fake_browser_pool):
+	async def run_task(item, context):
+		await asyncio.sleep(10 if item == 1 else 0)
+		return item
+
+	completed = []
+	scheduler = TaskScheduler(pool=fake_browser_pool, concurrency=2, task_timeout=0.05)
+	outcomes = await scheduler.run(range(3), run_task, on_complete=completed.append)
+
+	assert outcomes[1].timed_out
+	assert isinstance(outcomes[1].error, asyncio.TimeoutError)
+	assert outcomes[1].latency < 1
+	assert [outcome.result for outcome in outcomes] == [0, None, 2]
+	assert len(completed) == 3
+	assert fake_browser_pool.open_contexts == 0
+	assert fake_browser_pool.served == 3
+	assert scheduler.stats.timed_out == 1
+	assert scheduler.stats.failed == 0
+
+
+@pytest.mark.asyncio
+async def test_a_failing_task_does_not_stop_the_others(fake_browser_pool):
+	async def run_task(item, context):
+		await asyncio.sleep(0.01)
+		if item % 2:
+			raise RuntimeError(f'task {item} failed')
+		return item
+
+	scheduler = TaskScheduler(pool=fake_browser_pool, concurrency=2)
+	outcomes = await scheduler.run(range(6), run_task)
+
+	assert [outcome.result for outcome in outcomes if outcome.error is None] == [0, 2, 4]
+	assert [str(outcome.error) for outcome in outcomes if outcome.error] == ['task 1 failed', 'task 3 failed', 'task 5 failed']
+	assert not any(outcome.timed_out for outcome in outcomes)
+	assert fake_browser_pool.open_contexts == 0
+	assert scheduler.stats.completed == 6
+	assert scheduler.stats.failed == 3
+	assert len(scheduler.stats.latencies) == 6
+
+
+def test_arguments_are_checked(fake_browser_pool):
+	with pytest.raises(ValueError):
+		TaskScheduler(pool=fake_browser_pool, concurrency=0)
+	with pytest.raises(ValueError):
+		TaskScheduler()
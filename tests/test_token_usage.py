@@ -0,0 +1,42 @@
+from langchain_core.messages import AIMessage
+
+from browser_use.utils import StepTokenUsage, record_token_usage, step_token_usage
+
+# run with:
+# python -m pytest tests/test_token_usage.py
+
+
+def test_usage_metadata_is_summed_per_step():
+	usage = StepTokenUsage()
+	token = step_token_usage.set(usage)
+	try:
+		record_token_usage(
+			AIMessage(
+				content='{}',
+				usage_metadata={
+					'input_tokens': 1200,
+					'output_tokens': 80,
+					'total_tokens': 1280,
+					'input_token_details': {'cache_read': 1024},
+				},
+			)
+		)
+		record_token_usage(
+			AIMessage(content='plan', usage_metadata={'input_tokens': 300, 'output_tokens': 20, 'total_tokens': 320})
+		)
+		# Providers that do not report usage are not counted as calls
+		record_token_usage(AIMessage(content='no usage'))
+	finally:
+		step_token_usage.reset(token)
+
+	assert usage.to_dict() == {
+		'prompt_tokens': 1500,
+		'completion_tokens': 100,
+		'cached_tokens': 1024,
+		'llm_calls': 2,
+	}
+
+
+def test_usage_outside_a_step_is_ignored():
+	record_token_usage(AIMessage(content='{}', usage_metadata={'input_tokens': 1, 'output_tokens': 1, 'total_tokens': 2}))
+	assert step_token_usage.get() is None